@@ -133,7 +133,18 @@ def build_next_groups_for_level(
     ordered_old_names = sorted(old_buckets.keys())
 
     candidate_rooms = get_candidate_rooms()
-    used_room_ids = set()
+
+    # ✅ la promotion peut tourner en plusieurs chunks (tâches Celery en parallèle):
+    # verrou sur le level cible (tenu jusqu'au commit) -> les chunks du même level
+    # attribuent noms/rooms l'un après l'autre, puis on repart des groupes déjà créés
+    AcademicLevel.objects.select_for_update().filter(pk=next_level.pk).first()
+    existing = list(
+        MonthlyClassGroup.objects
+        .filter(period=to_period, level=next_level)
+        .values_list("group_name", "room_id")
+    )
+    used_room_ids = {room_id for _, room_id in existing}
+    used_group_names = {name for name, _ in existing}
 
     result: Dict[int, MonthlyClassGroup] = {}
     new_group_index = 0
@@ -147,6 +158,8 @@ def build_next_groups_for_level(
         chunks = split_list(bucket, MAX_STUDENTS_PER_GROUP)
 
         for chunk in chunks:
+            while group_name_from_index(new_group_index) in used_group_names:
+                new_group_index += 1
             new_group_name = group_name_from_index(new_group_index)
             new_group_index += 1
 
@@ -191,6 +204,13 @@ def promote_students_for_next_period(
     - crée les groupes mensuels du mois suivant
     - crée les StudentMonthlyEnrollment
     """
+    # ✅ idempotent: un étudiant déjà inscrit au mois cible n'est pas re-promu
+    already_enrolled = set(
+        StudentMonthlyEnrollment.objects
+        .filter(period=to_period, student_id__in=student_ids)
+        .values_list("student_id", flat=True)
+    )
+
     current_enrollments = list(
         StudentMonthlyEnrollment.objects
         .select_related("group", "group__level", "group__room")
@@ -199,6 +219,7 @@ def promote_students_for_next_period(
             student_id__in=student_ids,
             status="active",
         )
+        .exclude(student_id__in=already_enrolled)
     )
 
     by_level: Dict[int, List[StudentMonthlyEnrollment]] = defaultdict(list)
@@ -206,9 +227,10 @@ def promote_students_for_next_period(
         by_level[enr.group.level_id].append(enr)
 
     created_count = 0
-    skipped_count = 0
+    skipped_count = len(already_enrolled)
 
-    for _, enrollments in by_level.items():
+    # ordre stable des verrous (level cible) entre chunks concurrents
+    for _, enrollments in sorted(by_level.items(), key=lambda kv: kv[1][0].group.level.order):
         current_level = enrollments[0].group.level
         next_level = get_next_level(current_level)
 
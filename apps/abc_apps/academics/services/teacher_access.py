@@ -0,0 +1,153 @@
+# =========================
+# apps/academics/services/teacher_access.py
+# =========================
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import TeacherCourseAssignment
+from apps.abc_apps.academics.utils import get_or_create_period_from_date
+
+TEACHER_ACCESS_TTL = 10 * 60   # filet de sécurité: les signaux invalident à chaque changement
+PERIOD_ID_TTL = 60 * 60
+
+# attribut posé sur la request: {period_id: TeacherAccess}
+_REQUEST_ATTR = "_teacher_access"
+
+
+@dataclass(frozen=True)
+class TeacherAccess:
+    """
+    Assignations d'un teacher pour UNE période (groupes de cette période):
+    les contrôles de permission deviennent des lookups en mémoire.
+    """
+    teacher_id: int
+    period_id: int
+    group_ids: FrozenSet[int] = frozenset()
+    speech_group_ids: FrozenSet[int] = frozenset()
+    titular_group_ids: FrozenSet[int] = frozenset()
+    course_ids_by_group: Dict[int, FrozenSet[int]] = field(default_factory=dict)
+
+    def teaches(self, group_id, course_id=None) -> bool:
+        try:
+            group_id = int(group_id)
+        except (TypeError, ValueError):
+            return False
+        if course_id is None:
+            return group_id in self.group_ids
+        try:
+            return int(course_id) in self.course_ids_by_group.get(group_id, frozenset())
+        except (TypeError, ValueError):
+            return False
+
+    def is_titular(self, group_id) -> bool:
+        try:
+            return int(group_id) in self.titular_group_ids
+        except (TypeError, ValueError):
+            return False
+
+    def course_ids(self, group_id) -> FrozenSet[int]:
+        return self.course_ids_by_group.get(int(group_id), frozenset())
+
+
+def period_id_for(day=None) -> int:
+    """
+    id de l'AcademicPeriod du jour (défaut: aujourd'hui), en cache.
+    """
+    day = day or timezone.localdate()
+    key = f"academics:period:{day.isoformat()}"
+    period_id = cache.get(key)
+    if period_id is None:
+        period_id = get_or_create_period_from_date(day).id
+        cache.set(key, period_id, PERIOD_ID_TTL)
+    return period_id
+
+
+def _version_key(teacher_id: int) -> str:
+    return f"teachers:access:{teacher_id}:version"
+
+
+def _access_version(teacher_id: int) -> int:
+    version = cache.get(_version_key(teacher_id))
+    if version is None:
+        version = 1
+        cache.add(_version_key(teacher_id), version, None)
+    return version
+
+
+def _access_key(teacher_id: int, period_id: int) -> str:
+    return f"teachers:access:{teacher_id}:v{_access_version(teacher_id)}:{period_id}"
+
+
+def _load_access(teacher_id: int, period_id: int) -> TeacherAccess:
+    # 1 requête, bornée à la période (index period/monthly_group)
+    rows = (
+        TeacherCourseAssignment.objects
+        .filter(teacher_id=teacher_id, monthly_group__period_id=period_id)
+        .values_list("monthly_group_id", "course_id", "is_titular", "is_speech_teacher")
+    )
+    groups, speech, titular, courses = set(), set(), set(), {}
+    for group_id, course_id, is_titular, is_speech_teacher in rows:
+        groups.add(group_id)
+        courses.setdefault(group_id, set()).add(course_id)
+        if is_titular:
+            titular.add(group_id)
+        if is_speech_teacher:
+            speech.add(group_id)
+
+    return TeacherAccess(
+        teacher_id=teacher_id,
+        period_id=period_id,
+        group_ids=frozenset(groups),
+        speech_group_ids=frozenset(speech),
+        titular_group_ids=frozenset(titular),
+        course_ids_by_group={g: frozenset(c) for g, c in courses.items()},
+    )
+
+
+def get_teacher_access(teacher, period_id: Optional[int] = None, request=None) -> TeacherAccess:
+    """
+    Contexte d'autorisation du teacher pour period_id (défaut: période courante).
+    Mémorisé sur la request, puis en cache (Redis) jusqu'au prochain changement
+    d'assignation (signaux academics) ou TEACHER_ACCESS_TTL.
+    """
+    if period_id is None:
+        period_id = period_id_for()
+
+    memo = None
+    if request is not None:
+        memo = getattr(request, _REQUEST_ATTR, None)
+        if memo is None:
+            memo = {}
+            setattr(request, _REQUEST_ATTR, memo)
+        if period_id in memo:
+            return memo[period_id]
+
+    key = _access_key(teacher.id, period_id)
+    access = cache.get(key)
+    if access is None:
+        access = _load_access(teacher.id, period_id)
+        cache.set(key, access, TEACHER_ACCESS_TTL)
+
+    if memo is not None:
+        memo[period_id] = access
+    return access
+
+
+def get_group_access(teacher, group, request=None) -> TeacherAccess:
+    """
+    Raccourci: contexte de la période du groupe (group.period_id).
+    """
+    return get_teacher_access(teacher, group.period_id, request=request)
+
+
+def invalidate_teacher_access(teacher_id: int) -> None:
+    """
+    Nouvelle version -> toutes les périodes en cache de ce teacher sont périmées.
+    """
+    try:
+        cache.incr(_version_key(teacher_id))
+    except ValueError:
+        cache.set(_version_key(teacher_id), 2, None)
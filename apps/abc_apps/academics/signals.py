@@ -0,0 +1,45 @@
+# =========================
+# apps/academics/signals.py
+# =========================
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.abc_apps.accounts.models import StudentProfile, TeacherProfile
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment, TeacherCourseAssignment
+from apps.abc_apps.academics.services.teacher_access import invalidate_teacher_access
+from apps.abc_apps.speeches.services.visibility import invalidate_visibility_scope
+
+
+def _invalidate_scopes(profile_model, profile_ids) -> None:
+    # scope des feeds speeches: clé par user, pas par profil
+    for user_id in profile_model.objects.filter(pk__in=profile_ids).values_list("user_id", flat=True):
+        invalidate_visibility_scope(user_id)
+
+
+@receiver(pre_save, sender=TeacherCourseAssignment)
+def remember_previous_assignment_teacher(sender, instance: TeacherCourseAssignment, **kwargs):
+    # assignation réattribuée à un autre teacher: l'ancien perd l'accès tout de suite
+    instance._previous_teacher_id = None
+    if instance.pk:
+        instance._previous_teacher_id = (
+            TeacherCourseAssignment.objects.filter(pk=instance.pk).values_list("teacher_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=TeacherCourseAssignment)
+@receiver(post_delete, sender=TeacherCourseAssignment)
+def refresh_teacher_access(sender, instance: TeacherCourseAssignment, **kwargs):
+    invalidate_teacher_access(instance.teacher_id)
+    previous = getattr(instance, "_previous_teacher_id", None)
+    teacher_ids = {instance.teacher_id}
+    if previous and previous != instance.teacher_id:
+        invalidate_teacher_access(previous)
+        teacher_ids.add(previous)
+    _invalidate_scopes(TeacherProfile, teacher_ids)
+
+
+@receiver(post_save, sender=StudentMonthlyEnrollment)
+@receiver(post_delete, sender=StudentMonthlyEnrollment)
+def refresh_student_visibility(sender, instance: StudentMonthlyEnrollment, **kwargs):
+    # inscription / changement de group: les posts "class" visibles changent tout de suite
+    _invalidate_scopes(StudentProfile, [instance.student_id])
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    StudentMonthlyObjective = apps.get_model("app_teacher", "StudentMonthlyObjective")
+    StudentMonthlyObjective.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_teacher', '0004_remove_studentproofscan_uniq_proofscan_period_student_course_purpose_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentmonthlyobjective',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
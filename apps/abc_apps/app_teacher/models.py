@@ -201,6 +201,7 @@ class StudentMonthlyObjective(models.Model):
 
     teacher_description = models.TextField(blank=True, default="")  # description/encouragement pour aider
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # version pour le GET conditionnel côté student
 
     class Meta:
         unique_together = ("period", "group", "student")  # 1 fiche / mois / student / classe
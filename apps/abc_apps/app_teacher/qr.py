@@ -0,0 +1,14 @@
+# apps/app_teacher/qr.py
+from apps.abc_apps.commons import qr_codec
+
+
+def parse_qr_data(qr_data: str) -> dict:
+    """
+    Supporte:
+    - LEGACY: fullName|studentCode|level|groupName|validUntil|statusCode
+    - ABC1:    ABC1|studentId|studentCode|validUntil|statusCode
+    - ABC2:    ABC2|studentId|studentCode|validUntil|statusCode|sig  (HMAC)
+    - ABCSTU:  ABCSTU:studentCode|studentId?
+    - CODE:    studentCode only
+    """
+    return qr_codec.decode(qr_codec.KIND_STUDENT, qr_data)
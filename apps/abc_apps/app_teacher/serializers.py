@@ -57,6 +57,17 @@ class HomeworkSubmissionSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
+class GradeItemSerializer(serializers.Serializer):
+    submission_id = serializers.IntegerField()
+    score = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True)
+    teacher_comment = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.ChoiceField(choices=HomeworkSubmission.STATUS_CHOICES, required=False)
+
+
+class BulkGradeSerializer(serializers.Serializer):
+    grades = serializers.ListField(child=GradeItemSerializer(), allow_empty=False, max_length=200)
+
+
 # ✅ QR enroll payload
 class EnrollByQrPayloadSerializer(serializers.Serializer):
     group_id = serializers.IntegerField()
@@ -67,6 +78,26 @@ class EnrollByQrPayloadSerializer(serializers.Serializer):
         default="active",
         required=False
     )
+
+
+class EnrollRosterSerializer(serializers.Serializer):
+    group_id = serializers.IntegerField()
+    qr_data = serializers.ListField(child=serializers.CharField(), allow_empty=False, max_length=200)
+
+    status = serializers.ChoiceField(
+        choices=[("pending", "Pending"), ("active", "Active"), ("inactive", "Inactive")],
+        default="active",
+        required=False
+    )
+
+
+class BatchProofScanSerializer(serializers.Serializer):
+    group_id = serializers.IntegerField()
+    qr_data = serializers.ListField(child=serializers.CharField(), allow_empty=False, max_length=200)
+    purpose = serializers.ChoiceField(choices=StudentProofScan.PURPOSE_CHOICES)
+    course = serializers.IntegerField(required=False, allow_null=True)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+    meta = serializers.DictField(required=False, default=dict)
     
 
 # ─────────────────────────────────────────────
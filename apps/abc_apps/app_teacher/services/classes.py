@@ -0,0 +1,134 @@
+# =========================
+# apps/app_teacher/services/classes.py
+# =========================
+from datetime import date
+from typing import List, Optional
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import MonthlyClassGroup, StudentMonthlyEnrollment, TeacherCourseAssignment
+from apps.abc_apps.academics.serializers import TeacherCourseAssignmentSerializer
+from apps.abc_apps.app_teacher.models import WeeklyTeachingPlan
+from apps.abc_apps.app_teacher.serializers import StudentMiniSerializer, WeeklyTeachingPlanSerializer
+
+# liste par défaut: mois précédent -> mois à venir (groups créés à l'avance)
+CLASS_LIST_MONTHS_BACK = 1
+
+
+def group_data(group: MonthlyClassGroup) -> dict:
+    return {
+        "id": group.id,
+        "label": group.label,
+        "period": group.period.key,
+        "level": group.level.label,
+        "group_name": group.group_name,
+        "room": group.room.code,
+        "is_active": group.is_active,
+    }
+
+
+# ─────────────────────────────────────────────
+# Liste des classes
+# ─────────────────────────────────────────────
+def teacher_groups(teacher, *, year: Optional[int] = None, month: Optional[int] = None,
+                   history: bool = False) -> List[MonthlyClassGroup]:
+    """
+    Groups du teacher, dédoublonnés côté DB (DISTINCT), 1 requête.
+    year/month: une période précise; history: toutes les périodes; sinon fenêtre récente.
+    """
+    qs = (
+        MonthlyClassGroup.objects
+        .select_related("period", "level", "room")
+        .filter(teacher_assignments__teacher=teacher)
+    )
+    if year and month:
+        qs = qs.filter(period__year=year, period__month=month)
+    elif not history:
+        today = timezone.localdate()
+        since = today.year * 12 + today.month - 1 - CLASS_LIST_MONTHS_BACK
+        y, m = divmod(since, 12)
+        qs = qs.filter(Q(period__year__gt=y) | Q(period__year=y, period__month__gte=m + 1))
+    return list(qs.distinct())
+
+
+def groups_version(groups: List[MonthlyClassGroup]) -> tuple:
+    return tuple((g.id, g.updated_at, g.period.updated_at) for g in groups)
+
+
+# ─────────────────────────────────────────────
+# Détails d'une classe
+# ─────────────────────────────────────────────
+def class_assignments(teacher, group_id) -> List[TeacherCourseAssignment]:
+    """
+    Assignments du teacher sur le group, avec le group (period/level/room) dans le même JOIN.
+    Liste vide = pas autorisé (ou group inexistant).
+    """
+    return list(
+        TeacherCourseAssignment.objects
+        .select_related(
+            "teacher__user", "course", "classroom", "period",
+            "monthly_group__period", "monthly_group__level", "monthly_group__room",
+        )
+        .filter(teacher=teacher, monthly_group_id=group_id)
+        .order_by("id")
+    )
+
+
+def class_details_version(teacher, assignments: List[TeacherCourseAssignment], week_start: date) -> tuple:
+    """
+    Version des détails sans charger le roster: 2 agrégats (roster actif, plans de la semaine).
+    """
+    group = assignments[0].monthly_group
+    roster = StudentMonthlyEnrollment.objects.filter(group=group, status="active").aggregate(
+        n=Count("id"), enrollment=Max("updated_at"), student=Max("student__updated_at"),
+    )
+    plans = WeeklyTeachingPlan.objects.filter(
+        teacher=teacher, monthly_group=group, week_start=week_start,
+    ).aggregate(n=Count("id"), updated=Max("updated_at"))
+    return (
+        group.id, group.updated_at, week_start,
+        *[(a.id, a.updated_at) for a in assignments],
+        roster["n"], roster["enrollment"], roster["student"],
+        plans["n"], plans["updated"],
+    )
+
+
+def class_details(teacher, assignments: List[TeacherCourseAssignment], week_start: date) -> dict:
+    """
+    Payload complet, à partir des assignments déjà évalués: +1 requête roster, +1 requête plans.
+    """
+    group = assignments[0].monthly_group
+    course_ids = {a.course_id for a in assignments}
+
+    enrolls = (
+        StudentMonthlyEnrollment.objects
+        .select_related("student__user")
+        .filter(group=group, status="active")
+        .order_by("student__user__first_name", "student__user__last_name")
+    )
+    plan_by_course_id = {
+        p.course_id: p
+        for p in WeeklyTeachingPlan.objects.select_related(
+            "course", "period", "monthly_group__level", "monthly_group__room",
+        ).filter(
+            teacher=teacher, monthly_group=group, course_id__in=course_ids, week_start=week_start,
+        )
+    }
+
+    weekly_plans_data = []
+    for a in assignments:
+        p = plan_by_course_id.get(a.course_id)
+        weekly_plans_data.append({
+            "course_id": a.course_id,
+            "course_name": a.course.name,
+            "plan": WeeklyTeachingPlanSerializer(p).data if p else None,
+        })
+
+    return {
+        "group": group_data(group),
+        "week_start": week_start.isoformat(),
+        "courses": TeacherCourseAssignmentSerializer(assignments, many=True).data,
+        "students": StudentMiniSerializer([e.student for e in enrolls], many=True).data,
+        "weekly_plans": weekly_plans_data,
+    }
@@ -0,0 +1,113 @@
+# =========================
+# apps/app_teacher/services/enrollment.py
+# =========================
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment
+from apps.abc_apps.accounts.models import StudentProfile
+from apps.abc_apps.app_teacher.services.students import outcome, resolve_qr_students
+
+
+@transaction.atomic
+def enroll_roster(*, group, qr_items: List[str], new_status: str = "active") -> dict:
+    """
+    Même règles que l'enroll unitaire, pour toute une classe:
+    - pas d'enrollment ce mois -> créé dans group
+    - déjà dans group -> status mis à jour si différent
+    - déjà dans un AUTRE group du mois -> conflict (rien écrit)
+    Puis current_level / group_name des profils enrollés.
+    Écritures: 1 bulk_create + 1 bulk_update enrollments, 1 bulk_update profils.
+    status par QR: created | updated | unchanged | conflict | duplicate | invalid
+    """
+    rows = resolve_qr_students(qr_items)
+
+    results: Dict[int, dict] = {}
+    pending, seen = [], set()
+    for row in rows:
+        if row["error"]:
+            results[row["index"]] = outcome(row, "invalid")
+        elif row["student"].id in seen:
+            results[row["index"]] = outcome(row, "duplicate")
+        else:
+            seen.add(row["student"].id)
+            pending.append(row)
+
+    student_ids = [row["student"].id for row in pending]
+    if student_ids:
+        now = timezone.now()
+
+        # enrollments du mois (tous groups), verrouillés jusqu'à la fin de la transaction
+        existing: Dict[int, List[StudentMonthlyEnrollment]] = {}
+        for e in (
+            StudentMonthlyEnrollment.objects
+            .select_for_update()
+            .filter(period_id=group.period_id, student_id__in=student_ids)
+            .order_by("id")
+        ):
+            existing.setdefault(e.student_id, []).append(e)
+
+        to_create, to_update, status_by_student = [], [], {}
+        for sid in student_ids:
+            enrollments = existing.get(sid)
+            if not enrollments:
+                to_create.append(StudentMonthlyEnrollment(
+                    period_id=group.period_id, student_id=sid, group=group, status=new_status,
+                ))
+                status_by_student[sid] = "created"
+                continue
+
+            same_group = next((e for e in enrollments if e.group_id == group.id), None)
+            if same_group is None:
+                status_by_student[sid] = "conflict"
+            elif same_group.status != new_status:
+                same_group.status = new_status
+                same_group.updated_at = now
+                to_update.append(same_group)
+                status_by_student[sid] = "updated"
+            else:
+                status_by_student[sid] = "unchanged"
+
+        if to_create:
+            StudentMonthlyEnrollment.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            StudentMonthlyEnrollment.objects.bulk_update(to_update, ["status", "updated_at"])
+
+        enrollment_ids = dict(
+            StudentMonthlyEnrollment.objects
+            .filter(period_id=group.period_id, group=group, student_id__in=student_ids)
+            .values_list("student_id", "id")
+        )
+
+        # ✅ sync quick fields (profils enrollés dans ce group seulement)
+        profiles = []
+        for row in pending:
+            student = row["student"]
+            if status_by_student[student.id] == "conflict":
+                continue
+            student.current_level = group.level.label
+            student.group_name = group.group_name
+            student.updated_at = now
+            profiles.append(student)
+        if profiles:
+            StudentProfile.objects.bulk_update(profiles, ["current_level", "group_name", "updated_at"])
+
+        for row in pending:
+            sid = row["student"].id
+            extra = {"enrollment_id": enrollment_ids.get(sid)}
+            if status_by_student[sid] == "conflict":
+                extra["current_group_id"] = existing[sid][0].group_id
+            results[row["index"]] = outcome(row, status_by_student[sid], **extra)
+
+    items = [results[i] for i in range(len(rows))]
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return {
+        "period": group.period.key,
+        "group_id": group.id,
+        "items": items,
+        "counts": counts,
+    }
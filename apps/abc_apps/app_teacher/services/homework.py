@@ -0,0 +1,98 @@
+# =========================
+# apps/app_teacher/services/homework.py
+# =========================
+from typing import List
+
+from django.db import transaction
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment
+from apps.abc_apps.app_teacher.models import HomeworkSubmission
+
+GRADE_BATCH_MAX = 200
+
+
+def _enrollment_count(qs):
+    # COUNT corrélé: qs filtré sur 1 seul group -> GROUP BY group_id = 1 ligne
+    return Coalesce(
+        Subquery(qs.order_by().values("group_id").annotate(c=Count("pk")).values("c"), output_field=IntegerField()),
+        0,
+    )
+
+
+def with_submission_counts(homeworks):
+    """
+    Compteurs par devoir en 1 requête groupée:
+    submitted / late / graded (submissions), active_students / missing (enrollments actifs du group
+    sans submission pour ce devoir).
+    """
+    active = StudentMonthlyEnrollment.objects.filter(
+        group_id=OuterRef("group_id"), period_id=OuterRef("period_id"), status="active",
+    )
+    missing = active.filter(
+        ~Exists(HomeworkSubmission.objects.filter(homework_id=OuterRef(OuterRef("pk")), student_id=OuterRef("student_id")))
+    )
+    return homeworks.annotate(
+        submitted=Count("submissions", filter=Q(submissions__status="submitted")),
+        late=Count("submissions", filter=Q(submissions__status="late")),
+        graded=Count("submissions", filter=Q(submissions__status="graded")),
+        active_students=_enrollment_count(active),
+        missing=_enrollment_count(missing),
+    )
+
+
+def homework_summary(homeworks) -> List[dict]:
+    return [
+        {
+            "id": hw.id,
+            "title": hw.title,
+            "course_id": hw.course_id,
+            "course_name": hw.course.name,
+            "group_id": hw.group_id,
+            "due_date": hw.due_date,
+            "status": hw.status,
+            "active_students": hw.active_students,
+            "submitted": hw.submitted,
+            "late": hw.late,
+            "graded": hw.graded,
+            "missing": hw.missing,
+        }
+        for hw in with_submission_counts(homeworks.select_related("course"))
+    ]
+
+
+@transaction.atomic
+def bulk_grade(*, homework, grades: List[dict]) -> dict:
+    """
+    grades: [{"submission_id", "score"?, "teacher_comment"?, "status"?}]
+    Champs absents inchangés (score sans status -> "graded"); 1 SELECT FOR UPDATE + 1 bulk_update.
+    """
+    if len(grades) > GRADE_BATCH_MAX:
+        raise ValueError(f"Too many grades (max {GRADE_BATCH_MAX})")
+
+    by_id = {g["submission_id"]: g for g in grades}  # doublon: le dernier gagne
+    subs = list(
+        HomeworkSubmission.objects.select_for_update().filter(homework=homework, id__in=list(by_id)).order_by("id")
+    )
+
+    now = timezone.now()
+    for sub in subs:
+        grade = by_id[sub.id]
+        for field in ("score", "teacher_comment", "status"):
+            if field in grade:
+                setattr(sub, field, grade[field])
+        if "score" in grade and "status" not in grade:
+            sub.status = "graded"
+        sub.updated_at = now  # bulk_update ne passe pas par auto_now
+
+    if subs:
+        HomeworkSubmission.objects.bulk_update(subs, ["score", "teacher_comment", "status", "updated_at"])
+
+    found = {sub.id for sub in subs}
+    return {
+        "homework_id": homework.id,
+        "updated": len(subs),
+        "not_found": [sid for sid in by_id if sid not in found],
+    }
@@ -0,0 +1,118 @@
+# =========================
+# apps/app_teacher/services/proof_scans.py
+# =========================
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment
+from apps.abc_apps.app_teacher.models import StudentProofScan
+from apps.abc_apps.app_teacher.services.students import outcome, resolve_qr_students
+
+
+def _enrollments_for_group(group, student_ids: List[int]) -> Dict[int, StudentMonthlyEnrollment]:
+    """
+    Enrollment du mois par student (celui de ce group en priorité).
+    Les manquants sont créés en 1 bulk_create.
+    """
+    by_student = {}
+    for e in StudentMonthlyEnrollment.objects.filter(period_id=group.period_id, student_id__in=student_ids).order_by("id"):
+        current = by_student.get(e.student_id)
+        if current is None or (current.group_id != group.id and e.group_id == group.id):
+            by_student[e.student_id] = e
+
+    missing = [sid for sid in student_ids if sid not in by_student]
+    if missing:
+        StudentMonthlyEnrollment.objects.bulk_create(
+            [StudentMonthlyEnrollment(period_id=group.period_id, student_id=sid, group=group, status="active")
+             for sid in missing],
+            ignore_conflicts=True,
+        )
+        for e in StudentMonthlyEnrollment.objects.filter(period_id=group.period_id, group=group, student_id__in=missing):
+            by_student[e.student_id] = e
+    return by_student
+
+
+@transaction.atomic
+def batch_proof_scan(*, teacher, group, qr_items: List[str], purpose: str, course=None,
+                     note: str = "", meta: Optional[dict] = None) -> dict:
+    """
+    Même effet que N scans unitaires (enrollment aligné sur le group,
+    exam_unlock si exam_eligible, 1 StudentProofScan par student) en requêtes constantes:
+    1 IN students, 1 lecture des scans existants, 1-2 enrollments (+ bulk_create), 1 bulk_update,
+    1 bulk_create(ignore_conflicts) des scans. Doublon -> rien d'écrit pour ce student.
+    status par QR: created | duplicate | invalid
+    """
+    rows = resolve_qr_students(qr_items)
+
+    results: Dict[int, dict] = {}
+    pending, seen = [], set()
+    for row in rows:
+        if row["error"]:
+            results[row["index"]] = outcome(row, "invalid")
+        elif row["student"].id in seen:
+            results[row["index"]] = outcome(row, "duplicate")
+        else:
+            seen.add(row["student"].id)
+            pending.append(row)
+
+    student_ids = [row["student"].id for row in pending]
+    if student_ids:
+        now = timezone.now()
+
+        # ✅ doublons d'abord (la contrainte unique ne couvre pas course NULL):
+        # comme le scan unitaire (rollback sur doublon), un doublon ne touche pas à l'enrollment
+        scans = StudentProofScan.objects.filter(
+            period_id=group.period_id, group=group, purpose=purpose, student_id__in=student_ids,
+        )
+        scans = scans.filter(course=course) if course else scans.filter(course__isnull=True)
+        already = set(scans.values_list("student_id", flat=True))
+        new_ids = [sid for sid in student_ids if sid not in already]
+
+        # ✅ enrollments (nouveaux scans seulement): alignés sur le group + exam_unlock
+        enrollments = _enrollments_for_group(group, new_ids) if new_ids else {}
+        changed = []
+        for e in enrollments.values():
+            dirty = False
+            if e.group_id != group.id:
+                e.group = group
+                dirty = True
+            if purpose == "exam_eligible" and not e.exam_unlock:
+                e.exam_unlock = True
+                dirty = True
+            if dirty:
+                e.updated_at = now
+                changed.append(e)
+        if changed:
+            StudentMonthlyEnrollment.objects.bulk_update(changed, ["group", "exam_unlock", "updated_at"])
+
+        StudentProofScan.objects.bulk_create(
+            [
+                StudentProofScan(
+                    teacher=teacher, period_id=group.period_id, group=group,
+                    student_id=sid, course=course, purpose=purpose,
+                    note=note, meta=meta or {},
+                )
+                for sid in new_ids
+            ],
+            ignore_conflicts=True,
+        )
+        scan_ids = dict(scans.values_list("student_id", "id"))
+
+        for row in pending:
+            sid = row["student"].id
+            results[row["index"]] = outcome(
+                row,
+                "duplicate" if sid in already else "created",
+                scan_id=scan_ids.get(sid),
+                enrollment_id=enrollments[sid].id if sid in enrollments else None,
+            )
+
+    items = [results[i] for i in range(len(rows))]
+    return {
+        "items": items,
+        "created": sum(1 for i in items if i["status"] == "created"),
+        "duplicates": sum(1 for i in items if i["status"] == "duplicate"),
+        "invalid": sum(1 for i in items if i["status"] == "invalid"),
+    }
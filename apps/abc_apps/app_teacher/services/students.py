@@ -0,0 +1,66 @@
+# =========================
+# apps/app_teacher/services/students.py
+# =========================
+from typing import List
+
+from django.db.models import Q
+
+from apps.abc_apps.accounts.models import StudentProfile
+from apps.abc_apps.app_teacher.qr import parse_qr_data
+
+QR_BATCH_MAX = 200
+
+
+def resolve_qr_students(qr_items: List[str]) -> List[dict]:
+    """
+    Parse N QR + 1 seule requête IN pour retrouver les students.
+    Retourne 1 dict par QR (même ordre):
+    {"index", "parsed", "student", "error"}  (student None si error)
+    """
+    if len(qr_items) > QR_BATCH_MAX:
+        raise ValueError(f"Too many QR codes (max {QR_BATCH_MAX})")
+
+    rows = []
+    for index, qr_data in enumerate(qr_items):
+        try:
+            rows.append({"index": index, "parsed": parse_qr_data(qr_data), "student": None, "error": None})
+        except (TypeError, ValueError) as e:
+            rows.append({"index": index, "parsed": None, "student": None, "error": str(e)})
+
+    ids = {r["parsed"]["student_id"] for r in rows if r["parsed"] and r["parsed"].get("student_id")}
+    codes = {r["parsed"]["student_code"] for r in rows if r["parsed"] and not r["parsed"].get("student_id")}
+    if not ids and not codes:
+        return rows
+
+    students = list(
+        StudentProfile.objects.select_related("user").filter(Q(id__in=ids) | Q(student_code__in=codes))
+    )
+    by_id = {s.id: s for s in students}
+    by_code = {s.student_code: s for s in students}
+
+    for r in rows:
+        parsed = r["parsed"]
+        if not parsed:
+            continue
+        # même règle que le scan unitaire: student_id prioritaire sur student_code
+        if parsed.get("student_id"):
+            r["student"] = by_id.get(parsed["student_id"])
+        else:
+            r["student"] = by_code.get(parsed["student_code"])
+        if r["student"] is None:
+            r["error"] = "Student not found"
+    return rows
+
+
+def outcome(row: dict, status: str, **extra) -> dict:
+    parsed = row["parsed"] or {}
+    student = row["student"]
+    return {
+        "index": row["index"],
+        "status": status,
+        "qr_version": parsed.get("version"),
+        "student_id": student.id if student else parsed.get("student_id"),
+        "student_code": student.student_code if student else parsed.get("student_code"),
+        "error": row["error"],
+        **extra,
+    }
@@ -1,3 +1,241 @@
+from datetime import time
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.abc_apps.accounts.models import StudentProfile, TeacherProfile, User
+from apps.abc_apps.academics.models import (
+    AcademicLevel,
+    AcademicPeriod,
+    Course,
+    MonthlyClassGroup,
+    Room,
+    StudentMonthlyEnrollment,
+    TeacherCourseAssignment,
+)
+from apps.abc_apps.app_teacher.models import Homework, HomeworkSubmission, StudentProofScan
+
+
+class TeacherBatchTestBase(TestCase):
+    """
+    Fixtures communes: 1 teacher assigné (titulaire) à 1 group de la période courante, 3 students.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.period, _ = AcademicPeriod.objects.get_or_create(year=today.year, month=today.month)
+        level = AcademicLevel.objects.create(code="FOUNDATION_1", label="Foundation 1", order=1)
+        room = Room.objects.create(code="R1", name="Room 1")
+        cls.group = MonthlyClassGroup.objects.create(
+            period=cls.period, level=level, group_name="A", room=room, start_time=time(8, 15)
+        )
+        cls.other_group = MonthlyClassGroup.objects.create(
+            period=cls.period, level=level, group_name="B", room=room, start_time=time(10, 15)
+        )
+        cls.course = Course.objects.create(name="Grammar")
+
+        user = User.objects.create_user(username="teacher", email="teacher@example.com", password="x", role="teacher")
+        cls.teacher = TeacherProfile.objects.create(user=user, teacher_code="T0001")
+        TeacherCourseAssignment.objects.create(
+            teacher=cls.teacher, classroom=room, course=cls.course, is_titular=True,
+            start_date=today, period=cls.period, monthly_group=cls.group,
+        )
+
+        cls.students = []
+        for i in range(3):
+            u = User.objects.create_user(
+                username=f"student{i}", email=f"student{i}@example.com", password="x", role="student"
+            )
+            cls.students.append(StudentProfile.objects.create(
+                user=u, student_code=f"ST-{i:03d}", current_level="", group_name=""
+            ))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher.user)
+
+
+class BatchProofScanTests(TeacherBatchTestBase):
+
+    def test_scan_batch_reports_created_duplicate_and_invalid(self):
+        s0, s1, _ = self.students
+        StudentProofScan.objects.create(
+            teacher=self.teacher, period=self.period, group=self.group,
+            student=s1, purpose="exam_eligible",
+        )
+
+        response = self.client.post(
+            "/api/teacher/proof/scan-batch/",
+            {
+                "group_id": self.group.id,
+                "purpose": "exam_eligible",
+                "qr_data": [s0.student_code, f"ABCSTU:{s1.student_code}|{s1.id}", s0.student_code, "ST-404"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        items = response.data["data"]["items"]
+        self.assertEqual([i["status"] for i in items], ["created", "duplicate", "duplicate", "invalid"])
+        self.assertEqual(StudentProofScan.objects.filter(student=s0).count(), 1)
+        self.assertTrue(
+            StudentMonthlyEnrollment.objects.get(period=self.period, student=s0, group=self.group).exam_unlock
+        )
+        # doublon: enrollment ni créé ni débloqué
+        self.assertFalse(StudentMonthlyEnrollment.objects.filter(student=s1).exists())
+
+    def test_scan_batch_requires_assignment(self):
+        response = self.client.post(
+            "/api/teacher/proof/scan-batch/",
+            {"group_id": self.other_group.id, "purpose": "book_completed", "qr_data": ["ST-000"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class EnrollRosterTests(TeacherBatchTestBase):
+
+    def test_enroll_roster_creates_updates_and_reports_conflicts(self):
+        s0, s1, s2 = self.students
+        StudentMonthlyEnrollment.objects.create(period=self.period, student=s1, group=self.group, status="pending")
+        StudentMonthlyEnrollment.objects.create(period=self.period, student=s2, group=self.other_group, status="active")
+
+        response = self.client.post(
+            "/api/teacher/enrollments/enroll-roster/",
+            {"group_id": self.group.id, "qr_data": [s0.student_code, s1.student_code, s2.student_code, "ST-404"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        items = response.data["data"]["items"]
+        self.assertEqual([i["status"] for i in items], ["created", "updated", "conflict", "invalid"])
+        self.assertEqual(items[2]["current_group_id"], self.other_group.id)
+
+        self.assertEqual(
+            StudentMonthlyEnrollment.objects.get(period=self.period, student=s1, group=self.group).status, "active"
+        )
+        self.assertFalse(StudentMonthlyEnrollment.objects.filter(student=s2, group=self.group).exists())
+
+        s0.refresh_from_db()
+        s2.refresh_from_db()
+        self.assertEqual((s0.current_level, s0.group_name), ("Foundation 1", "A"))
+        self.assertEqual(s2.group_name, "")
+
+
+class TeacherClassDetailsTests(TeacherBatchTestBase):
+
+    def test_details_etag_revalidates_until_roster_changes(self):
+        url = f"/api/teacher/classes/{self.group.id}/details/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        StudentMonthlyEnrollment.objects.create(
+            period=self.period, student=self.students[0], group=self.group, status="active"
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s["id"] for s in response.data["data"]["students"]], [self.students[0].id])
+
+    def test_details_forbidden_without_assignment(self):
+        response = self.client.get(f"/api/teacher/classes/{self.other_group.id}/details/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_list_is_deduplicated(self):
+        TeacherCourseAssignment.objects.create(
+            teacher=self.teacher, classroom=self.group.room, course=Course.objects.create(name="Speech"),
+            start_date=timezone.localdate(), period=self.period, monthly_group=self.group,
+        )
+        response = self.client.get("/api/teacher/classes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([g["id"] for g in response.data["data"]], [self.group.id])
+
+
+class TeacherScheduleConditionalGetTests(TeacherBatchTestBase):
+
+    def test_schedule_not_modified_until_assignment_added(self):
+        response = self.client.get("/api/teacher/schedule/")
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        self.assertEqual(self.client.get("/api/teacher/schedule/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get("/api/teacher/schedule/", HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304
+        )
+
+        TeacherCourseAssignment.objects.create(
+            teacher=self.teacher, classroom=self.group.room, course=Course.objects.create(name="Speech"),
+            start_date=timezone.localdate(), period=self.period, monthly_group=self.other_group,
+        )
+        response = self.client.get("/api/teacher/schedule/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 2)
+
+
+class HomeworkSummaryTests(TeacherBatchTestBase):
+
+    def setUp(self):
+        super().setUp()
+        for s in self.students:
+            StudentMonthlyEnrollment.objects.create(period=self.period, student=s, group=self.group, status="active")
+        self.homework = Homework.objects.create(
+            teacher=self.teacher, period=self.period, group=self.group, course=self.course, title="Unit 1",
+        )
+        s0, s1, _ = self.students
+        self.sub0 = HomeworkSubmission.objects.create(homework=self.homework, student=s0)
+        self.sub1 = HomeworkSubmission.objects.create(homework=self.homework, student=s1, status="late")
+
+    def test_summary_counts_missing_against_active_enrollments(self):
+        response = self.client.get("/api/teacher/homeworks/summary/")
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data["data"]
+        self.assertEqual(
+            (row["active_students"], row["submitted"], row["late"], row["graded"], row["missing"]),
+            (3, 1, 1, 0, 1),
+        )
+
+    def test_bulk_grade(self):
+        response = self.client.post(
+            f"/api/teacher/homeworks/{self.homework.id}/grade/",
+            {"grades": [
+                {"submission_id": self.sub0.id, "score": "15.50", "teacher_comment": "Good"},
+                {"submission_id": self.sub1.id, "teacher_comment": "Late"},
+                {"submission_id": 999999, "score": "10"},
+            ]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["updated"], 2)
+        self.assertEqual(response.data["data"]["not_found"], [999999])
+
+        self.sub0.refresh_from_db()
+        self.sub1.refresh_from_db()
+        self.assertEqual((str(self.sub0.score), self.sub0.status), ("15.50", "graded"))
+        self.assertEqual((self.sub1.status, self.sub1.teacher_comment), ("late", "Late"))
+
+
+class EnrollHistoryTests(TeacherBatchTestBase):
+
+    def test_history_without_group_covers_past_periods(self):
+        first = self.period.year * 12 + self.period.month - 2  # mois précédent
+        past_period, _ = AcademicPeriod.objects.get_or_create(year=first // 12, month=first % 12 + 1)
+        past_group = MonthlyClassGroup.objects.create(
+            period=past_period, level=self.group.level, group_name="A", room=self.group.room, start_time=time(8, 15)
+        )
+        TeacherCourseAssignment.objects.create(
+            teacher=self.teacher, classroom=self.group.room, course=self.course,
+            start_date=timezone.localdate(), period=past_period, monthly_group=past_group,
+        )
+        past = StudentMonthlyEnrollment.objects.create(
+            period=past_period, student=self.students[0], group=past_group, status="active"
+        )
 
-# Create your tests here.
+        response = self.client.get("/api/teacher/enrollments/history/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(past.id, [i["id"] for i in response.data["data"]["items"]])
@@ -1,10 +1,7 @@
 from __future__ import annotations
 from django.utils import timezone
 from datetime import date, timedelta
-import hmac
-import hashlib
 
-from django.conf import settings
 from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.forms import ValidationError
@@ -23,22 +20,31 @@ from apps.abc_apps.academics.models import (
     StudentProfile,
 )
 from apps.abc_apps.academics.serializers import StudentMonthlyEnrollmentSerializer, TeacherCourseAssignmentSerializer
-from apps.abc_apps.accounts.views import bad
+from apps.abc_apps.academics.services.teacher_access import get_group_access, get_teacher_access
+from apps.common.responses import bad
+from apps.abc_apps.commons.http import ConditionalGetMixin, queryset_version
 from apps.abc_apps.commons.responses import ok
 from apps.common.permissions import IsTeacher
 
+from .qr import parse_qr_data
 from .models import ClassGeneralRemark, StudentMonthlyObjective, StudentProofScan, StudentRemark, WeeklyTeachingPlan, Homework, HomeworkSubmission
 from .serializers import (
     ClassGeneralRemarkSerializer,
     StudentMonthlyObjectiveSerializer,
     StudentProofScanSerializer,
     StudentRemarkSerializer,
-    StudentMiniSerializer,
     WeeklyTeachingPlanSerializer,
     HomeworkSerializer,
     HomeworkSubmissionSerializer,
     EnrollByQrPayloadSerializer,
+    BatchProofScanSerializer,
+    EnrollRosterSerializer,
+    BulkGradeSerializer,
 )
+from .services.classes import class_assignments, class_details, class_details_version, group_data, groups_version, teacher_groups
+from .services.enrollment import enroll_roster
+from .services.homework import bulk_grade, homework_summary
+from .services.proof_scans import batch_proof_scan
 
 # ---------------------------
 # Helpers
@@ -52,97 +58,11 @@ from .serializers import (
 def monday_of(d: date) -> date:
     return d - timedelta(days=d.weekday())
 
-def parse_qr_data(qr_data: str) -> dict:
-    """
-    Supporte:
-    - LEGACY: fullName|studentCode|level|groupName|validUntil|statusCode
-    - ABC1:    ABC1|studentId|studentCode|validUntil|statusCode
-    - ABC2:    ABC2|studentId|studentCode|validUntil|statusCode|sig  (HMAC)
-    - ABCSTU:  ABCSTU:studentCode|studentId?
-    - CODE:    studentCode only
-    """
-    s = (qr_data or "").strip()
-    if not s:
-        raise ValueError("Empty QR data")
-
-    # ✅ ABCSTU:ST-001|123
-    if s.startswith("ABCSTU:"):
-        payload = s.replace("ABCSTU:", "", 1)
-        parts = payload.split("|")
-        student_code = parts[0].strip()
-        student_id = int(parts[1]) if len(parts) >= 2 and parts[1].strip().isdigit() else None
-        if not student_code:
-            raise ValueError("Invalid student_code")
-        return {
-            "version": "ABCSTU",
-            "student_id": student_id,
-            "student_code": student_code,
-            "valid_until": None,
-            "status_code": None,
-        }
-
-    # ✅ CODE ONLY: ST-001
-    if "|" not in s:
-        return {
-            "version": "CODE",
-            "student_id": None,
-            "student_code": s,
-            "valid_until": None,
-            "status_code": None,
-        }
-
-    parts = s.split("|")
-
-    # ✅ ABC1
-    if len(parts) == 5 and parts[0] == "ABC1":
-        _, student_id, student_code, valid_until, status_code = parts
-        return {
-            "version": "ABC1",
-            "student_id": int(student_id),
-            "student_code": student_code.strip(),
-            "valid_until": valid_until.strip(),
-            "status_code": status_code.strip().lower(),
-        }
-
-    # ✅ ABC2 (signed)
-    if len(parts) == 6 and parts[0] == "ABC2":
-        _, student_id, student_code, valid_until, status_code, sig = parts
-        payload = f"{student_id}|{student_code}|{valid_until}|{status_code}".encode()
-
-        expected = hmac.new(
-            key=settings.SECRET_KEY.encode(),
-            msg=payload,
-            digestmod=hashlib.sha256,
-        ).hexdigest()
-
-        if not hmac.compare_digest(expected, sig):
-            raise ValueError("Invalid QR signature")
-
-        return {
-            "version": "ABC2",
-            "student_id": int(student_id),
-            "student_code": student_code.strip(),
-            "valid_until": valid_until.strip(),
-            "status_code": status_code.strip().lower(),
-        }
-
-    # ✅ LEGACY
-    if len(parts) == 6:
-        full_name, student_code, level, group_name, valid_until, status_code = parts
-        return {
-            "version": "LEGACY",
-            "student_id": None,
-            "student_code": student_code.strip(),
-            "valid_until": valid_until.strip(),
-            "status_code": status_code.strip().lower(),
-        }
-
-    raise ValueError("Unsupported QR format")
 
 # ---------------------------
 # 1) Teacher Schedule
 # ---------------------------
-class TeacherScheduleViewSet(ViewSet):
+class TeacherScheduleViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsTeacher]
 
     def list(self, request):
@@ -160,54 +80,53 @@ class TeacherScheduleViewSet(ViewSet):
         if monthly_group_id:
             qs = qs.filter(monthly_group_id=monthly_group_id)
 
-        return ok(TeacherCourseAssignmentSerializer(qs, many=True).data)
+        count, last = queryset_version(qs)
+        return self.conditional_response(
+            request,
+            (teacher.id, count, last),
+            lambda: ok(TeacherCourseAssignmentSerializer(qs, many=True).data),
+            last_modified=last,
+        )
 
 
 # ---------------------------
 # 2) Teacher Classes + details (one shot)
 # ---------------------------
-class TeacherClassViewSet(ViewSet):
+class TeacherClassViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsTeacher]
 
     def list(self, request):
+        """
+        GET /api/teacher/classes/?period=YYYY-MM | ?history=1
+        Par défaut: classes du mois précédent et suivants.
+        """
         teacher = request.user.teacher_profile
 
-        qs = TeacherCourseAssignment.objects.select_related(
-            "monthly_group__level",
-            "monthly_group__room",
-            "period",
-            "course",
-        ).filter(
-            teacher=teacher,
-            monthly_group__isnull=False
-        ).order_by("-period__year", "-period__month")
-
-        groups = {}
-        for a in qs:
-            g = a.monthly_group
-            if g.id not in groups:
-                groups[g.id] = {
-                    "id": g.id,
-                    "label": g.label,
-                    "period": a.period.key if a.period else None,
-                    "level": g.level.label,
-                    "group_name": g.group_name,
-                    "room": g.room.code,
-                    "is_active": g.is_active,
-                }
-
-        return ok(list(groups.values()))
+        year = month = None
+        period_str = request.query_params.get("period")
+        if period_str:
+            try:
+                year, month = (int(x) for x in period_str.split("-"))
+                date(year, month, 1)
+            except ValueError:
+                return bad("period must be YYYY-MM", status_code=status.HTTP_400_BAD_REQUEST)
+
+        groups = teacher_groups(
+            teacher, year=year, month=month,
+            history=request.query_params.get("history") in ("1", "true"),
+        )
+        return self.conditional_response(
+            request, groups_version(groups), lambda: ok([group_data(g) for g in groups]),
+        )
 
     @action(detail=True, methods=["get"])
     def details(self, request, pk=None):
         """
         GET /api/teacher/classes/{group_id}/details/?week_start=YYYY-MM-DD
+        ETag: If-None-Match -> 304 sans recharger le roster.
         """
         teacher = request.user.teacher_profile
 
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group_id=pk).exists():
-            return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
-
         week_start_str = request.query_params.get("week_start")
         if week_start_str:
             try:
@@ -217,58 +136,16 @@ class TeacherClassViewSet(ViewSet):
         else:
             week_start = monday_of(date.today())
 
-        group = MonthlyClassGroup.objects.select_related("period", "level", "room").get(id=pk)
-
-        group_data = {
-            "id": group.id,
-            "label": group.label,
-            "period": group.period.key,
-            "level": group.level.label,
-            "group_name": group.group_name,
-            "room": group.room.code,
-            "is_active": group.is_active,
-        }
-
-        assignments = TeacherCourseAssignment.objects.select_related(
-            "teacher__user", "course", "classroom", "period", "monthly_group"
-        ).filter(teacher=teacher, monthly_group_id=pk)
-
-        courses_data = TeacherCourseAssignmentSerializer(assignments, many=True).data
-
-        enrolls = StudentMonthlyEnrollment.objects.select_related("student__user").filter(
-            group_id=pk, status="active"
-        ).order_by("student__user__first_name", "student__user__last_name")
-
-        students = [e.student for e in enrolls]
-        students_data = StudentMiniSerializer(students, many=True).data
-
-        course_ids = list(assignments.values_list("course_id", flat=True).distinct())
-
-        plans = WeeklyTeachingPlan.objects.filter(
-            teacher=teacher,
-            monthly_group_id=pk,
-            course_id__in=course_ids,
-            week_start=week_start,
-        ).select_related("course")
-
-        plan_by_course_id = {p.course_id: p for p in plans}
-
-        weekly_plans_data = []
-        for a in assignments:
-            p = plan_by_course_id.get(a.course_id)
-            weekly_plans_data.append({
-                "course_id": a.course_id,
-                "course_name": a.course.name,
-                "plan": WeeklyTeachingPlanSerializer(p).data if p else None,
-            })
+        # assignments (+ group) en 1 requête: sert de contrôle d'accès et de base au payload
+        assignments = class_assignments(teacher, pk)
+        if not assignments:
+            return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
 
-        return ok({
-            "group": group_data,
-            "week_start": week_start.isoformat(),
-            "courses": courses_data,
-            "students": students_data,
-            "weekly_plans": weekly_plans_data,
-        })
+        return self.conditional_response(
+            request,
+            class_details_version(teacher, assignments, week_start),
+            lambda: ok(class_details(teacher, assignments, week_start)),
+        )
 
 
 # ---------------------------
@@ -305,11 +182,7 @@ class TeacherWeeklyPlanViewSet(ModelViewSet):
         raw_week = serializer.validated_data.get("week_start") or timezone.now().date()
         week_start = monday_of(raw_week)
 
-        if not TeacherCourseAssignment.objects.filter(
-            teacher=teacher,
-            monthly_group=monthly_group,
-            course=course
-        ).exists():
+        if not get_group_access(teacher, monthly_group, request).teaches(monthly_group.id, course.id):
             raise ValidationError({"detail": "Not assigned to this course/class."})
 
         defaults = {
@@ -353,10 +226,17 @@ class TeacherQrEnrollmentViewSet(ViewSet):
         status_q = request.query_params.get("status")     # optional: pending/active/inactive
         limit = int(request.query_params.get("limit", 50))
 
-        # ✅ groups autorisés (ce teacher)
-        allowed_group_ids = TeacherCourseAssignment.objects.filter(
-            teacher=teacher
-        ).values_list("monthly_group_id", flat=True)
+        # ✅ groups autorisés (ce teacher): contexte d'accès de la période du group demandé,
+        # sinon tous les groups qu'il a eus (sous-requête, l'historique couvre les mois passés)
+        if group_id:
+            period_id = MonthlyClassGroup.objects.filter(id=group_id).values_list("period_id", flat=True).first()
+            if period_id is None:
+                return bad("Invalid group_id", status_code=status.HTTP_400_BAD_REQUEST)
+            allowed_group_ids = get_teacher_access(teacher, period_id, request).group_ids
+        else:
+            allowed_group_ids = TeacherCourseAssignment.objects.filter(
+                teacher=teacher, monthly_group__isnull=False,
+            ).values("monthly_group_id")
 
         qs = StudentMonthlyEnrollment.objects.select_related(
             "student__user", "group__level", "group__room", "period"
@@ -400,7 +280,7 @@ class TeacherQrEnrollmentViewSet(ViewSet):
             return bad("Invalid group_id", status_code=status.HTTP_400_BAD_REQUEST)
 
         # ✅ permission
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group=group).exists():
+        if not get_group_access(teacher, group, request).teaches(group.id):
             return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
 
         # ✅ parse QR
@@ -459,6 +339,40 @@ class TeacherQrEnrollmentViewSet(ViewSet):
             },
             message="Student enrolled successfully",
         )
+
+    @action(detail=False, methods=["post"], url_path="enroll-roster")
+    def roster(self, request):
+        """
+        POST /api/teacher/enrollments/enroll-roster/
+        body: {"group_id": 5, "qr_data": ["...", "..."], "status": "active"}
+        -> 1 résultat par QR: created | updated | unchanged | conflict | duplicate | invalid
+        """
+        ser = EnrollRosterSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        teacher = request.user.teacher_profile
+
+        # ✅ group safe
+        group = MonthlyClassGroup.objects.select_related("period", "level").filter(
+            id=ser.validated_data["group_id"]
+        ).first()
+        if not group:
+            return bad("Invalid group_id", status_code=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ permission
+        if not get_group_access(teacher, group, request).teaches(group.id):
+            return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
+
+        try:
+            result = enroll_roster(
+                group=group,
+                qr_items=ser.validated_data["qr_data"],
+                new_status=ser.validated_data.get("status", "active"),
+            )
+        except ValueError as e:
+            return bad(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        return ok(data=result, message="Roster enrolled")
 # ---------------------------
 # 5) Homework CRUD + submissions view
 # ---------------------------
@@ -490,7 +404,7 @@ class TeacherHomeworkViewSet(ModelViewSet):
         course = serializer.validated_data["course"]
 
         # security: teacher must be assigned to this class/course
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group=group, course=course).exists():
+        if not get_group_access(teacher, group, self.request).teaches(group.id, course.id):
             raise ValueError("Not assigned to this course/class.")
 
         serializer.save(
@@ -509,6 +423,33 @@ class TeacherHomeworkViewSet(ModelViewSet):
         subs = HomeworkSubmission.objects.select_related("student__user").filter(homework=hw).order_by("-created_at")
         return ok(HomeworkSubmissionSerializer(subs, many=True).data)
 
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """
+        GET /api/teacher/homeworks/summary/?group=5&course=3
+        -> par devoir: submitted / late / graded / missing (vs enrollments actifs du group)
+        """
+        return ok(homework_summary(self.get_queryset()))
+
+    @action(detail=True, methods=["post"])
+    def grade(self, request, pk=None):
+        """
+        POST /api/teacher/homeworks/{id}/grade/
+        body: {"grades": [{"submission_id": 12, "score": 17.5, "teacher_comment": "...", "status": "graded"}]}
+        """
+        ser = BulkGradeSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        hw = self.get_queryset().filter(id=pk).first()
+        if not hw:
+            return bad("Homework not found", status_code=status.HTTP_404_NOT_FOUND)
+
+        try:
+            result = bulk_grade(homework=hw, grades=ser.validated_data["grades"])
+        except ValueError as e:
+            return bad(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+        return ok(result)
+
 
 class TeacherHomeworkSubmissionViewSet(ModelViewSet):
     """
@@ -589,7 +530,7 @@ class TeacherProofScanViewSet(ViewSet):
             return bad("Invalid group_id", status_code=status.HTTP_400_BAD_REQUEST)
 
         # ✅ permission
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group=group).exists():
+        if not get_group_access(teacher, group, request).teaches(group.id):
             return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
 
         # ✅ parse QR
@@ -658,6 +599,52 @@ class TeacherProofScanViewSet(ViewSet):
             },
             message="Proof scan saved",
         )
+
+    @action(detail=False, methods=["post"], url_path="scan-batch")
+    def scan_batch(self, request):
+        """
+        POST /api/teacher/proof/scan-batch/
+        body: {"group_id": 5, "qr_data": ["...", "..."], "purpose": "exam_eligible", "course": 3?, "note": "", "meta": {}}
+        -> 1 résultat par QR: created | duplicate | invalid
+        """
+        ser = BatchProofScanSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+
+        teacher = request.user.teacher_profile
+
+        # ✅ group safe
+        group = MonthlyClassGroup.objects.select_related("period").filter(id=data["group_id"]).first()
+        if not group:
+            return bad("Invalid group_id", status_code=status.HTTP_400_BAD_REQUEST)
+
+        # ✅ permission
+        if not get_group_access(teacher, group, request).teaches(group.id):
+            return bad("Not allowed", status_code=status.HTTP_403_FORBIDDEN)
+
+        # ✅ course safe (si fourni)
+        course = None
+        if data.get("course"):
+            course = Course.objects.filter(id=data["course"]).first()
+            if not course:
+                return bad("Invalid course", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = batch_proof_scan(
+                teacher=teacher,
+                group=group,
+                qr_items=data["qr_data"],
+                purpose=data["purpose"],
+                course=course,
+                note=data.get("note", ""),
+                meta=data.get("meta") or {},
+            )
+        except ValueError as e:
+            return bad(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        return ok(result, message="Proof scans saved")
+
+
 class TeacherStudentRemarkViewSet(ModelViewSet):
     """
     CRUD remarks:
@@ -690,7 +677,7 @@ class TeacherStudentRemarkViewSet(ModelViewSet):
         group = serializer.validated_data["group"]
 
         # sécurité: teacher doit enseigner dans ce group
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group=group).exists():
+        if not get_group_access(teacher, group, self.request).teaches(group.id):
             raise ValueError("Not allowed")
 
         serializer.save(
@@ -731,10 +718,7 @@ class TeacherMonthlyObjectiveViewSet(ModelViewSet):
         group = serializer.validated_data["group"]
 
         # ✅ option pro: seul le titulaire peut écrire les objectifs
-        is_titular = TeacherCourseAssignment.objects.filter(
-            teacher=teacher, monthly_group=group, is_titular=True
-        ).exists()
-        if not is_titular:
+        if not get_group_access(teacher, group, self.request).is_titular(group.id):
             raise ValueError("Only titular teacher can create monthly objectives.")
 
         # upsert (period, group, student) unique
@@ -781,7 +765,7 @@ class TeacherClassGeneralRemarkViewSet(ModelViewSet):
         teacher = self.request.user.teacher_profile
         group = serializer.validated_data["group"]
 
-        if not TeacherCourseAssignment.objects.filter(teacher=teacher, monthly_group=group).exists():
+        if not get_group_access(teacher, group, self.request).teaches(group.id):
             raise ValueError("Not allowed")
 
         serializer.save(
@@ -1,49 +1,55 @@
 # apps/attendance/management/commands/export_room_qr.py
 import os
-import qrcode
+
 from django.core.management.base import BaseCommand
 
-from apps.abc_apps.academics.models import Room
 from apps.abc_apps.attendance.models import RoomScanTag
-from apps.abc_apps.attendance.qr import make_room_qr
+from apps.abc_apps.attendance.services.qr_sheets import room_items
+from apps.abc_apps.commons.qr_render import build_pdf_sheet, render_many
 
 
 class Command(BaseCommand):
-    help = "Export signed QR (v2) for each room (printable PNG)"
+    help = "Export signed QR for each room (printable PNG / SVG / PDF sheet, compact format by default)"
 
     def add_arguments(self, parser):
         parser.add_argument("--out", default="room_qr", help="Output folder")
         parser.add_argument("--only-active", action="store_true", help="Export only active tags")
         parser.add_argument("--skip-missing-geo", action="store_true", help="Skip rooms without tag lat/lng")
+        parser.add_argument("--v2", action="store_true", help="Legacy text payload (ABCR|ROOM|...) instead of compact")
+        parser.add_argument("--format", choices=["png", "svg", "pdf"], default="png", help="png/svg: 1 file per room, pdf: 1 sheet")
 
     def handle(self, *args, **opts):
         out = opts["out"]
-        only_active = opts["only_active"]
-        skip_missing_geo = opts["skip_missing_geo"]
-
+        fmt = opts["format"]
         os.makedirs(out, exist_ok=True)
 
-        exported = 0
+        # ✅ rooms + tags en 1 requête (tags manquants créés en lot)
+        items = room_items(only_active=opts["only_active"], compact=not opts["v2"])
         skipped = 0
-
-        for room in Room.objects.all().order_by("code"):
-            tag, _ = RoomScanTag.objects.get_or_create(room=room)
-
-            if only_active and not tag.is_active:
-                skipped += 1
-                continue
-
-            if skip_missing_geo and (tag.latitude is None or tag.longitude is None):
-                skipped += 1
-                continue
-
-            payload = make_room_qr(room.code, str(tag.id))
-            img = qrcode.make(payload)
-
-            path = os.path.join(out, f"{room.code}.png")
-            img.save(path)
-
-            exported += 1
-            self.stdout.write(f"{room.code} => [{path}]")
-
-        self.stdout.write(self.style.SUCCESS(f"Done ✅ exported={exported} skipped={skipped}"))
\ No newline at end of file
+        if opts["skip_missing_geo"]:
+            with_geo = set(
+                RoomScanTag.objects.filter(latitude__isnull=False, longitude__isnull=False)
+                .values_list("room__code", flat=True)
+            )
+            kept = [(code, payload) for code, payload in items if code in with_geo]
+            skipped = len(items) - len(kept)
+            items = kept
+
+        if not items:
+            self.stdout.write(self.style.WARNING("Nothing to export"))
+            return
+
+        if fmt == "pdf":
+            path = os.path.join(out, "room_qr.pdf")
+            with open(path, "wb") as fh:
+                fh.write(build_pdf_sheet(items))
+            self.stdout.write(f"{len(items)} rooms => [{path}]")
+        else:
+            # ✅ rendu parallèle (pool de processus) + cache des images
+            for (code, _), img in zip(items, render_many([payload for _, payload in items], fmt)):
+                path = os.path.join(out, f"{code}.{fmt}")
+                with open(path, "wb") as fh:
+                    fh.write(img)
+                self.stdout.write(f"{code} => [{path}]")
+
+        self.stdout.write(self.style.SUCCESS(f"Done ✅ exported={len(items)} skipped={skipped}"))
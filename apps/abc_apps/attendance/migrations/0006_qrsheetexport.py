@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-19 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0005_reenrollmentintent_execute_after_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QrSheetExport',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('rooms', 'Room tags'), ('students', 'Student cards')], max_length=10)),
+                ('fmt', models.CharField(choices=[('png', 'PNG (zip)'), ('svg', 'SVG (zip)'), ('pdf', 'PDF sheet')], default='pdf', max_length=4)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('file', models.FileField(blank=True, upload_to='attendance/qr_sheets/')),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='qr_sheet_exports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_by', '-created_at'], name='qr_sheet_export_owner_idx')],
+            },
+        ),
+    ]
@@ -32,6 +32,36 @@ class RoomScanTag(models.Model):
         return f"{self.room.code} ({self.id})"
 
 
+class QrSheetExport(TimeStampedModel):
+    """
+    ✅ Génération en lot (Celery) des QR imprimables: tags de salle ou cartes student.
+    Résultat: zip (png / svg) ou planche PDF, téléchargeable une fois "ready".
+    """
+    KIND = [("rooms", "Room tags"), ("students", "Student cards")]
+    FORMAT = [("png", "PNG (zip)"), ("svg", "SVG (zip)"), ("pdf", "PDF sheet")]
+    STATUS = [("pending", "Pending"), ("running", "Running"), ("ready", "Ready"), ("failed", "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=10, choices=KIND)
+    fmt = models.CharField(max_length=4, choices=FORMAT, default="pdf")
+    params = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+    file = models.FileField(upload_to="attendance/qr_sheets/", blank=True)
+    item_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="qr_sheet_exports"
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["created_by", "-created_at"], name="qr_sheet_export_owner_idx")]
+
+    def __str__(self):
+        return f"{self.kind} {self.fmt} ({self.status})"
+
+
 class DailyRoomCheckIn(TimeStampedModel):
     """
     ✅ Scan présence sur QR/NFC statique d'une ROOM.
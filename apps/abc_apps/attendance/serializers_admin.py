@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from apps.abc_apps.academics.models import Room, SchoolCampus
-from .models import RoomScanTag
+from .models import QrSheetExport, RoomScanTag
 
 
 class SchoolCampusSerializer(serializers.ModelSerializer):
@@ -34,4 +34,22 @@ class RoomScanTagSerializer(serializers.ModelSerializer):
             "room", "room_code", "room_name",
             "latitude", "longitude", "radius_m",
             "is_active", "created_at", "updated_at",
-        ]
\ No newline at end of file
+        ]
+
+
+class QrSheetExportSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QrSheetExport
+        fields = [
+            "id", "kind", "fmt", "params", "status", "item_count", "error",
+            "download_url", "created_at", "updated_at",
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != "ready" or not obj.file:
+            return None
+        request = self.context.get("request")
+        url = obj.file.url
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,173 @@
+# =========================
+# apps/attendance/services/qr_sheets.py
+# =========================
+import logging
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import Room, StudentMonthlyEnrollment
+from apps.abc_apps.accounts.models import StudentProfile
+from apps.abc_apps.attendance.models import QrSheetExport, RoomScanTag
+from apps.abc_apps.commons import qr_codec
+from apps.abc_apps.commons.qr_render import build_pdf_sheet, build_zip
+
+logger = logging.getLogger(__name__)
+
+QR_SHEET_MAX_ITEMS = 2000
+# taille d'un chunk de rendu (1 tâche Celery sur la queue media)
+RENDER_CHUNK_SIZE = 100
+
+
+# ─────────────────────────────────────────────
+# Payloads (label, payload)
+# ─────────────────────────────────────────────
+def room_items(room_codes: Optional[Iterable[str]] = None, only_active: bool = False,
+               compact: bool = True) -> List[Tuple[str, str]]:
+    """
+    Rooms + tags en 1 requête; tags manquants créés en 1 bulk_create.
+    """
+    rooms = Room.objects.select_related("scan_tag").order_by("code")
+    if room_codes:
+        rooms = rooms.filter(code__in=list(room_codes))
+
+    missing, pairs = [], []
+    for room in rooms:
+        try:
+            tag = room.scan_tag
+        except RoomScanTag.DoesNotExist:
+            tag = RoomScanTag(room=room)
+            missing.append(tag)
+        pairs.append((room, tag))
+    if missing:
+        RoomScanTag.objects.bulk_create(missing)  # UUID pk généré côté Python
+
+    return [
+        (room.code, qr_codec.make_room_qr(room.code, str(tag.id), compact=compact))
+        for room, tag in pairs
+        if tag.is_active or not only_active
+    ]
+
+
+def student_items(group_id: Optional[int] = None, student_ids: Optional[Iterable[int]] = None,
+                  valid_until: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Cartes signées (ABC2). group_id: students actifs du group; sinon student_ids.
+    """
+    valid_until = valid_until or date(timezone.localdate().year, 12, 31).isoformat()
+
+    students = StudentProfile.objects.select_related("user").order_by("student_code")
+    if group_id:
+        students = students.filter(
+            id__in=StudentMonthlyEnrollment.objects.filter(group_id=group_id, status="active").values("student_id")
+        )
+    elif student_ids:
+        students = students.filter(id__in=list(student_ids))
+    else:
+        raise ValueError("group_id or student_ids is required")
+
+    items = []
+    for s in students:
+        label = f"{s.student_code} {s.user.get_full_name()}".strip()
+        items.append((label, qr_codec.make_student_qr(s.id, s.student_code, valid_until, s.status)))
+    return items
+
+
+def export_items(export: QrSheetExport) -> List[Tuple[str, str]]:
+    p = export.params or {}
+    if export.kind == "rooms":
+        return room_items(p.get("room_codes"), bool(p.get("only_active")), compact=not p.get("v2"))
+    return student_items(p.get("group_id"), p.get("student_ids"), p.get("valid_until"))
+
+
+# ─────────────────────────────────────────────
+# Export asynchrone
+# ─────────────────────────────────────────────
+def start_export(*, user, kind: str, fmt: str, params: dict) -> QrSheetExport:
+    if kind not in dict(QrSheetExport.KIND):
+        raise ValueError("Invalid kind")
+    if fmt not in dict(QrSheetExport.FORMAT):
+        raise ValueError("Invalid format")
+    if kind == "students" and not (params.get("group_id") or params.get("student_ids")):
+        raise ValueError("group_id or student_ids is required")
+
+    export = QrSheetExport.objects.create(kind=kind, fmt=fmt, params=params, created_by=user)
+
+    from apps.abc_apps.attendance.tasks import build_qr_sheet_export
+    transaction.on_commit(lambda: build_qr_sheet_export.delay(str(export.id)))
+    return export
+
+
+def _fail(export: QrSheetExport, e: Exception) -> str:
+    if not isinstance(e, ValueError):
+        logger.exception("qr sheet export %s failed", export.id)
+    export.status = "failed"
+    export.error = str(e) if isinstance(e, ValueError) else "Rendering failed"
+    export.save(update_fields=["status", "error", "updated_at"])
+    return "failed"
+
+
+def mark_export_failed(export_id, error: str = "Rendering failed") -> None:
+    QrSheetExport.objects.filter(pk=export_id, status="running").update(
+        status="failed", error=error, updated_at=timezone.now()
+    )
+
+
+def render_format(export: QrSheetExport) -> str:
+    # la planche PDF est assemblée à partir des PNG
+    return "png" if export.fmt == "pdf" else export.fmt
+
+
+def render_chunks(items: List[Tuple[str, str]], size: int = RENDER_CHUNK_SIZE) -> List[List[str]]:
+    payloads = list(dict.fromkeys(payload for _, payload in items))
+    return [payloads[i:i + size] for i in range(0, len(payloads), size)]
+
+
+def prepare_export(export_id) -> Optional[Tuple[QrSheetExport, List[Tuple[str, str]]]]:
+    """
+    Réserve le job (pending/failed -> running) et calcule les payloads.
+    None si déjà pris ou en échec (job marqué failed).
+    """
+    updated = QrSheetExport.objects.filter(pk=export_id, status__in=["pending", "failed"]).update(
+        status="running", updated_at=timezone.now()
+    )
+    if not updated:
+        return None
+
+    export = QrSheetExport.objects.get(pk=export_id)
+    try:
+        items = export_items(export)
+        if not items:
+            raise ValueError("Nothing to print")
+        if len(items) > QR_SHEET_MAX_ITEMS:
+            raise ValueError(f"Too many codes (max {QR_SHEET_MAX_ITEMS})")
+    except Exception as e:
+        _fail(export, e)
+        return None
+    return export, items
+
+
+def assemble_export(export_id, items: List[Tuple[str, str]]) -> str:
+    """
+    Zip / planche PDF: les images viennent du cache (remplies par les chunks de rendu).
+    """
+    export = QrSheetExport.objects.get(pk=export_id)
+    try:
+        if export.fmt == "pdf":
+            p = export.params or {}
+            data, ext = build_pdf_sheet(items, cols=int(p.get("cols") or 3), rows=int(p.get("rows") or 4)), "pdf"
+        else:
+            data, ext = build_zip(items, export.fmt), "zip"
+    except Exception as e:
+        return _fail(export, e)
+
+    export.file.save(f"{export.kind}-{export.id}.{ext}", ContentFile(data), save=False)
+    export.item_count = len(items)
+    export.status = "ready"
+    export.error = ""
+    export.save(update_fields=["file", "item_count", "status", "error", "updated_at"])
+    logger.info("qr sheet export %s ready items=%s bytes=%s", export.id, len(items), len(data))
+    return "ready"
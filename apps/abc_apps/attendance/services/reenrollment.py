@@ -0,0 +1,156 @@
+# =========================
+# apps/attendance/services/reenrollment.py
+# =========================
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment
+from apps.abc_apps.academics.services.promotion_service import (
+    promote_students_for_next_period,
+)
+from apps.abc_apps.attendance.models import ReenrollmentIntent
+
+logger = logging.getLogger(__name__)
+
+# taille cible d'un chunk (les cohortes ne sont jamais coupées)
+REENROLLMENT_CHUNK_SIZE = 100
+
+INTENT_UPDATE_FIELDS = ["status", "processed_at", "decided_at", "updated_at"]
+
+
+def plan_reenrollment_chunks(today: date, chunk_size: int = REENROLLMENT_CHUNK_SIZE) -> List[dict]:
+    """
+    Découpe les intents 'pending' échus en chunks indépendants:
+    - un bucket par (from_period, to_period, level du mois source)
+    - les cohortes (ancien group_name) restent entières dans un même chunk
+      pour que la promotion garde les groupes ensemble
+    """
+    intents = list(
+        ReenrollmentIntent.objects
+        .filter(
+            status="pending",
+            execute_after__isnull=False,
+            execute_after__lte=today,
+        )
+        .order_by("created_at")
+        .values_list("id", "student_id", "from_period_id", "to_period_id")
+    )
+    if not intents:
+        return []
+
+    # level + ancien groupe de chaque étudiant au mois source (1 seule requête)
+    placement = {
+        (period_id, student_id): (level_id, group_name)
+        for period_id, student_id, level_id, group_name in (
+            StudentMonthlyEnrollment.objects
+            .filter(
+                period_id__in={x[2] for x in intents},
+                student_id__in={x[1] for x in intents},
+                status="active",
+            )
+            .values_list("period_id", "student_id", "group__level_id", "group__group_name")
+        )
+    }
+
+    # (from, to, level) -> ancien group_name -> [intent_id]
+    buckets: Dict[tuple, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+    for intent_id, student_id, from_period_id, to_period_id in intents:
+        level_id, group_name = placement.get((from_period_id, student_id), (None, ""))
+        buckets[(from_period_id, to_period_id, level_id)][group_name or "A"].append(intent_id)
+
+    chunks: List[dict] = []
+    for (from_period_id, to_period_id, level_id), cohorts in buckets.items():
+        current: List[int] = []
+        for name in sorted(cohorts):
+            cohort = cohorts[name]
+            if current and len(current) + len(cohort) > chunk_size:
+                chunks.append({
+                    "from_period_id": from_period_id,
+                    "to_period_id": to_period_id,
+                    "intent_ids": current,
+                })
+                current = []
+            current.extend(cohort)
+
+        if current:
+            chunks.append({
+                "from_period_id": from_period_id,
+                "to_period_id": to_period_id,
+                "intent_ids": current,
+            })
+
+    return chunks
+
+
+@transaction.atomic
+def process_reenrollment_chunk(*, from_period_id: int, to_period_id: int, intent_ids: List[int]) -> Dict[str, int]:
+    """
+    Traite un chunk dans sa propre transaction.
+    Idempotent: seuls les intents encore 'pending' sont repris (retry safe).
+    """
+    intents = list(
+        ReenrollmentIntent.objects
+        .select_for_update(of=("self",))
+        .select_related("from_period", "to_period")
+        .filter(
+            id__in=intent_ids,
+            from_period_id=from_period_id,
+            to_period_id=to_period_id,
+            status="pending",
+        )
+    )
+    if not intents:
+        return {"processed": 0, "created": 0, "skipped": 0}
+
+    yes_intents = [x for x in intents if x.will_return]
+
+    result = {"created": 0, "skipped": 0}
+    if yes_intents:
+        result = promote_students_for_next_period(
+            from_period=yes_intents[0].from_period,
+            to_period=yes_intents[0].to_period,
+            student_ids=[x.student_id for x in yes_intents],
+            created_by=None,
+        )
+
+    now_dt = timezone.now()
+    for intent in intents:
+        intent.status = "approved" if intent.will_return else "rejected"
+        intent.processed_at = now_dt
+        intent.decided_at = now_dt
+        intent.updated_at = now_dt  # bulk_update ne déclenche pas auto_now
+
+    ReenrollmentIntent.objects.bulk_update(intents, INTENT_UPDATE_FIELDS)
+
+    logger.info(
+        "reenrollment chunk from=%s to=%s processed=%s created=%s skipped=%s",
+        from_period_id, to_period_id, len(intents), result["created"], result["skipped"],
+    )
+    return {
+        "processed": len(intents),
+        "created": result["created"],
+        "skipped": result["skipped"],
+    }
+
+
+def reject_reenrollment_intents(intent_ids: List[int], error: Exception) -> int:
+    """
+    Rejette (en bulk) les intents encore 'pending' après un échec définitif.
+    """
+    intents = list(ReenrollmentIntent.objects.filter(id__in=intent_ids, status="pending"))
+
+    now_dt = timezone.now()
+    for intent in intents:
+        intent.status = "rejected"
+        intent.processed_at = now_dt
+        intent.decided_at = now_dt
+        intent.updated_at = now_dt
+        intent.reason = ((intent.reason or "") + f"\n[System] Promotion failed: {error}").strip()
+
+    ReenrollmentIntent.objects.bulk_update(intents, INTENT_UPDATE_FIELDS + ["reason"])
+    return len(intents)
@@ -1,140 +1,136 @@
-from collections import defaultdict
-from celery import shared_task
-from django.utils import timezone
+import logging
 
-from apps.abc_apps.attendance.models import ReenrollmentIntent
-from apps.abc_apps.academics.services.promotion_service import (
-    promote_students_for_next_period,
+from celery import chord, group, shared_task
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.abc_apps.attendance.services.qr_sheets import (
+    assemble_export,
+    mark_export_failed,
+    prepare_export,
+    render_chunks,
+    render_format,
+)
+from apps.abc_apps.attendance.services.reenrollment import (
+    plan_reenrollment_chunks,
+    process_reenrollment_chunk,
+    reject_reenrollment_intents,
 )
+from apps.abc_apps.commons.qr_render import render_many
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def process_reenrollment_intents():
+    """
+    Job nocturne: découpe les intents échus en chunks
+    (from/to period + level) et les distribue aux workers.
+    """
     today = timezone.localdate()
+    chunks = plan_reenrollment_chunks(today)
 
-    intents = list(
-        ReenrollmentIntent.objects
-        .select_related("student", "from_period", "to_period")
-        .filter(
-            status="pending",
-            execute_after__isnull=False,
-            execute_after__lte=today,
-        )
-        .order_by("created_at")
+    if chunks:
+        group(process_reenrollment_chunk_task.s(**chunk) for chunk in chunks).apply_async()
+
+    intents_count = sum(len(c["intent_ids"]) for c in chunks)
+    logger.info(
+        "process_reenrollment_intents today=%s chunks=%s intents=%s",
+        today, len(chunks), intents_count,
     )
+    return {
+        "chunks": len(chunks),
+        "intents": intents_count,
+    }
+
 
-    print(f"[process_reenrollment_intents] today={today}")
-    print(
-        list(
-            ReenrollmentIntent.objects.filter(status="pending").values(
-                "id", "student_id", "will_return", "execute_after"
-            )
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, soft_time_limit=15 * 60, time_limit=16 * 60)
+def process_reenrollment_chunk_task(self, from_period_id, to_period_id, intent_ids):
+    try:
+        return process_reenrollment_chunk(
+            from_period_id=from_period_id,
+            to_period_id=to_period_id,
+            intent_ids=intent_ids,
         )
+    except OperationalError as e:
+        # erreur transitoire (deadlock, connexion): même chunk, plus tard
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        return _split_failed_chunk(from_period_id, to_period_id, intent_ids, e)
+    except Exception as e:
+        return _split_failed_chunk(from_period_id, to_period_id, intent_ids, e)
+
+
+def _split_failed_chunk(from_period_id, to_period_id, intent_ids, error):
+    """
+    Échec définitif: on coupe le chunk en deux jusqu'à isoler l'étudiant fautif,
+    les autres sont promus normalement.
+    """
+    logger.exception(
+        "reenrollment chunk failed from=%s to=%s size=%s error=%s",
+        from_period_id, to_period_id, len(intent_ids), error,
     )
 
-    processed = 0
-    failed = 0
-
-    # grouper par période source -> période cible
-    buckets = defaultdict(list)
-    for intent in intents:
-        buckets[(intent.from_period_id, intent.to_period_id)].append(intent)
-
-    for (_, _), bucket in buckets.items():
-        yes_intents = [x for x in bucket if x.will_return]
-        no_intents = [x for x in bucket if not x.will_return]
-
-        # 1) étudiants qui ne reviennent pas
-        for intent in no_intents:
-            try:
-                now_dt = timezone.now()
-                intent.status = "rejected"
-                intent.processed_at = now_dt
-                intent.decided_at = now_dt
-                intent.save(
-                    update_fields=[
-                        "status",
-                        "processed_at",
-                        "decided_at",
-                        "updated_at",
-                    ]
-                )
-                processed += 1
-            except Exception as e:
-                print(
-                    f"[process_reenrollment_intents] reject failed "
-                    f"intent_id={intent.id} error={e}"
-                )
-                failed += 1
-
-        # 2) étudiants qui reviennent
-        if yes_intents:
-            try:
-                from_period = yes_intents[0].from_period
-                to_period = yes_intents[0].to_period
-                student_ids = [x.student_id for x in yes_intents]
-
-                result = promote_students_for_next_period(
-                    from_period=from_period,
-                    to_period=to_period,
-                    student_ids=student_ids,
-                    created_by=None,
-                )
-
-                now_dt = timezone.now()
-                for intent in yes_intents:
-                    intent.status = "approved"
-                    intent.processed_at = now_dt
-                    intent.decided_at = now_dt
-                    intent.save(
-                        update_fields=[
-                            "status",
-                            "processed_at",
-                            "decided_at",
-                            "updated_at",
-                        ]
-                    )
-
-                processed += len(yes_intents)
-
-                print(
-                    f"[process_reenrollment_intents] promoted "
-                    f"from={from_period.code} to={to_period.code} "
-                    f"created={result['created']} skipped={result['skipped']}"
-                )
-
-            except Exception as e:
-                print(f"[process_reenrollment_intents] promotion failed error={e}")
-                for intent in yes_intents:
-                    try:
-                        now_dt = timezone.now()
-                        intent.status = "rejected"
-                        intent.processed_at = now_dt
-                        intent.decided_at = now_dt
-                        intent.reason = (
-                            (intent.reason or "") +
-                            f"\n[System] Promotion failed: {e}"
-                        ).strip()
-                        intent.save(
-                            update_fields=[
-                                "status",
-                                "processed_at",
-                                "decided_at",
-                                "reason",
-                                "updated_at",
-                            ]
-                        )
-                    except Exception as inner_e:
-                        print(
-                            f"[process_reenrollment_intents] secondary save failed "
-                            f"intent_id={intent.id} error={inner_e}"
-                        )
-                failed += len(yes_intents)
-
-    print(f"[process_reenrollment_intents] done processed={processed} failed={failed}")
-    return {
-        "processed": processed,
-        "failed": failed,
-    }
-    
-    
\ No newline at end of file
+    if len(intent_ids) <= 1:
+        failed = reject_reenrollment_intents(intent_ids, error)
+        return {"processed": 0, "failed": failed}
+
+    mid = len(intent_ids) // 2
+    for part in (intent_ids[:mid], intent_ids[mid:]):
+        process_reenrollment_chunk_task.delay(from_period_id, to_period_id, part)
+
+    return {"processed": 0, "failed": 0, "split": 2}
+
+
+@shared_task(soft_time_limit=2 * 60, time_limit=3 * 60)
+def build_qr_sheet_export(export_id):
+    """
+    Rendu des QR imprimables (rooms / cartes students) -> fichier téléchargeable.
+    Worker prefork = pas de pool de processus dans la tâche: le rendu est découpé
+    en chunks (chord) répartis sur les process media, puis assemblé.
+    """
+    prepared = prepare_export(export_id)
+    if prepared is None:
+        return "skipped"
+    export, items = prepared
+
+    chunks = render_chunks(items)
+    if len(chunks) <= 1:
+        return assemble_export(export_id, items)
+
+    fmt = render_format(export)
+    assemble = build_qr_sheet_assemble.si(export_id, items).on_error(build_qr_sheet_failed.si(export_id))
+    chord(build_qr_sheet_chunk.s(chunk, fmt) for chunk in chunks)(assemble)
+    return "rendering"
+
+
+@shared_task(soft_time_limit=5 * 60, time_limit=6 * 60)
+def build_qr_sheet_chunk(payloads, fmt):
+    # images -> cache (clé = hash du payload), lues ensuite par l'assemblage
+    render_many(payloads, fmt)
+    return len(payloads)
+
+
+@shared_task(soft_time_limit=5 * 60, time_limit=6 * 60)
+def build_qr_sheet_assemble(export_id, items):
+    return assemble_export(export_id, [tuple(item) for item in items])
+
+
+@shared_task
+def build_qr_sheet_failed(export_id):
+    mark_export_failed(export_id)
+
+
+@shared_task(ignore_result=True, soft_time_limit=30, time_limit=60)
+def record_scan_location(user_id, lat, lng, scanned_at):
+    """
+    Side-effect d'un scan QR/NFC: dernière position connue du user.
+    Une position plus ancienne (tâche arrivée en retard) n'écrase pas la plus récente.
+    """
+    ts = parse_datetime(scanned_at)
+    get_user_model().objects.filter(
+        Q(location_updated_at__isnull=True) | Q(location_updated_at__lt=ts), pk=user_id,
+    ).update(lat=lat, lng=lng, location_updated_at=ts)
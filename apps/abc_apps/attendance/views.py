@@ -17,6 +17,7 @@ from apps.abc_apps.academics.models import (
     TeacherCourseAssignment,
     get_or_create_period_from_date,
 )
+from apps.abc_apps.academics.services.teacher_access import period_id_for, get_teacher_access
 from apps.abc_apps.accounts.views import bad
 from apps.abc_apps.commons.responses import ok
 from apps.common.permissions import IsStudent, IsTeacher
@@ -129,6 +130,16 @@ def _load_room_and_tag(parsed_room_code: str, parsed_tag_id: Optional[str]):
     return room, tag, None
 
 
+def _record_location(request, lat_f: float, lng_f: float):
+    """
+    Dernière position du user: side-effect du scan, écrit hors requête (queue "scan").
+    """
+    from .tasks import record_scan_location
+
+    user_id, ts = request.user.id, timezone.now().isoformat()
+    transaction.on_commit(lambda: record_scan_location.delay(user_id, lat_f, lng_f, ts))
+
+
 def _resolve_scan_dt(request):
     server_scan_dt = timezone.now()
 
@@ -375,7 +386,7 @@ class StudentAttendanceViewSet(ViewSet):
                 403,
             )
 
-        request.user.set_location(lat_f, lng_f)
+        _record_location(request, lat_f, lng_f)
 
         server_scan_dt, scan_dt = _resolve_scan_dt(request)
 
@@ -458,7 +469,7 @@ class StudentAttendanceViewSet(ViewSet):
                 403,
             )
 
-        request.user.set_location(lat_f, lng_f)
+        _record_location(request, lat_f, lng_f)
 
         _, scan_dt = _resolve_scan_dt(request)
 
@@ -613,7 +624,7 @@ class StudentAttendanceViewSet(ViewSet):
                     403
                 )
 
-            request.user.set_location(lat_f, lng_f)
+            _record_location(request, lat_f, lng_f)
 
         server_scan_dt = timezone.now()
         client_dt = _parse_client_time(request.data.get("client_time"))
@@ -744,7 +755,7 @@ class StudentAttendanceViewSet(ViewSet):
                 403
             )
 
-        request.user.set_location(lat_f, lng_f)
+        _record_location(request, lat_f, lng_f)
 
         server_scan_dt = timezone.now()
         client_dt = _parse_client_ts(
@@ -995,7 +1006,7 @@ class TeacherAttendanceViewSet(ViewSet):
             if not geo_ok:
                 return bad(f"Too far from room tag ({distance_m:.1f}m)", 403)
 
-            request.user.set_location(lat_f, lng_f)
+            _record_location(request, lat_f, lng_f)
 
         # time source
         server_scan_dt = timezone.now()
@@ -1056,10 +1067,9 @@ class TeacherAttendanceConfirmViewSet(ViewSet):
         if not checkin:
             return bad("Not found", 404)
 
-        # teacher allowed groups
-        allowed = TeacherCourseAssignment.objects.filter(teacher=teacher)\
-            .values_list("monthly_group_id", flat=True)
-        if checkin.monthly_group_id not in set(allowed):
+        # teacher allowed groups (période du group du check-in)
+        access = get_teacher_access(teacher, checkin.monthly_group.period_id, request)
+        if not access.teaches(checkin.monthly_group_id):
             return bad("Not allowed", 403)
 
         approval, _ = DailyRoomCheckInApproval.objects.update_or_create(
@@ -1091,16 +1101,17 @@ class TeacherAttendanceConfirmViewSet(ViewSet):
         qs = DailyRoomCheckIn.objects.select_related("period", "monthly_group", "room", "student__user")\
             .prefetch_related("approvals", "approvals__teacher__user")
 
-        allowed = TeacherCourseAssignment.objects.filter(teacher=teacher)\
-            .values_list("monthly_group_id", flat=True)
-        qs = qs.filter(monthly_group_id__in=allowed)
+        try:
+            day = date.fromisoformat(d) if d else timezone.localdate()
+        except ValueError:
+            return bad("date must be YYYY-MM-DD", 400)
+
+        # groups autorisés: période du jour demandé seulement
+        allowed = get_teacher_access(teacher, period_id_for(day), request).group_ids
+        qs = qs.filter(monthly_group_id__in=allowed, date=day)
 
         if group_id:
             qs = qs.filter(monthly_group_id=group_id)
-        if d:
-            qs = qs.filter(date=d)
-        else:
-            qs = qs.filter(date=timezone.localdate())
 
         qs = [c for c in qs.order_by("-scanned_at") if not c.is_fully_confirmed]
         return ok({"items": DailyRoomCheckInSerializer(qs, many=True).data}, "Pending confirmations")
\ No newline at end of file
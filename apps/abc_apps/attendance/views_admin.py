@@ -1,8 +1,6 @@
 # apps/attendance/views_admin.py (ou attendance/admin_views.py)
 import base64
-from io import BytesIO
 
-import qrcode
 from django.db import transaction
 from rest_framework.viewsets import ViewSet
 from rest_framework.decorators import action
@@ -12,11 +10,13 @@ from apps.abc_apps.accounts.views import bad
 from apps.abc_apps.commons.responses import ok
 from apps.abc_apps.academics.models import Room, SchoolCampus
 from apps.abc_apps.attendance.geo import is_within_campus
+from apps.abc_apps.attendance.services.qr_sheets import start_export
+from apps.abc_apps.commons.qr_render import render_png_cached
 from apps.common.permissions import IsSecretary
 
-from .models import RoomScanTag
+from .models import QrSheetExport, RoomScanTag
 from .qr import make_room_qr
-from .serializers_admin import SchoolCampusSerializer, RoomSerializer, RoomScanTagSerializer
+from .serializers_admin import QrSheetExportSerializer, SchoolCampusSerializer, RoomSerializer, RoomScanTagSerializer
 from .utils_rooms import create_room_auto_code 
 
 import logging
@@ -24,10 +24,8 @@ logger = logging.getLogger(__name__)
 
 
 def _png_base64_from_payload(payload: str) -> str:
-    img = qrcode.make(payload)
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+    # ✅ image en cache (clé = hash du payload): un tag ré-imprimé n'est pas re-rendu
+    return base64.b64encode(render_png_cached(payload)).decode("utf-8")
 
 
 def _to_bool(v, default=False):
@@ -470,7 +468,9 @@ class AttendanceAdminViewSet(ViewSet):
         if not tag:
             return bad("Room tag not configured", 403)
 
-        payload = make_room_qr(room.code, str(tag.id))
+        # ?format=v2: ancien payload texte (tags déjà imprimés); défaut: compact
+        compact = (request.query_params.get("format") or "compact").strip().lower() != "v2"
+        payload = make_room_qr(room.code, str(tag.id), compact=compact)
         data = {
             "room": RoomSerializer(room).data,
             "tag": RoomScanTagSerializer(tag).data,
@@ -499,4 +499,60 @@ class AttendanceAdminViewSet(ViewSet):
         tag.is_active = _to_bool(request.data.get("is_active"), True)
         tag.save(update_fields=["is_active", "updated_at"])
 
-        return ok({"tag": RoomScanTagSerializer(tag).data}, "Updated ✅")
\ No newline at end of file
+        return ok({"tag": RoomScanTagSerializer(tag).data}, "Updated ✅")
+
+    # =========================================================
+    # 🖨️ QR SHEETS (export en lot, Celery)
+    # =========================================================
+    @action(detail=False, methods=["post"], url_path="qr-sheets")
+    def qr_sheets(self, request):
+        """
+        POST /api/admin/attendance/qr-sheets/
+        body rooms:    {"kind": "rooms", "format": "pdf|png|svg", "room_codes": [...]?, "only_active": true?, "v2": false?}
+        body students: {"kind": "students", "format": "pdf", "group_id": 5 | "student_ids": [...], "valid_until": "YYYY-MM-DD"?}
+        -> 202 + export (status pending), puis GET qr-sheets/{id}/ jusqu'à "ready"
+        """
+        kind = (request.data.get("kind") or "rooms").strip()
+        fmt = (request.data.get("format") or "pdf").strip().lower()
+
+        params = {}
+        if kind == "rooms":
+            room_codes = request.data.get("room_codes") or []
+            if not isinstance(room_codes, list):
+                return bad("room_codes must be a list", 400)
+            params = {
+                "room_codes": [str(c).strip() for c in room_codes if str(c).strip()],
+                "only_active": _to_bool(request.data.get("only_active"), False),
+                "v2": _to_bool(request.data.get("v2"), False),
+            }
+        elif kind == "students":
+            try:
+                group_id = int(request.data["group_id"]) if request.data.get("group_id") else None
+                student_ids = [int(i) for i in (request.data.get("student_ids") or [])]
+            except (TypeError, ValueError):
+                return bad("group_id / student_ids must be integers", 400)
+            params = {
+                "group_id": group_id,
+                "student_ids": student_ids,
+                "valid_until": (request.data.get("valid_until") or "").strip() or None,
+            }
+        for key in ("cols", "rows"):
+            if request.data.get(key):
+                try:
+                    params[key] = min(max(int(request.data[key]), 1), 8)
+                except (TypeError, ValueError):
+                    return bad(f"{key} must be an integer", 400)
+
+        try:
+            export = start_export(user=request.user, kind=kind, fmt=fmt, params=params)
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        return ok(QrSheetExportSerializer(export, context={"request": request}).data, "QR export started ✅", status=202)
+
+    @action(detail=False, methods=["get"], url_path=r"qr-sheets/(?P<export_id>[0-9a-f-]{36})")
+    def qr_sheet_detail(self, request, export_id=None):
+        export = QrSheetExport.objects.filter(pk=export_id, created_by=request.user).first()
+        if not export:
+            return bad("Not found", 404)
+        return ok(QrSheetExportSerializer(export, context={"request": request}).data, "QR export")
@@ -0,0 +1,169 @@
+# =========================
+# common/http.py
+# =========================
+import hashlib
+import re
+
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    "bytes=0-99" / "bytes=100-" / "bytes=-500" -> (start, end) inclus.
+    None si pas de Range (ou multi-range: on renvoie tout le fichier),
+    ValueError si la plage n'est pas satisfiable.
+    """
+    m = RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # suffixe: les N derniers octets
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _iter_range(fileobj, start: int, length: int):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = fileobj.read(min(RANGE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        fileobj.close()
+
+
+def ranged_file_response(request, fileobj, size: int, content_type: str):
+    """
+    Réponse fichier avec support HTTP Range (seek audio / reprise mobile):
+    - sans Range  -> 200 + fichier entier (FileResponse)
+    - Range       -> 206 + Content-Range
+    - hors limite -> 416
+    """
+    try:
+        rng = parse_range(request.META.get("HTTP_RANGE", ""), size)
+    except ValueError:
+        fileobj.close()
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        return resp
+
+    if rng is None:
+        resp = FileResponse(fileobj, content_type=content_type)
+        resp["Content-Length"] = str(size)
+    else:
+        start, end = rng
+        length = end - start + 1
+        resp = StreamingHttpResponse(_iter_range(fileobj, start, length), status=206, content_type=content_type)
+        resp["Content-Length"] = str(length)
+        resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    resp["Accept-Ranges"] = "bytes"
+    return resp
+
+
+# ─────────────────────────────────────────────
+# GET conditionnel (ETag / If-None-Match)
+# ─────────────────────────────────────────────
+def make_etag(*parts) -> str:
+    """
+    ETag faible calculé à partir de valeurs de version (ids, updated_at, compteurs...).
+    """
+    raw = "|".join("" if p is None else p.isoformat() if hasattr(p, "isoformat") else str(p) for p in parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request, etag: str) -> bool:
+    # comparaison faible (RFC 9110 §13.1.2)
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(t) for t in header.split(",")}
+
+
+def modified_since(request, last_modified) -> bool:
+    """
+    False si If-Modified-Since >= last_modified (précision: la seconde).
+    """
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    if since is None or last_modified is None:
+        return True
+    return int(last_modified.timestamp()) > since
+
+
+def not_modified(etag: str, last_modified=None) -> HttpResponse:
+    resp = HttpResponse(status=304)
+    resp["ETag"] = etag
+    if last_modified is not None:
+        resp["Last-Modified"] = http_date(last_modified.timestamp())
+    return resp
+
+
+def with_etag(resp, etag: str, last_modified=None):
+    resp["ETag"] = etag
+    if last_modified is not None:
+        resp["Last-Modified"] = http_date(last_modified.timestamp())
+    # le client garde sa copie mais revalide à chaque affichage
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def queryset_version(qs, field: str = "updated_at"):
+    """
+    (count, max(field)) en 1 agrégat: le count couvre les suppressions, le max les éditions.
+    """
+    agg = qs.order_by().aggregate(n=Count("pk"), last=Max(field))
+    return agg["n"], agg["last"]
+
+
+def latest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel pour les ViewSets de lecture (apps mobiles):
+        version = (..., count, last)       # quelques valeurs bon marché (queryset_version, updated_at...)
+        return self.conditional_response(request, version, lambda: ok(...), last_modified=last)
+    -> 304 sans corps ni sérialisation si If-None-Match correspond
+       (If-Modified-Since n'est pris en compte qu'en l'absence d'If-None-Match).
+    """
+
+    def conditional_response(self, request, version, build, last_modified=None):
+        etag = make_etag(*version)
+        if request.META.get("HTTP_IF_NONE_MATCH"):
+            fresh = etag_matches(request, etag)
+        else:
+            fresh = last_modified is not None and not modified_since(request, last_modified)
+        if fresh:
+            return not_modified(etag, last_modified)
+        resp = build()
+        if resp.status_code != 200:
+            return resp
+        return with_etag(resp, etag, last_modified)
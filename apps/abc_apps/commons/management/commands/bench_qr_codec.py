@@ -0,0 +1,56 @@
+# apps/commons/management/commands/bench_qr_codec.py
+import hashlib
+import hmac
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.abc_apps.commons import qr_codec
+
+
+def _legacy_room_v2(s: str) -> dict:
+    # ancien chemin (attendance/qr.py): clé HMAC re-dérivée à chaque appel
+    _, _, room_code, tag_id, sig = s.split("|")
+    raw = f"ABCR|ROOM|{room_code}|{tag_id}"
+    expected = hmac.new(settings.SECRET_KEY.encode(), raw.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, sig):
+        raise ValueError("Invalid room QR signature (v2)")
+    return {"room_code": room_code, "tag_id": tag_id}
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark du codec QR (µs / décodage): ancien chemin, codec sans cache, codec avec cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=20000, help="Décodages par mesure")
+        parser.add_argument("--repeat", type=int, default=5, help="Mesures (on garde la meilleure)")
+
+    def handle(self, *args, **opts):
+        number, repeat = opts["number"], opts["repeat"]
+
+        tag_id = "3f2b9c4e-8a51-4d4e-9f1a-2b7c6d5e4f30"
+        room = qr_codec.make_room_qr("R101", tag_id, compact=False)
+        compact = qr_codec.make_room_qr("R101", tag_id)
+        student = qr_codec.make_student_qr(1234, "ST-1234", "2026-12-31", "active")
+
+        def cold(kind, s):
+            qr_codec.clear_cache()
+            return qr_codec.decode(kind, s)
+
+        cases = [
+            ("room v2 / legacy parser", lambda: _legacy_room_v2(room)),
+            ("room v2 / codec (no cache)", lambda: cold(qr_codec.KIND_ROOM, room)),
+            ("room v2 / codec (cached)", lambda: qr_codec.decode(qr_codec.KIND_ROOM, room)),
+            ("room compact / codec (no cache)", lambda: cold(qr_codec.KIND_ROOM, compact)),
+            ("student ABC2 / codec (no cache)", lambda: cold(qr_codec.KIND_STUDENT, student)),
+            ("student ABC2 / codec (cached)", lambda: qr_codec.decode(qr_codec.KIND_STUDENT, student)),
+            ("hmac sign / precomputed key", lambda: qr_codec.signing_key().sign("ABCR|ROOM|R101|tag")),
+        ]
+
+        self.stdout.write(f"payload length: v2={len(room)} compact={len(compact)}")
+        for label, fn in cases:
+            best = min(timeit.repeat(fn, number=number, repeat=repeat))
+            self.stdout.write(f"{label:<36} {best / number * 1e6:8.2f} µs")
+
+        qr_codec.clear_cache()
@@ -1,6 +1,11 @@
 # =========================
 # common/pagination.py
 # =========================
+import base64
+import json
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
 from rest_framework.pagination import PageNumberPagination
 
 class StandardPagination(PageNumberPagination):
@@ -11,4 +16,65 @@ class StandardPagination(PageNumberPagination):
 class LargePagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = "page_size"
-    max_page_size = 200
\ No newline at end of file
+    max_page_size = 200
+
+# ─────────────────────────────────────────────
+# Keyset (cursor) pagination: ORDER BY <field> DESC NULLS LAST, id DESC
+# pas d'OFFSET -> coût constant quelle que soit la page
+# ─────────────────────────────────────────────
+def encode_cursor(value, pk) -> str:
+    raw = json.dumps({"v": value.isoformat() if value is not None else None, "id": pk})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    -> (datetime|None, id). ValueError si le curseur est invalide.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data = json.loads(raw)
+        value = parse_datetime(data["v"]) if data["v"] else None
+        return value, int(data["id"])
+    except (KeyError, TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_paginate(qs, field: str, cursor=None, page_size: int = 20, nullable: bool = True):
+    """
+    Retourne (items, next_cursor). next_cursor=None sur la dernière page.
+    nullable=False (ex: created_at): ORDER BY field DESC, id DESC tout simple,
+    servi tel quel par un index (..., -field, -id).
+    """
+    if not nullable:
+        qs = qs.order_by(f"-{field}", "-id")
+        if cursor:
+            value, pk = decode_cursor(cursor)
+            if value is None:
+                raise ValueError("Invalid cursor")
+            qs = qs.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": pk}))
+        return _page(qs, field, page_size)
+
+    qs = qs.order_by(F(field).desc(nulls_last=True), "-id")
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        if value is None:
+            qs = qs.filter(**{f"{field}__isnull": True, "id__lt": pk})
+        else:
+            qs = qs.filter(
+                Q(**{f"{field}__lt": value})
+                | Q(**{field: value, "id__lt": pk})
+                | Q(**{f"{field}__isnull": True})
+            )
+
+    return _page(qs, field, page_size)
+
+
+def _page(qs, field: str, page_size: int):
+    items = list(qs[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    last = items[-1]
+    return items, encode_cursor(getattr(last, field), last.pk)
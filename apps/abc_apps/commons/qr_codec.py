@@ -0,0 +1,332 @@
+# =========================
+# apps/commons/qr_codec.py
+# =========================
+"""
+Codec unique des payloads QR / NFC (students, rooms, groups).
+
+- registre des versions par type: 1 décodeur par format, essayés dans l'ordre
+- clé HMAC-SHA256 précalculée (copy() au lieu de re-dériver la clé à chaque scan)
+- vérification en temps constant
+- LRU des payloads déjà décodés/vérifiés: un tag de salle statique est scanné
+  des milliers de fois par jour, on ne refait ni split ni HMAC
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+DECODE_CACHE_SIZE = 4096
+
+KIND_STUDENT = "student"
+KIND_ROOM = "room"
+KIND_GROUP = "group"
+
+
+class HmacKey:
+    """
+    HMAC-SHA256 avec la clé déjà absorbée: sign() = copy() + update().
+    """
+    __slots__ = ("_base",)
+
+    def __init__(self, secret: bytes):
+        self._base = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def digest(self, payload) -> bytes:
+        h = self._base.copy()
+        h.update(payload.encode() if isinstance(payload, str) else payload)
+        return h.digest()
+
+    def sign(self, payload: str) -> str:
+        h = self._base.copy()
+        h.update(payload.encode())
+        return h.hexdigest()
+
+    def verify(self, payload: str, sig: str) -> bool:
+        # bytes: compare_digest refuse les str non-ASCII (QR corrompu -> False, pas TypeError)
+        return hmac.compare_digest(self.sign(payload).encode(), (sig or "").encode())
+
+
+@lru_cache(maxsize=4)
+def _key_for(secret: str) -> HmacKey:
+    return HmacKey(secret.encode())
+
+
+def signing_key() -> HmacKey:
+    # clé par valeur de SECRET_KEY: override_settings / rotation -> nouvelle clé (et nouveau cache)
+    return _key_for(settings.SECRET_KEY)
+
+
+# ─────────────────────────────────────────────
+# Registre des versions
+# ─────────────────────────────────────────────
+Decoder = Callable[[str, HmacKey], Optional[dict]]
+
+
+@dataclass(frozen=True)
+class PayloadVersion:
+    kind: str
+    version: str
+    decode: Decoder  # None: ce n'est pas ce format; ValueError: ce format mais invalide
+
+
+_REGISTRY: Dict[str, List[PayloadVersion]] = {}
+
+_EMPTY_MESSAGES = {KIND_ROOM: "Empty QR", KIND_GROUP: "Empty QR"}
+_UNSUPPORTED_MESSAGES = {KIND_GROUP: "Unsupported group QR format"}
+
+
+def register(kind: str, version: str):
+    def wrap(fn: Decoder) -> Decoder:
+        _REGISTRY.setdefault(kind, []).append(PayloadVersion(kind, version, fn))
+        _decode_cached.cache_clear()
+        return fn
+    return wrap
+
+
+def versions(kind: str) -> List[str]:
+    return [v.version for v in _REGISTRY.get(kind, [])]
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def _decode_cached(kind: str, s: str, allowed: Optional[Tuple[str, ...]], key: HmacKey) -> Optional[dict]:
+    # None = aucun format reconnu (message choisi par l'appelant);
+    # les exceptions ne sont pas mises en cache: un QR invalide est re-vérifié à chaque fois
+    for entry in _REGISTRY.get(kind, []):
+        if allowed is not None and entry.version not in allowed:
+            continue
+        out = entry.decode(s, key)
+        if out is not None:
+            out["version"] = entry.version
+            return out
+    return None
+
+
+def decode(kind: str, qr_data: str, allowed: Optional[Tuple[str, ...]] = None,
+           empty_message: Optional[str] = None, unsupported_message: Optional[str] = None) -> dict:
+    """
+    Décode (et vérifie) qr_data. allowed: restreint aux versions données.
+    empty_message / unsupported_message: messages d'erreur propres au parser appelant.
+    Retourne une copie (le résultat en cache ne doit pas être modifié).
+    """
+    s = (qr_data or "").strip()
+    if not s:
+        raise ValueError(empty_message or _EMPTY_MESSAGES.get(kind, "Empty QR data"))
+    out = _decode_cached(kind, s, tuple(allowed) if allowed is not None else None, signing_key())
+    if out is None:
+        raise ValueError(unsupported_message or _UNSUPPORTED_MESSAGES.get(kind, "Unsupported QR format"))
+    return dict(out)
+
+
+def cache_info():
+    return _decode_cached.cache_info()
+
+
+def clear_cache() -> None:
+    _decode_cached.cache_clear()
+
+
+# ─────────────────────────────────────────────
+# Students (cartes)
+# ─────────────────────────────────────────────
+def _student(student_id, student_code, valid_until=None, status_code=None) -> dict:
+    return {
+        "student_id": student_id,
+        "student_code": student_code,
+        "valid_until": valid_until,
+        "status_code": status_code,
+    }
+
+
+@register(KIND_STUDENT, "ABCSTU")
+def _decode_abcstu(s: str, key: HmacKey):
+    # ABCSTU:ST-001|123
+    if not s.startswith("ABCSTU:"):
+        return None
+    parts = s[len("ABCSTU:"):].split("|")
+    student_code = parts[0].strip()
+    student_id = int(parts[1]) if len(parts) >= 2 and parts[1].strip().isdigit() else None
+    if not student_code:
+        raise ValueError("Invalid student_code")
+    return _student(student_id, student_code)
+
+
+@register(KIND_STUDENT, "CODE")
+def _decode_code(s: str, key: HmacKey):
+    # ST-001
+    if "|" in s:
+        return None
+    return _student(None, s)
+
+
+@register(KIND_STUDENT, "ABC1")
+def _decode_abc1(s: str, key: HmacKey):
+    # ABC1|studentId|studentCode|validUntil|statusCode
+    parts = s.split("|")
+    if len(parts) != 5 or parts[0] != "ABC1":
+        return None
+    _, student_id, student_code, valid_until, status_code = parts
+    return _student(int(student_id), student_code.strip(), valid_until.strip(), status_code.strip().lower())
+
+
+@register(KIND_STUDENT, "ABC2")
+def _decode_abc2(s: str, key: HmacKey):
+    # ABC2|studentId|studentCode|validUntil|statusCode|sig
+    parts = s.split("|")
+    if len(parts) != 6 or parts[0] != "ABC2":
+        return None
+    _, student_id, student_code, valid_until, status_code, sig = parts
+    if not key.verify(f"{student_id}|{student_code}|{valid_until}|{status_code}", sig):
+        raise ValueError("Invalid QR signature")
+    return _student(int(student_id), student_code.strip(), valid_until.strip(), status_code.strip().lower())
+
+
+@register(KIND_STUDENT, "LEGACY")
+def _decode_student_legacy(s: str, key: HmacKey):
+    # fullName|studentCode|level|groupName|validUntil|statusCode
+    parts = s.split("|")
+    if len(parts) != 6:
+        return None
+    _, student_code, _, _, valid_until, status_code = parts
+    return _student(None, student_code.strip(), valid_until.strip(), status_code.strip().lower())
+
+
+def make_student_qr(student_id: int, student_code: str, valid_until: str, status_code: str) -> str:
+    payload = f"{student_id}|{student_code}|{valid_until}|{status_code}"
+    return f"ABC2|{payload}|{signing_key().sign(payload)}"
+
+
+# ─────────────────────────────────────────────
+# Rooms (tags QR / NFC de porte)
+# ─────────────────────────────────────────────
+ROOM_PREFIX = "ABCR"
+ROOM_KIND = "ROOM"
+
+# formats "tag" (room_code [+ tag_id]) vs "ABCR1" (room_id)
+ROOM_TAG_VERSIONS = ("ROOM", "ABCR_V2", "ABCR_V1", "ABCR_C1")
+
+# compact: "RC:" + base32( format | len(code) | code | tag uuid (16o) | HMAC tronqué (10o) )
+# base32 = alphabet du mode alphanumérique QR -> ~55 caractères au lieu de ~115 en mode octet
+COMPACT_ROOM_PREFIX = "RC:"
+COMPACT_ROOM_FORMAT = 1
+COMPACT_SIG_BYTES = 10
+
+
+@register(KIND_ROOM, "ROOM")
+def _decode_room_plain(s: str, key: HmacKey):
+    # ROOM:R1
+    if not s.startswith("ROOM:"):
+        return None
+    return {"room_code": s[len("ROOM:"):].strip(), "tag_id": None}
+
+
+@register(KIND_ROOM, "ABCR_V2")
+def _decode_room_v2(s: str, key: HmacKey):
+    # ABCR|ROOM|R1|tag_uuid|sig
+    parts = s.split("|")
+    if len(parts) != 5 or parts[0] != ROOM_PREFIX or parts[1] != ROOM_KIND:
+        return None
+    _, _, room_code, tag_id, sig = parts
+    if not key.verify(f"{ROOM_PREFIX}|{ROOM_KIND}|{room_code}|{tag_id}", sig):
+        raise ValueError("Invalid room QR signature (v2)")
+    return {"room_code": room_code, "tag_id": tag_id}
+
+
+@register(KIND_ROOM, "ABCR_V1")
+def _decode_room_v1(s: str, key: HmacKey):
+    # ABCR|R1|sig
+    parts = s.split("|")
+    if len(parts) != 3 or parts[0] != ROOM_PREFIX:
+        return None
+    _, room_code, sig = parts
+    if not key.verify(room_code, sig):
+        raise ValueError("Invalid room QR signature (v1)")
+    return {"room_code": room_code, "tag_id": None}
+
+
+@register(KIND_ROOM, "ABCR1")
+def _decode_room_id(s: str, key: HmacKey):
+    # ABCR1|<room_id>|<sig>
+    parts = s.split("|")
+    if len(parts) != 3 or parts[0] != "ABCR1":
+        return None
+    room_id = int(parts[1])
+    if not key.verify(f"{room_id}", parts[2].strip()):
+        raise ValueError("Invalid room QR signature")
+    return {"room_id": room_id}
+
+
+@register(KIND_ROOM, "ABCR_C1")
+def _decode_room_compact(s: str, key: HmacKey):
+    # RC:<base32>
+    if not s.upper().startswith(COMPACT_ROOM_PREFIX):
+        return None
+    data = s[len(COMPACT_ROOM_PREFIX):]
+    try:
+        raw = base64.b32decode(data + "=" * (-len(data) % 8), casefold=True)
+    except ValueError:
+        raise ValueError("Invalid compact room QR")
+
+    if len(raw) < 2 + 16 + COMPACT_SIG_BYTES or raw[0] != COMPACT_ROOM_FORMAT:
+        raise ValueError("Unsupported compact room QR")
+    code_len = raw[1]
+    body, sig = raw[:-COMPACT_SIG_BYTES], raw[-COMPACT_SIG_BYTES:]
+    if len(body) != 2 + code_len + 16:
+        raise ValueError("Invalid compact room QR")
+    if not hmac.compare_digest(key.digest(b"RC" + body)[:COMPACT_SIG_BYTES], sig):
+        raise ValueError("Invalid room QR signature (compact)")
+
+    try:
+        room_code = body[2:2 + code_len].decode()
+    except UnicodeDecodeError:
+        raise ValueError("Invalid compact room QR")
+    return {"room_code": room_code, "tag_id": str(uuid.UUID(bytes=body[2 + code_len:]))}
+
+
+def make_compact_room_qr(room_code: str, tag_id: str) -> str:
+    code = room_code.encode()
+    if len(code) > 255:
+        raise ValueError("room_code too long for compact QR")
+    body = bytes([COMPACT_ROOM_FORMAT, len(code)]) + code + uuid.UUID(str(tag_id)).bytes
+    sig = signing_key().digest(b"RC" + body)[:COMPACT_SIG_BYTES]
+    return COMPACT_ROOM_PREFIX + base64.b32encode(body + sig).decode().rstrip("=")
+
+
+def make_room_qr(room_code: str, tag_id: str, compact: bool = True) -> str:
+    """
+    compact=True: format ABCR_C1 (QR plus petit / tags NFC moins chers).
+    compact=False: v2 texte (ABCR|ROOM|code|tag|sig), toujours accepté au scan.
+    """
+    if compact:
+        return make_compact_room_qr(room_code, tag_id)
+    raw = f"{ROOM_PREFIX}|{ROOM_KIND}|{room_code}|{tag_id}"
+    return f"{raw}|{signing_key().sign(raw)}"
+
+
+# ─────────────────────────────────────────────
+# Groups
+# ─────────────────────────────────────────────
+@register(KIND_GROUP, "GROUP")
+def _decode_group_plain(s: str, key: HmacKey):
+    # GROUP:12
+    if not s.startswith("GROUP:"):
+        return None
+    return {"group_id": int(s[len("GROUP:"):].strip()), "period_key": None}
+
+
+@register(KIND_GROUP, "ABCGRP")
+def _decode_group_signed(s: str, key: HmacKey):
+    # ABCGRP|gid|period_key|sig
+    parts = s.split("|")
+    if len(parts) != 4 or parts[0] != "ABCGRP":
+        return None
+    _, gid, period_key, sig = parts
+    if not key.verify(f"{gid}|{period_key}", sig):
+        raise ValueError("Invalid group QR signature")
+    return {"group_id": int(gid), "period_key": period_key}
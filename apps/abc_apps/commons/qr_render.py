@@ -0,0 +1,168 @@
+# =========================
+# apps/commons/qr_render.py
+# =========================
+"""
+Rendu QR en lot: PNG / SVG / planche PDF prête à imprimer.
+- images en cache (clé = hash du payload + paramètres de rendu)
+- les manquantes rendues dans un pool de processus (qrcode est pur Python, CPU-bound)
+"""
+import hashlib
+import io
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import qrcode
+import qrcode.image.svg
+from django.core.cache import cache
+from PIL import Image, ImageDraw, ImageFont
+
+QR_IMAGE_CACHE_TTL = 7 * 24 * 60 * 60
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+
+# en dessous: rendu dans le process courant (démarrer un pool coûte plus cher)
+POOL_MIN_ITEMS = 16
+POOL_MAX_WORKERS = 4
+
+# planche PDF A4 @ 300 dpi
+SHEET_DPI = 300
+SHEET_SIZE = (2480, 3508)
+SHEET_MARGIN = 120
+SHEET_LABEL_HEIGHT = 70
+
+FORMATS = ("png", "svg", "pdf")
+
+
+def _make(payload: str, image_factory=None):
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+        image_factory=image_factory,
+    )
+    qr.add_data(payload)  # mode (alphanumérique / octet) choisi par segment
+    qr.make(fit=True)
+    return qr.make_image()
+
+
+def render_png(payload: str) -> bytes:
+    buf = io.BytesIO()
+    _make(payload).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_svg(payload: str) -> bytes:
+    buf = io.BytesIO()
+    _make(payload, qrcode.image.svg.SvgPathImage).save(buf)
+    return buf.getvalue()
+
+
+def _render(args: Tuple[str, str]) -> bytes:
+    # top-level: picklable pour le pool
+    fmt, payload = args
+    return render_svg(payload) if fmt == "svg" else render_png(payload)
+
+
+def image_cache_key(payload: str, fmt: str) -> str:
+    digest = hashlib.sha256(f"{fmt}|{QR_BOX_SIZE}|{QR_BORDER}|{payload}".encode()).hexdigest()
+    return f"qr:img:{digest}"
+
+
+def _can_fork() -> bool:
+    # worker Celery prefork = process daemon: pas d'enfants possibles -> rendu séquentiel
+    # (l'export Celery parallélise en chunks de tâches, voir attendance.tasks.build_qr_sheet_export)
+    return not multiprocessing.current_process().daemon
+
+
+def render_many(payloads: Sequence[str], fmt: str = "png", workers: Optional[int] = None) -> List[bytes]:
+    """
+    Images (bytes) dans l'ordre de payloads. fmt: "png" | "svg".
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError("fmt must be png or svg")
+
+    keys = {p: image_cache_key(p, fmt) for p in payloads}
+    cached = cache.get_many(list(set(keys.values())))
+    images: Dict[str, bytes] = {p: cached[k] for p, k in keys.items() if k in cached}
+
+    missing = [p for p in dict.fromkeys(payloads) if p not in images]
+    if missing:
+        jobs = [(fmt, p) for p in missing]
+        if len(missing) >= POOL_MIN_ITEMS and _can_fork():
+            with ProcessPoolExecutor(max_workers=workers or POOL_MAX_WORKERS) as pool:
+                rendered = list(pool.map(_render, jobs, chunksize=8))
+        else:
+            rendered = [_render(job) for job in jobs]
+        fresh = dict(zip(missing, rendered))
+        images.update(fresh)
+        cache.set_many({keys[p]: img for p, img in fresh.items()}, QR_IMAGE_CACHE_TTL)
+
+    return [images[p] for p in payloads]
+
+
+def render_png_cached(payload: str) -> bytes:
+    return render_many([payload], "png")[0]
+
+
+# ─────────────────────────────────────────────
+# Sorties: zip (png/svg) ou planche PDF
+# ─────────────────────────────────────────────
+def build_zip(items: Sequence[Tuple[str, str]], fmt: str) -> bytes:
+    """
+    items: [(label, payload)] -> zip de <label>.<fmt>
+    """
+    images = render_many([payload for _, payload in items], fmt)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        seen = {}
+        for (label, _), img in zip(items, images):
+            name = label
+            if name in seen:
+                seen[name] += 1
+                name = f"{label}-{seen[label]}"
+            else:
+                seen[name] = 0
+            zf.writestr(f"{name}.{fmt}", img)
+    return buf.getvalue()
+
+
+def _label_font():
+    try:
+        return ImageFont.load_default(size=40)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+def build_pdf_sheet(items: Sequence[Tuple[str, str]], cols: int = 3, rows: int = 4) -> bytes:
+    """
+    Planche A4 (cols x rows codes par page), label sous chaque code, PDF multi-pages.
+    """
+    if not items:
+        raise ValueError("Nothing to print")
+
+    images = render_many([payload for _, payload in items], "png")
+    width, height = SHEET_SIZE
+    cell_w = (width - 2 * SHEET_MARGIN) // cols
+    cell_h = (height - 2 * SHEET_MARGIN) // rows
+    side = min(cell_w, cell_h - SHEET_LABEL_HEIGHT) - 20
+    font = _label_font()
+
+    pages, per_page = [], cols * rows
+    for start in range(0, len(items), per_page):
+        page = Image.new("RGB", SHEET_SIZE, "white")
+        draw = ImageDraw.Draw(page)
+        for i, ((label, _), png) in enumerate(zip(items[start:start + per_page], images[start:start + per_page])):
+            col, row = i % cols, i // cols
+            x = SHEET_MARGIN + col * cell_w + (cell_w - side) // 2
+            y = SHEET_MARGIN + row * cell_h
+            code = Image.open(io.BytesIO(png)).convert("RGB").resize((side, side), Image.NEAREST)
+            page.paste(code, (x, y))
+            text_w = draw.textlength(label, font=font)
+            draw.text((x + (side - text_w) / 2, y + side + 10), label, fill="black", font=font)
+        pages.append(page)
+
+    buf = io.BytesIO()
+    pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=SHEET_DPI)
+    return buf.getvalue()
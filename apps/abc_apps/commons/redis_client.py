@@ -0,0 +1,22 @@
+# =========================
+# commons/redis_client.py
+# =========================
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Client Redis brut (sorted sets, etc.) pour ce que le cache Django n'expose pas.
+    Retourne None si REDIS_URL n'est pas configuré (dev): l'appelant doit
+    alors retomber sur la DB.
+    """
+    global _client
+    url = getattr(settings, "REDIS_URL", "")
+    if not url:
+        return None
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(url, decode_responses=True)
+    return _client
@@ -0,0 +1,53 @@
+# =========================================
+# apps/library/consumers.py
+# =========================================
+import json
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.abc_apps.library.services.notifications import user_group_name
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    ws/notifications/?token=<JWT access>
+    Reçoit en push les nouvelles notifications du user.
+    """
+
+    async def connect(self):
+        self.user_id = self._resolve_user_id()
+        if not self.user_id:
+            await self.close(code=4401)
+            return
+
+        self.group_name = user_group_name(self.user_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, "user_id", None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "notification",
+            "notification": event["notification"],
+        }))
+
+    def _resolve_user_id(self):
+        user = self.scope.get("user")
+        if user is not None and user.is_authenticated:
+            return user.id
+
+        # les apps mobiles passent le JWT en query string (pas de session)
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        token = (query.get("token") or [""])[0]
+        if not token:
+            return None
+        try:
+            return AccessToken(token).get("user_id")
+        except TokenError:
+            return None
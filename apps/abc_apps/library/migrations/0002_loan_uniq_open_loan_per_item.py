@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='loan',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('returned_at__isnull', True)),
+                fields=('item',),
+                name='uniq_open_loan_per_item',
+            ),
+        ),
+    ]
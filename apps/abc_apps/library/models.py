@@ -3,6 +3,7 @@
 # =========================================
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from apps.common.models import TimeStampedModel
 
@@ -66,6 +67,14 @@ class Loan(TimeStampedModel):
             models.Index(fields=["borrowed_at"]),
             models.Index(fields=["due_at", "returned_at"]),
         ]
+        constraints = [
+            # ✅ 1 seul prêt ouvert par item (garantie DB en cas d'emprunts concurrents)
+            models.UniqueConstraint(
+                fields=["item"],
+                condition=Q(returned_at__isnull=True),
+                name="uniq_open_loan_per_item",
+            ),
+        ]
 
     @property
     def is_open(self):
@@ -0,0 +1,7 @@
+from django.urls import re_path
+
+from apps.abc_apps.library.consumers import NotificationConsumer
+
+websocket_urlpatterns = [
+    re_path(r"^ws/notifications/$", NotificationConsumer.as_asgi()),
+]
@@ -26,6 +26,16 @@ class BorrowRequestSerializer(serializers.Serializer):
 class ReturnRequestSerializer(serializers.Serializer):
     item_code = serializers.CharField(max_length=50)
 
+class BulkBorrowRequestSerializer(serializers.Serializer):
+    # ex: set de livres pour une classe (scan à la suite)
+    item_codes = serializers.ListField(child=serializers.CharField(max_length=50), allow_empty=False, max_length=200)
+    purpose = serializers.ChoiceField(choices=[("reading","reading"),("class_use","class_use"),("prep","prep"),("other","other")])
+    purpose_detail = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    due_at = serializers.DateTimeField(required=False)  # optional
+
+class BulkReturnRequestSerializer(serializers.Serializer):
+    item_codes = serializers.ListField(child=serializers.CharField(max_length=50), allow_empty=False, max_length=200)
+
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
@@ -1,38 +1,155 @@
 # =========================================
 # apps/library/services/loan.py
 # =========================================
+from typing import Dict, List
+
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from apps.abc_apps.library.models import Item, Loan
 
-def borrow_item(item_code: str, borrowed_by, issued_by=None, purpose="reading", purpose_detail="", due_at=None):
-    item = Item.objects.get(code=item_code)
-    if item.status != "available":
-        raise ValueError("Item not available")
+# nombre de tentatives si un autre desk a emprunté/rendu le même item entre-temps
+LOAN_CONFLICT_RETRIES = 3
+
+
+class LoanConflict(Exception):
+    pass
+
+
+def _unique_codes(item_codes: List[str]) -> List[str]:
+    return list(dict.fromkeys(c.strip() for c in item_codes if c and c.strip()))
+
+
+@transaction.atomic
+def _borrow_once(codes, borrowed_by, issued_by, purpose, purpose_detail, due_at) -> Dict[str, list]:
+    items = list(Item.objects.filter(code__in=codes))
+    found = {it.code for it in items}
+    available = [it for it in items if it.status == "available"]
+    unavailable = [it.code for it in items if it.status != "available"]
+
+    if available:
+        now = timezone.now()
+        # ✅ conditional UPDATE: pas de read-check-write
+        updated = Item.objects.filter(
+            id__in=[it.id for it in available],
+            status="available",
+        ).update(status="borrowed", updated_at=now)
+        if updated != len(available):
+            raise LoanConflict()
+
+        try:
+            loans = Loan.objects.bulk_create([
+                Loan(
+                    item=it,
+                    borrowed_by=borrowed_by,
+                    issued_by=issued_by,
+                    purpose=purpose,
+                    purpose_detail=purpose_detail,
+                    due_at=due_at,
+                    borrowed_at=now,
+                )
+                for it in available
+            ])
+        except IntegrityError:
+            # uniq_open_loan_per_item: un prêt ouvert existe déjà
+            raise LoanConflict()
+        for it in available:
+            it.status = "borrowed"
+    else:
+        loans = []
+
+    return {
+        "loans": loans,
+        "unavailable": unavailable,
+        "not_found": [c for c in codes if c not in found],
+    }
+
+
+def borrow_items(item_codes: List[str], borrowed_by, issued_by=None, purpose="reading", purpose_detail="", due_at=None) -> Dict[str, list]:
+    """
+    Emprunt en lot (ex: set de 25 livres pour une classe), 1 transaction:
+    - 1 SELECT des items
+    - 1 UPDATE ... WHERE status='available'
+    - 1 INSERT (bulk) des loans
+    Retourne {"loans": [...], "unavailable": [codes], "not_found": [codes]}.
+    """
+    codes = _unique_codes(item_codes)
+    for _ in range(LOAN_CONFLICT_RETRIES):
+        try:
+            return _borrow_once(codes, borrowed_by, issued_by, purpose, purpose_detail, due_at)
+        except LoanConflict:
+            continue
+    raise ValueError("Items are being borrowed concurrently, please retry")
+
 
-    loan = Loan.objects.create(
-        item=item,
+@transaction.atomic
+def _return_once(codes, return_checked_by) -> Dict[str, list]:
+    loans = list(
+        Loan.objects
+        .select_related("item")
+        .filter(item__code__in=codes, returned_at__isnull=True)
+    )
+    with_loan = {loan.item.code for loan in loans}
+
+    if loans:
+        now = timezone.now()
+        updated = Loan.objects.filter(
+            id__in=[loan.id for loan in loans],
+            returned_at__isnull=True,
+        ).update(returned_at=now, return_checked_by=return_checked_by, updated_at=now)
+        if updated != len(loans):
+            raise LoanConflict()
+
+        Item.objects.filter(
+            id__in=[loan.item_id for loan in loans],
+            status="borrowed",
+        ).update(status="available", updated_at=now)
+
+        for loan in loans:
+            loan.returned_at = now
+            loan.return_checked_by = return_checked_by
+            loan.item.status = "available"
+
+    return {
+        "loans": loans,
+        "no_active_loan": [c for c in codes if c not in with_loan],
+    }
+
+
+def return_items(item_codes: List[str], return_checked_by=None) -> Dict[str, list]:
+    """
+    Retour en lot, 1 transaction:
+    - 1 SELECT des prêts ouverts
+    - 1 UPDATE des loans (WHERE returned_at IS NULL)
+    - 1 UPDATE des items
+    Retourne {"loans": [...], "no_active_loan": [codes]}.
+    """
+    codes = _unique_codes(item_codes)
+    for _ in range(LOAN_CONFLICT_RETRIES):
+        try:
+            return _return_once(codes, return_checked_by)
+        except LoanConflict:
+            continue
+    raise ValueError("Items are being returned concurrently, please retry")
+
+
+def borrow_item(item_code: str, borrowed_by, issued_by=None, purpose="reading", purpose_detail="", due_at=None):
+    result = borrow_items(
+        [item_code],
         borrowed_by=borrowed_by,
         issued_by=issued_by,
         purpose=purpose,
         purpose_detail=purpose_detail,
         due_at=due_at,
-        borrowed_at=timezone.now(),
     )
-    item.status = "borrowed"
-    item.save(update_fields=["status"])
-    return loan
+    if result["not_found"]:
+        raise Item.DoesNotExist("Item not found")
+    if not result["loans"]:
+        raise ValueError("Item not available")
+    return result["loans"][0]
 
-def return_item(item_code: str, return_checked_by=None):
-    item = Item.objects.get(code=item_code)
 
-    loan = Loan.objects.filter(item=item, returned_at__isnull=True).order_by("-borrowed_at").first()
-    if not loan:
+def return_item(item_code: str, return_checked_by=None):
+    result = return_items([item_code], return_checked_by=return_checked_by)
+    if not result["loans"]:
         raise ValueError("No active loan found for this item")
-
-    loan.returned_at = timezone.now()
-    loan.return_checked_by = return_checked_by
-    loan.save(update_fields=["returned_at", "return_checked_by"])
-
-    item.status = "available"
-    item.save(update_fields=["status"])
-    return loan
+    return result["loans"][0]
@@ -0,0 +1,121 @@
+# =========================================
+# apps/library/services/notifications.py
+# =========================================
+import logging
+from collections import Counter
+from typing import Iterable, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.abc_apps.library.models_notifications import Notification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = 500
+UNREAD_COUNT_TTL = 60 * 60  # 1h, recalculé depuis la DB au besoin
+
+
+def user_group_name(user_id: int) -> str:
+    # groupe Channels (WebSocket) d'un user
+    return f"notifications.user.{user_id}"
+
+
+def _unread_key(user_id: int) -> str:
+    return f"notif:unread:{user_id}"
+
+
+# ─────────────────────────────────────────────
+# Unread counter (Redis)
+# ─────────────────────────────────────────────
+def get_unread_count(user_id: int) -> int:
+    """
+    Lecture du compteur; si absent du cache -> 1 COUNT en DB puis mise en cache.
+    """
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TTL)
+    return count
+
+
+def _bump_unread(user_id: int, delta: int) -> None:
+    # on ne modifie que les compteurs déjà en cache (sinon: recalcul à la prochaine lecture)
+    key = _unread_key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        return
+    if value < 0:
+        cache.delete(key)
+
+
+# ─────────────────────────────────────────────
+# Push (Channels)
+# ─────────────────────────────────────────────
+def _push(notifications: List[Notification]) -> None:
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    send = async_to_sync(channel_layer.group_send)
+    for n in notifications:
+        try:
+            send(user_group_name(n.user_id), {
+                "type": "notification.created",
+                "notification": {
+                    "id": n.id,
+                    "title": n.title,
+                    "message": n.message,
+                    "data": n.data,
+                    "is_read": n.is_read,
+                    "created_at": n.created_at.isoformat() if n.created_at else None,
+                },
+            })
+        except Exception:
+            # le push est best-effort: la notification est déjà en DB
+            logger.exception("notification push failed user_id=%s", n.user_id)
+
+
+def _after_create(notifications: List[Notification]) -> None:
+    for user_id, count in Counter(n.user_id for n in notifications).items():
+        _bump_unread(user_id, count)
+    _push(notifications)
+
+
+# ─────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────
+def create_notifications(notifications: Iterable[Notification]) -> List[Notification]:
+    """
+    Écrit les notifications en batch, puis (après commit):
+    - incrémente les compteurs unread par user
+    - pousse chaque notification sur le groupe WebSocket du user
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+
+    created = Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+    transaction.on_commit(lambda: _after_create(created))
+    return created
+
+
+def notify(user, title: str, message: str, data=None) -> Notification:
+    return create_notifications([
+        Notification(user=user, title=title, message=message, data=data or {}),
+    ])[0]
+
+
+def mark_notification_read(user_id: int, notification_id: int) -> bool:
+    """
+    Retourne False si la notification n'existe pas pour ce user.
+    """
+    updated = Notification.objects.filter(id=notification_id, user_id=user_id, is_read=False).update(is_read=True)
+    if updated:
+        _bump_unread(user_id, -updated)
+        return True
+    return Notification.objects.filter(id=notification_id, user_id=user_id).exists()
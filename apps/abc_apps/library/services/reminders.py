@@ -2,13 +2,49 @@
 # apps/library/services/reminders.py
 # =========================================
 from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from apps.abc_apps.library.models import Loan
 from apps.abc_apps.library.models_notifications import Notification
+from apps.abc_apps.library.services.notifications import create_notifications
 
 RETURN_REMINDER_BEFORE_MIN = 30
+REMINDER_BATCH_SIZE = 500
 
-def send_reading_reminders():
+# colonnes lues pour construire une notification (pas d'instances Loan/Item)
+LOAN_REMINDER_FIELDS = ("id", "borrowed_by_id", "item__title", "item__code")
+
+
+def _send_in_batches(qs, build_notification, stamp_field: str, now) -> int:
+    """
+    Parcourt qs par chunks (iterator) et, par chunk:
+    - 1 bulk_create des notifications (+ compteurs unread / push après commit)
+    - 1 UPDATE ... WHERE id IN (...) du timestamp de rappel
+    """
+    sent = 0
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            create_notifications(build_notification(row) for row in batch)
+            Loan.objects.filter(id__in=[row["id"] for row in batch]).update(**{stamp_field: now})
+
+    for row in qs.values(*LOAN_REMINDER_FIELDS).iterator(chunk_size=REMINDER_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= REMINDER_BATCH_SIZE:
+            flush()
+            sent += len(batch)
+            batch = []
+
+    if batch:
+        flush()
+        sent += len(batch)
+
+    return sent
+
+
+def send_reading_reminders() -> int:
     """
     Smart reminder:
     - for active book loans, send max 1 reminder per 24h
@@ -16,64 +52,73 @@ def send_reading_reminders():
     now = timezone.now()
     last_24h = now - timedelta(hours=24)
 
-    qs = Loan.objects.select_related("item", "borrowed_by").filter(
+    qs = Loan.objects.filter(
         returned_at__isnull=True,
         item__item_type="book",
-    )
-
-    for loan in qs:
-        if loan.last_read_reminder_at and loan.last_read_reminder_at >= last_24h:
-            continue
+    ).filter(
+        Q(last_read_reminder_at__isnull=True) | Q(last_read_reminder_at__lt=last_24h)
+    ).order_by("id")
 
-        Notification.objects.create(
-            user=loan.borrowed_by,
+    return _send_in_batches(
+        qs,
+        lambda row: Notification(
+            user_id=row["borrowed_by_id"],
             title="Reading time 📚",
-            message=f"Reminder: read your book '{loan.item.title}' today to improve your English.",
-            data={"loan_id": loan.id, "item_code": loan.item.code, "type": "reading"},
-        )
-        loan.last_read_reminder_at = now
-        loan.save(update_fields=["last_read_reminder_at"])
+            message=f"Reminder: read your book '{row['item__title']}' today to improve your English.",
+            data={"loan_id": row["id"], "item_code": row["item__code"], "type": "reading"},
+            created_at=now,
+        ),
+        "last_read_reminder_at",
+        now,
+    )
 
 
-def send_return_reminders():
+def send_return_reminders() -> int:
     """
-    - 30 minutes before due_at: reminder (avoid spam)
+    - 30 minutes before due_at: reminder (max every 2 hours, avoid spam)
     - overdue: reminder max every 6 hours
     """
     now = timezone.now()
+    two_hours_ago = now - timedelta(hours=2)
     six_hours_ago = now - timedelta(hours=6)
 
-    qs = Loan.objects.select_related("item", "borrowed_by").filter(
-        returned_at__isnull=True,
-        due_at__isnull=False,
+    open_loans = Loan.objects.filter(returned_at__isnull=True, due_at__isnull=False).order_by("id")
+
+    # due soon
+    due_soon = open_loans.filter(
+        due_at__gte=now,
+        due_at__lte=now + timedelta(minutes=RETURN_REMINDER_BEFORE_MIN),
+    ).filter(
+        Q(last_return_reminder_at__isnull=True) | Q(last_return_reminder_at__lt=two_hours_ago)
+    )
+    sent = _send_in_batches(
+        due_soon,
+        lambda row: Notification(
+            user_id=row["borrowed_by_id"],
+            title="Return reminder ⏰",
+            message=f"Please return '{row['item__title']}' soon (due in ~{RETURN_REMINDER_BEFORE_MIN} minutes).",
+            data={"loan_id": row["id"], "item_code": row["item__code"], "type": "return_due_soon"},
+            created_at=now,
+        ),
+        "last_return_reminder_at",
+        now,
+    )
+
+    # overdue
+    overdue = open_loans.filter(due_at__lt=now).filter(
+        Q(last_return_reminder_at__isnull=True) | Q(last_return_reminder_at__lt=six_hours_ago)
+    )
+    sent += _send_in_batches(
+        overdue,
+        lambda row: Notification(
+            user_id=row["borrowed_by_id"],
+            title="Overdue ⚠️",
+            message=f"'{row['item__title']}' is overdue. Please return it as soon as possible.",
+            data={"loan_id": row["id"], "item_code": row["item__code"], "type": "overdue"},
+            created_at=now,
+        ),
+        "last_return_reminder_at",
+        now,
     )
 
-    for loan in qs:
-        # due soon
-        if loan.due_at and now <= loan.due_at <= now + timedelta(minutes=RETURN_REMINDER_BEFORE_MIN):
-            if loan.last_return_reminder_at and loan.last_return_reminder_at >= now - timedelta(hours=2):
-                continue
-
-            Notification.objects.create(
-                user=loan.borrowed_by,
-                title="Return reminder ⏰",
-                message=f"Please return '{loan.item.title}' soon (due in ~{RETURN_REMINDER_BEFORE_MIN} minutes).",
-                data={"loan_id": loan.id, "item_code": loan.item.code, "type": "return_due_soon"},
-            )
-            loan.last_return_reminder_at = now
-            loan.save(update_fields=["last_return_reminder_at"])
-            continue
-
-        # overdue
-        if loan.due_at and now > loan.due_at:
-            if loan.last_return_reminder_at and loan.last_return_reminder_at >= six_hours_ago:
-                continue
-
-            Notification.objects.create(
-                user=loan.borrowed_by,
-                title="Overdue ⚠️",
-                message=f"'{loan.item.title}' is overdue. Please return it as soon as possible.",
-                data={"loan_id": loan.id, "item_code": loan.item.code, "type": "overdue"},
-            )
-            loan.last_return_reminder_at = now
-            loan.save(update_fields=["last_return_reminder_at"])
+    return sent
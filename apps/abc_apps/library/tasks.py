@@ -6,13 +6,13 @@ def send_reading_reminders_task():
     """
     Daily reading reminders for active BOOK loans.
     """
-    send_reading_reminders()
-    return {"status": "ok", "task": "reading_reminders"}
+    sent = send_reading_reminders()
+    return {"status": "ok", "task": "reading_reminders", "sent": sent}
 
 @shared_task(name="apps.library.tasks.send_return_reminders_task")
 def send_return_reminders_task():
     """
     Return reminders (due soon + overdue).
     """
-    send_return_reminders()
-    return {"status": "ok", "task": "return_reminders"}
+    sent = send_return_reminders()
+    return {"status": "ok", "task": "return_reminders", "sent": sent}
@@ -7,17 +7,19 @@ from rest_framework.decorators import action
 from rest_framework import status
 from django.utils import timezone
 
-from common.responses import ok, fail
+from apps.abc_apps.commons.responses import ok, fail
 from apps.abc_apps.library.models import Item, Loan
 from apps.abc_apps.library.models_notifications import Notification
 from apps.abc_apps.library.serializers import (
     ItemSerializer, LoanSerializer,
     BorrowRequestSerializer, ReturnRequestSerializer,
+    BulkBorrowRequestSerializer, BulkReturnRequestSerializer,
     NotificationSerializer, MarkNotificationReadSerializer
 )
 from apps.abc_apps.library.permissions import IsTeacherOrSecretaryOrStaff
-from apps.abc_apps.library.services.loan import borrow_item, return_item
+from apps.abc_apps.library.services.loan import borrow_item, return_item, borrow_items, return_items
 from apps.abc_apps.library.services.reminders import send_reading_reminders, send_return_reminders
+from apps.abc_apps.library.services.notifications import get_unread_count, mark_notification_read
 
 class ItemViewSet(ModelViewSet):
     queryset = Item.objects.all().order_by("item_type", "title")
@@ -29,6 +31,8 @@ class LoanViewSet(ViewSet):
     Endpoints:
     - POST /api/library/loans/borrow/
     - POST /api/library/loans/return/
+    - POST /api/library/loans/bulk-borrow/   (set de classe, 1 transaction)
+    - POST /api/library/loans/bulk-return/
     - GET  /api/library/loans/my/
     - GET  /api/library/loans/open/   (staff only)
     """
@@ -69,6 +73,46 @@ class LoanViewSet(ViewSet):
         except Exception as e:
             return fail(str(e), status=400)
 
+    @action(detail=False, methods=["post"], url_path="bulk-borrow", permission_classes=[IsAuthenticated, IsTeacherOrSecretaryOrStaff])
+    def bulk_borrow(self, request):
+        ser = BulkBorrowRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        try:
+            result = borrow_items(
+                item_codes=ser.validated_data["item_codes"],
+                borrowed_by=request.user,
+                issued_by=request.user,
+                purpose=ser.validated_data["purpose"],
+                purpose_detail=ser.validated_data.get("purpose_detail", ""),
+                due_at=ser.validated_data.get("due_at"),
+            )
+        except ValueError as e:
+            return fail(str(e), status=409)
+
+        return ok({
+            "loans": LoanSerializer(result["loans"], many=True).data,
+            "borrowed_count": len(result["loans"]),
+            "unavailable": result["unavailable"],
+            "not_found": result["not_found"],
+        }, message="Borrowed", status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="bulk-return", permission_classes=[IsAuthenticated, IsTeacherOrSecretaryOrStaff])
+    def bulk_return(self, request):
+        ser = BulkReturnRequestSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+
+        try:
+            result = return_items(item_codes=ser.validated_data["item_codes"], return_checked_by=request.user)
+        except ValueError as e:
+            return fail(str(e), status=409)
+
+        return ok({
+            "loans": LoanSerializer(result["loans"], many=True).data,
+            "returned_count": len(result["loans"]),
+            "no_active_loan": result["no_active_loan"],
+        }, message="Returned")
+
     @action(detail=False, methods=["get"], url_path="my")
     def my_loans(self, request):
         qs = Loan.objects.select_related("item").filter(borrowed_by=request.user).order_by("-borrowed_at")
@@ -83,7 +127,9 @@ class LoanViewSet(ViewSet):
 class NotificationViewSet(ViewSet):
     """
     - GET  /api/library/notifications/my/
+    - GET  /api/library/notifications/unread-count/   (Redis, pas de requête DB à chaud)
     - POST /api/library/notifications/mark-read/
+    - WS   /ws/notifications/?token=<JWT>             (push temps réel)
     """
     permission_classes = [IsAuthenticated]
 
@@ -92,19 +138,19 @@ class NotificationViewSet(ViewSet):
         qs = Notification.objects.filter(user=request.user).order_by("-created_at")[:200]
         return ok(NotificationSerializer(qs, many=True).data)
 
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return ok({"unread": get_unread_count(request.user.id)})
+
     @action(detail=False, methods=["post"], url_path="mark-read")
     def mark_read(self, request):
         ser = MarkNotificationReadSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         nid = ser.validated_data["notification_id"]
 
-        try:
-            n = Notification.objects.get(id=nid, user=request.user)
-            n.is_read = True
-            n.save(update_fields=["is_read"])
-            return ok({"notification_id": n.id, "is_read": True}, message="Marked as read")
-        except Notification.DoesNotExist:
+        if not mark_notification_read(request.user.id, nid):
             return fail("Notification not found", status=404)
+        return ok({"notification_id": nid, "is_read": True}, message="Marked as read")
 
 
 class ReminderViewSet(ViewSet):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SpeechesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.abc_apps.speeches'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.abc_apps.speeches.services.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Speech.likes_count / comments_count from likes and comments (safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--speech-id", type=int, action="append", dest="speech_ids",
+                            help="Only reconcile these speeches (repeatable)")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Reconciling speech counters..."))
+        fixed = reconcile_counters(options.get("speech_ids"))
+        self.stdout.write(self.style.SUCCESS(f"Done. {fixed} speech(es) corrected."))
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Speech = apps.get_model('speeches', 'Speech')
+    SpeechLike = apps.get_model('speeches', 'SpeechLike')
+    SpeechComment = apps.get_model('speeches', 'SpeechComment')
+
+    def count_of(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(speech_id=OuterRef('pk')).order_by()
+                .values('speech_id').annotate(c=Count('id')).values('c')[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    Speech.objects.update(likes_count=count_of(SpeechLike), comments_count=count_of(SpeechComment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0003_speech_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='speech',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='speech',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='speech',
+            index=models.Index(fields=['status', '-likes_count', '-comments_count', '-published_at'], name='speech_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:05
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('speeches', '0004_speech_likes_count_speech_comments_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='speechaudio',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=60),
+        ),
+        migrations.AddField(
+            model_name='speechaudio',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='speechaudio',
+            name='size_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='speechaudio',
+            name='waveform',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='SpeechAudioUpload',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('student_recording', 'Student recording'), ('teacher_coaching', 'Teacher coaching audio'), ('tts', 'Text to speech')], max_length=20)),
+                ('filename', models.CharField(max_length=160)),
+                ('content_type', models.CharField(blank=True, max_length=60)),
+                ('total_size', models.PositiveIntegerField()),
+                ('received_bytes', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('completed', 'Completed'), ('expired', 'Expired')], default='uploading', max_length=12)),
+                ('is_primary', models.BooleanField(default=False)),
+                ('audio', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='speeches.speechaudio')),
+                ('speech', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_uploads', to='speeches.speech')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speech_audio_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='speeches_sp_status_5b1f0e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # GIN / tsvector: PostgreSQL uniquement (sqlite en local: pas d'index)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "speech_search_gin" ON "speeches_speech" USING gin ("search_vector")'
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "speech_search_gin"')
+
+
+def backfill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef, Subquery, Value
+    from django.db.models.functions import Coalesce
+
+    Speech = apps.get_model('speeches', 'Speech')
+    SpeechRevision = apps.get_model('speeches', 'SpeechRevision')
+
+    final_revision = Coalesce(
+        Subquery(
+            SpeechRevision.objects.filter(speech_id=OuterRef('pk'), is_final=True)
+            .order_by('-version').values('revised_content')[:1]
+        ),
+        Value(''),
+    )
+    Speech.objects.update(
+        search_vector=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('raw_content', weight='B', config='english')
+            + SearchVector(final_revision, weight='B', config='english')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0005_speechaudio_processing_and_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='speech',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='speech',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='speech_search_gin'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_gin_index, drop_gin_index),
+            ],
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.27 on 2026-10-19 16:10
+
+import re
+from difflib import SequenceMatcher
+
+from django.db import migrations, models
+
+
+# Copie figée de l'encodage (services/revisions.py au moment de la migration):
+# la migration ne dépend pas du code vivant.
+SNAPSHOT_EVERY = 5
+TOKEN_RE = re.compile(r"\s+|\S+")
+STORAGE_FIELDS = ['content_mode', 'revised_content', 'delta', 'content_length']
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text or "")
+
+
+def make_delta(base, target):
+    a, b = tokenize(base), tokenize(target)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if tag in ("delete", "replace"):
+            ops.append(["-", i2 - i1])
+        if tag in ("insert", "replace"):
+            ops.append(["+", "".join(b[j1:j2])])
+    return ops
+
+
+def apply_delta(base, ops):
+    tokens = tokenize(base)
+    out, pos = [], 0
+    for op, arg in ops:
+        if op == "=":
+            out.extend(tokens[pos:pos + arg])
+            pos += arg
+        elif op == "-":
+            pos += arg
+        else:
+            out.append(arg)
+    return "".join(out)
+
+
+def encode_chain(texts):
+    encoded = []
+    prev, since_snapshot = None, 0
+    for text, is_final in texts:
+        if prev is None or is_final or since_snapshot >= SNAPSHOT_EVERY - 1:
+            encoded.append({"content_mode": "full", "revised_content": text, "delta": None})
+            since_snapshot = 0
+        else:
+            encoded.append({"content_mode": "delta", "revised_content": "", "delta": make_delta(prev, text)})
+            since_snapshot += 1
+        encoded[-1]["content_length"] = len(text)
+        prev = text
+    return encoded
+
+
+def _chains(SpeechRevision):
+    speech_ids = SpeechRevision.objects.values_list('speech_id', flat=True).distinct().order_by()
+    for speech_id in speech_ids.iterator():
+        yield list(SpeechRevision.objects.filter(speech_id=speech_id).order_by('version'))
+
+
+def encode_existing_revisions(apps, schema_editor):
+    SpeechRevision = apps.get_model('speeches', 'SpeechRevision')
+    for revisions in _chains(SpeechRevision):
+        encoded = encode_chain([(r.revised_content, r.is_final) for r in revisions])
+        for rev, enc in zip(revisions, encoded):
+            for f in STORAGE_FIELDS:
+                setattr(rev, f, enc[f])
+        SpeechRevision.objects.bulk_update(revisions, STORAGE_FIELDS)
+
+
+def restore_full_revisions(apps, schema_editor):
+    # retour arrière: chaque version redevient un texte complet
+    SpeechRevision = apps.get_model('speeches', 'SpeechRevision')
+    for revisions in _chains(SpeechRevision):
+        prev = ""
+        for rev in revisions:
+            prev = rev.revised_content if rev.content_mode == 'full' else apply_delta(prev, rev.delta or [])
+            rev.revised_content = prev
+            rev.content_mode = 'full'
+            rev.delta = None
+        SpeechRevision.objects.bulk_update(revisions, ['revised_content', 'content_mode', 'delta'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0006_speech_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='speechrevision',
+            name='content_length',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='speechrevision',
+            name='content_mode',
+            field=models.CharField(choices=[('full', 'Full snapshot'), ('delta', 'Delta vs previous version')], default='full', max_length=5),
+        ),
+        migrations.AddField(
+            model_name='speechrevision',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='speechrevision',
+            name='revised_content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(encode_existing_revisions, restore_full_revisions),
+    ]
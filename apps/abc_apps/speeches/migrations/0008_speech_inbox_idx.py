@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-19 16:45
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0007_speechrevision_delta_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='speech',
+            index=models.Index(
+                django.db.models.expressions.F('period'),
+                django.db.models.expressions.F('group'),
+                django.db.models.expressions.OrderBy(django.db.models.expressions.F('submitted_at'), descending=True, nulls_last=True),
+                django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True),
+                name='speech_inbox_idx',
+            ),
+        ),
+    ]
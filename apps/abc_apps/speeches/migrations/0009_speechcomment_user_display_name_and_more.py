@@ -0,0 +1,39 @@
+# Generated by Django 4.2.27 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+def backfill_display_names(apps, schema_editor):
+    SpeechComment = apps.get_model('speeches', 'SpeechComment')
+
+    batch = []
+    rows = SpeechComment.objects.values('id', 'user__first_name', 'user__last_name')
+    for row in rows.iterator(chunk_size=2000):
+        # jamais l'email: le fil de commentaires est public
+        name = f"{row['user__first_name'] or ''} {row['user__last_name'] or ''}".strip()
+        batch.append(SpeechComment(id=row['id'], user_display_name=name[:150]))
+        if len(batch) >= 2000:
+            SpeechComment.objects.bulk_update(batch, ['user_display_name'])
+            batch = []
+    if batch:
+        SpeechComment.objects.bulk_update(batch, ['user_display_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0008_speech_inbox_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='speechcomment',
+            name='user_display_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='speechcomment',
+            index=models.Index(fields=['speech', 'is_hidden', '-created_at', '-id'], name='speech_comment_thread_idx'),
+        ),
+        migrations.RunPython(backfill_display_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def scrub_email_display_names(apps, schema_editor):
+    # 0009 a pu copier l'email comme nom affiché (users sans nom): le fil est public
+    SpeechComment = apps.get_model('speeches', 'SpeechComment')
+    SpeechComment.objects.filter(user_display_name=F('user__email')).exclude(user_display_name='').update(
+        user_display_name=''
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speeches', '0009_speechcomment_user_display_name_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(scrub_email_display_names, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 # apps/abc_apps/speeches/models.py
 from __future__ import annotations
+import uuid
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
 from apps.abc_apps.commons.models import TimeStampedModel, month_validator
@@ -70,12 +75,30 @@ class Speech(TimeStampedModel):
     published_at = models.DateTimeField(null=True, blank=True)
     is_deleted = models.BooleanField(default=False)
 
+    # ✅ compteurs dénormalisés (maintenus par like/comment, cf. services/counters.py)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # ✅ full-text (titre + contenu + révision finale), cf. services/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=["period", "group", "status"]),
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["category", "status"]),
             models.Index(fields=["period", "category"]),
+            # ✅ feed "popular"
+            models.Index(
+                fields=["status", "-likes_count", "-comments_count", "-published_at"],
+                name="speech_popular_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="speech_search_gin"),
+            # ✅ inbox teacher: keyset (submitted_at, id) par groupe
+            models.Index(
+                F("period"), F("group"), F("submitted_at").desc(nulls_last=True), F("id").desc(),
+                name="speech_inbox_idx",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -83,10 +106,16 @@ class Speech(TimeStampedModel):
 
 
 class SpeechRevision(TimeStampedModel):
+    CONTENT_MODE = [("full", "Full snapshot"), ("delta", "Delta vs previous version")]
+
     speech = models.ForeignKey(Speech, on_delete=models.CASCADE, related_name="revisions")
     version = models.PositiveSmallIntegerField(default=1)
     revised_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    revised_content = models.TextField()
+    # ✅ texte complet seulement si content_mode="full", sinon delta (cf. services/revisions.py)
+    revised_content = models.TextField(blank=True)
+    content_mode = models.CharField(max_length=5, choices=CONTENT_MODE, default="full")
+    delta = models.JSONField(null=True, blank=True)
+    content_length = models.PositiveIntegerField(default=0)
     notes = models.TextField(blank=True)
     is_final = models.BooleanField(default=False)
 
@@ -109,6 +138,12 @@ class SpeechAudio(TimeStampedModel):
         ("teacher_coaching", "Teacher coaching audio"),
         ("tts", "Text to speech"),
     ]
+    PROCESSING_STATUS = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
     speech = models.ForeignKey(Speech, on_delete=models.CASCADE, related_name="audios")
     kind = models.CharField(max_length=20, choices=KIND)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
@@ -119,10 +154,42 @@ class SpeechAudio(TimeStampedModel):
     voice_name = models.CharField(max_length=60, blank=True)
     is_primary = models.BooleanField(default=False)
 
+    # ✅ transcodage en tâche de fond (services/audio.py)
+    processing_status = models.CharField(max_length=12, choices=PROCESSING_STATUS, default="ready")
+    content_type = models.CharField(max_length=60, blank=True)
+    size_bytes = models.PositiveIntegerField(null=True, blank=True)
+    waveform = models.JSONField(default=list, blank=True)  # pics 0..100 pour l'aperçu
+
     class Meta:
         indexes = [models.Index(fields=["speech", "kind", "created_at"])]
 
 
+class SpeechAudioUpload(TimeStampedModel):
+    """
+    Session d'upload par morceaux (reprise possible après coupure réseau):
+    le fichier est assemblé sur disque puis attaché à un SpeechAudio au finalize.
+    """
+    STATUS = [
+        ("uploading", "Uploading"),
+        ("completed", "Completed"),
+        ("expired", "Expired"),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    speech = models.ForeignKey(Speech, on_delete=models.CASCADE, related_name="audio_uploads")
+    kind = models.CharField(max_length=20, choices=SpeechAudio.KIND)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="speech_audio_uploads")
+    filename = models.CharField(max_length=160)
+    content_type = models.CharField(max_length=60, blank=True)
+    total_size = models.PositiveIntegerField()
+    received_bytes = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=STATUS, default="uploading")
+    is_primary = models.BooleanField(default=False)
+    audio = models.OneToOneField(SpeechAudio, on_delete=models.SET_NULL, null=True, blank=True, related_name="upload")
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+
 class SpeechApproval(TimeStampedModel):
     DECISION = [("approve", "Approve"), ("reject", "Reject")]
     speech = models.OneToOneField(Speech, on_delete=models.CASCADE, related_name="approval")
@@ -142,9 +209,22 @@ class SpeechLike(TimeStampedModel):
 class SpeechComment(TimeStampedModel):
     speech = models.ForeignKey(Speech, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="speech_comments")
+    # ✅ nom affiché figé à l'écriture: pas de JOIN user pour lire un fil
+    user_display_name = models.CharField(max_length=150, blank=True)
     content = models.TextField()
     is_hidden = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # fil de commentaires: keyset (created_at, id) des visibles d'un speech
+            models.Index(fields=["speech", "is_hidden", "-created_at", "-id"], name="speech_comment_thread_idx"),
+        ]
+
+    @staticmethod
+    def display_name_for(user) -> str:
+        # jamais l'email: user_name est servi en AllowAny sur le fil public
+        return (user.get_full_name() or "").strip()[:150]
+
 
 class SpeechShare(TimeStampedModel):
     speech = models.ForeignKey(Speech, on_delete=models.CASCADE, related_name="shares")
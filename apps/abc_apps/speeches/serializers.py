@@ -5,8 +5,20 @@ from rest_framework import serializers
 
 from apps.abc_apps.speeches.models import (
     Speech, SpeechRevision, SpeechCoaching, SpeechAudio,
-    SpeechApproval, SpeechComment
+    SpeechApproval, SpeechComment, SpeechAudioUpload,
 )
+from apps.abc_apps.speeches.services.audio import UPLOAD_CHUNK_SIZE
+from apps.abc_apps.speeches.services.revisions import revision_texts
+
+def speech_author_name(obj):
+    if obj.author_type == "student" and obj.student and getattr(obj.student, "user", None):
+        u = obj.student.user
+        return f"{u.first_name} {u.last_name}".strip() or u.email
+    if obj.author_type == "teacher" and obj.teacher and getattr(obj.teacher, "user", None):
+        u = obj.teacher.user
+        return f"{u.first_name} {u.last_name}".strip() or u.email
+    return None
+
 
 class SpeechAudioSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
@@ -19,6 +31,7 @@ class SpeechAudioSerializer(serializers.ModelSerializer):
             "id", "kind", "url", "duration_sec", "created_at",
             "engine", "voice_name", "is_primary",
             "uploaded_by_id", "uploaded_by_name",
+            "processing_status", "content_type", "size_bytes", "waveform",
         ]
 
     def get_uploaded_by_name(self, obj):
@@ -35,13 +48,61 @@ class SpeechAudioSerializer(serializers.ModelSerializer):
         return request.build_absolute_uri(url) if request else url
 
 
+class SpeechAudioUploadSerializer(serializers.ModelSerializer):
+    speech_id = serializers.IntegerField(read_only=True)
+    audio_id = serializers.IntegerField(read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SpeechAudioUpload
+        fields = [
+            "id", "speech_id", "kind", "filename", "content_type",
+            "total_size", "received_bytes", "chunk_size", "status", "audio_id",
+            "created_at", "updated_at",
+        ]
+
+    def get_chunk_size(self, obj):
+        return UPLOAD_CHUNK_SIZE
+
+
 class SpeechRevisionSerializer(serializers.ModelSerializer):
+    """
+    Métadonnées seulement par défaut; le texte (reconstruit depuis les deltas)
+    si context["include_revision_content"] ou ?include_revision_content=1.
+    """
     revised_by_name = serializers.SerializerMethodField()
     revised_by_id = serializers.IntegerField( read_only=True)
+    revised_content = serializers.SerializerMethodField()
 
     class Meta:
         model = SpeechRevision
-        fields = ["id", "version", "revised_by_id", "revised_content", "notes", "is_final", "revised_by_name", "created_at"]
+        fields = [
+            "id", "version", "revised_by_id", "revised_content", "content_length",
+            "notes", "is_final", "revised_by_name", "created_at",
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._include_content():
+            fields.pop("revised_content")
+        return fields
+
+    def _include_content(self):
+        if self.context.get("include_revision_content"):
+            return True
+        request = self.context.get("request")
+        flag = request.query_params.get("include_revision_content") if request is not None else None
+        return flag in ("1", "true")
+
+    def get_revised_content(self, obj):
+        text = getattr(obj, "text", None)  # posé par services/revisions.py à l'écriture
+        if text is not None:
+            return text
+        # 1 reconstruction par speech, partagée entre ses revisions
+        cache = self.context.setdefault("_revision_texts", {})
+        if obj.speech_id not in cache:
+            cache[obj.speech_id] = revision_texts(obj.speech_id)
+        return cache[obj.speech_id].get(obj.version, "")
 
     def get_revised_by_name(self, obj):
         u = obj.revised_by
@@ -118,13 +179,42 @@ class SpeechSerializer(serializers.ModelSerializer):
         return v
 
     def get_author_name(self, obj):
-        if obj.author_type == "student" and obj.student and getattr(obj.student, "user", None):
-            u = obj.student.user
-            return f"{u.first_name} {u.last_name}".strip() or u.email
-        if obj.author_type == "teacher" and obj.teacher and getattr(obj.teacher, "user", None):
-            u = obj.teacher.user
-            return f"{u.first_name} {u.last_name}".strip() or u.email
-        return None
+        return speech_author_name(obj)
+
+
+class SpeechListSerializer(SpeechSerializer):
+    """
+    Feeds (feed / month / latest / popular): pas de revisions / coachings imbriqués.
+    Le détail (retrieve) garde SpeechSerializer.
+    """
+    revisions = None
+    coachings = None
+
+    class Meta(SpeechSerializer.Meta):
+        fields = [f for f in SpeechSerializer.Meta.fields if f not in ("revisions", "coachings")]
+
+
+class SpeechInboxItemSerializer(serializers.ModelSerializer):
+    """
+    Inbox teacher: 1 ligne par speech, sans audios / revisions / coachings.
+    """
+    group_label = serializers.CharField(source="group.label", read_only=True)
+    level_label = serializers.CharField(source="group.level.label", read_only=True)
+    author_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Speech
+        fields = [
+            "id", "title", "category", "status", "visibility",
+            "student", "author_name",
+            "group", "group_label", "level_label",
+            "likes_count", "comments_count",
+            "submitted_at", "created_at", "updated_at",
+        ]
+        read_only_fields = fields
+
+    def get_author_name(self, obj):
+        return speech_author_name(obj)
 
 
 class SpeechApprovalSerializer(serializers.ModelSerializer):
@@ -135,16 +225,14 @@ class SpeechApprovalSerializer(serializers.ModelSerializer):
 
 
 class SpeechCommentSerializer(serializers.ModelSerializer):
-    user_name = serializers.SerializerMethodField()
+    # snapshot écrit à la création (pas de get_full_name() par ligne)
+    user_name = serializers.CharField(source="user_display_name", read_only=True)
 
     class Meta:
         model = SpeechComment
         fields = ["id", "speech", "user", "user_name", "content", "is_hidden", "created_at"]
         read_only_fields = ["user", "is_hidden"]
 
-    def get_user_name(self, obj):
-        return obj.user.get_full_name() if obj.user_id else ""
-
 # Petite réponse pour actions
 class SimpleMessageSerializer(serializers.Serializer):
     message = serializers.CharField()
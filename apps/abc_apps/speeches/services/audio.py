@@ -0,0 +1,322 @@
+# =========================
+# apps/speeches/services/audio.py
+# =========================
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from array import array
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abc_apps.speeches.models import SpeechAudio, SpeechAudioUpload
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024          # taille conseillée au client
+UPLOAD_MAX_CHUNK_SIZE = 5 * 1024 * 1024  # au-delà: 413
+UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+UPLOAD_EXPIRE_AFTER = timedelta(hours=24)
+UPLOAD_COPY_BLOCK = 64 * 1024
+
+# voix: mono AAC 48 kbps (~360 Ko/min), lisible partout (iOS / Android / web)
+TRANSCODE_EXT = "m4a"
+TRANSCODE_CONTENT_TYPE = "audio/mp4"
+TRANSCODE_ARGS = ["-vn", "-ac", "1", "-ar", "22050", "-c:a", "aac", "-b:a", "48k", "-movflags", "+faststart"]
+FFMPEG_TIMEOUT = 5 * 60
+
+WAVEFORM_POINTS = 100
+WAVEFORM_SAMPLE_RATE = 2000  # suffisant pour des pics d'amplitude
+
+
+class UploadOffsetMismatch(ValueError):
+    """
+    Le client n'envoie pas le morceau attendu (reprise après coupure,
+    ou 2 envois concurrents): il doit reprendre à expected_offset.
+    """
+    def __init__(self, expected_offset: int):
+        super().__init__(f"Expected offset {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+def upload_part_path(upload: SpeechAudioUpload) -> str:
+    return os.path.join(settings.MEDIA_ROOT, "speeches", "uploads", f"{upload.id}.part")
+
+
+# ─────────────────────────────────────────────
+# Chunked upload
+# ─────────────────────────────────────────────
+def start_upload(*, speech, user, kind: str, filename: str, content_type: str, total_size: int, is_primary=False) -> SpeechAudioUpload:
+    if total_size <= 0:
+        raise ValueError("total_size must be > 0")
+    if total_size > UPLOAD_MAX_SIZE:
+        raise ValueError(f"File too large (max {UPLOAD_MAX_SIZE // (1024 * 1024)} MB)")
+    if content_type and not content_type.startswith("audio/"):
+        raise ValueError("content_type must be audio/*")
+
+    upload = SpeechAudioUpload.objects.create(
+        speech=speech,
+        kind=kind,
+        uploaded_by=user,
+        filename=os.path.basename(filename or "recording")[:160],
+        content_type=content_type or "",
+        total_size=total_size,
+        is_primary=is_primary,
+    )
+    path = upload_part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return upload
+
+
+def write_chunk(upload: SpeechAudioUpload, offset: int, stream, length: int) -> int:
+    """
+    Écrit [offset, offset+length) depuis stream (lu par blocs, jamais en mémoire entière).
+    Les morceaux sont séquentiels: offset doit valoir received_bytes.
+    Retourne le nouveau received_bytes.
+    """
+    if upload.status != "uploading":
+        raise ValueError("Upload is not open")
+    if length <= 0 or length > UPLOAD_MAX_CHUNK_SIZE:
+        raise ValueError(f"Chunk size must be between 1 and {UPLOAD_MAX_CHUNK_SIZE} bytes")
+    if offset != upload.received_bytes:
+        raise UploadOffsetMismatch(upload.received_bytes)
+    if offset + length > upload.total_size:
+        raise ValueError("Chunk exceeds total_size")
+
+    written = 0
+    with open(upload_part_path(upload), "r+b") as out:
+        out.seek(offset)
+        while written < length:
+            block = stream.read(min(UPLOAD_COPY_BLOCK, length - written))
+            if not block:
+                break
+            out.write(block)
+            written += len(block)
+        out.truncate(offset + written)
+
+    if written != length:
+        raise ValueError("Incomplete chunk, please resend")
+
+    # ✅ conditional UPDATE: un seul des envois concurrents du même morceau avance l'offset
+    updated = SpeechAudioUpload.objects.filter(
+        pk=upload.pk, status="uploading", received_bytes=offset,
+    ).update(received_bytes=offset + length, updated_at=timezone.now())
+    if not updated:
+        upload.refresh_from_db(fields=["received_bytes"])
+        raise UploadOffsetMismatch(upload.received_bytes)
+
+    upload.received_bytes = offset + length
+    return upload.received_bytes
+
+
+@transaction.atomic
+def finalize_upload(upload: SpeechAudioUpload) -> SpeechAudio:
+    """
+    Toutes les données reçues -> SpeechAudio "pending" (sans fichier),
+    le worker media transcode directement depuis le .part.
+    """
+    upload = SpeechAudioUpload.objects.select_for_update().get(pk=upload.pk)
+    if upload.status == "completed" and upload.audio_id:
+        return upload.audio  # finalize rejoué par le client
+    if upload.status != "uploading":
+        raise ValueError("Upload is not open")
+    if upload.received_bytes != upload.total_size:
+        raise UploadOffsetMismatch(upload.received_bytes)
+
+    audio = SpeechAudio.objects.create(
+        speech=upload.speech,
+        kind=upload.kind,
+        uploaded_by=upload.uploaded_by,
+        is_primary=upload.is_primary,
+        processing_status="pending",
+        content_type=upload.content_type,
+        size_bytes=upload.total_size,
+    )
+    upload.status = "completed"
+    upload.audio = audio
+    upload.save(update_fields=["status", "audio", "updated_at"])
+
+    enqueue_processing(audio.id)
+    return audio
+
+
+def enqueue_processing(audio_id: int) -> None:
+    from apps.abc_apps.speeches.tasks import process_speech_audio
+    transaction.on_commit(lambda: process_speech_audio.delay(audio_id))
+
+
+def expire_stale_uploads(now=None) -> int:
+    """
+    Sessions abandonnées (> UPLOAD_EXPIRE_AFTER sans morceau): supprime les .part.
+    """
+    now = now or timezone.now()
+    stale = list(
+        SpeechAudioUpload.objects
+        .filter(status="uploading", updated_at__lt=now - UPLOAD_EXPIRE_AFTER)
+        .only("id")
+    )
+    for upload in stale:
+        try:
+            os.remove(upload_part_path(upload))
+        except FileNotFoundError:
+            pass
+    SpeechAudioUpload.objects.filter(id__in=[u.id for u in stale]).update(status="expired", updated_at=now)
+    return len(stale)
+
+
+# ─────────────────────────────────────────────
+# Transcodage (ffmpeg) + durée + waveform
+# ─────────────────────────────────────────────
+def _run(args: List[str], **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(args, check=True, capture_output=True, timeout=FFMPEG_TIMEOUT, **kwargs)
+
+
+def probe_duration(path: str) -> int:
+    out = _run([
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", path,
+    ]).stdout.decode().strip()
+    return int(round(float(out))) if out and out != "N/A" else 0
+
+
+def compute_waveform(path: str, points: int = WAVEFORM_POINTS) -> List[int]:
+    """
+    Décode en PCM 16 bits mono basse fréquence, puis 1 pic (0..100) par tranche.
+    """
+    pcm = _run([
+        "ffmpeg", "-v", "error", "-i", path,
+        "-ac", "1", "-ar", str(WAVEFORM_SAMPLE_RATE), "-f", "s16le", "-",
+    ]).stdout
+    samples = array("h")
+    samples.frombytes(pcm[: len(pcm) - len(pcm) % 2])
+    if not samples:
+        return []
+
+    step = max(len(samples) // points, 1)
+    peaks = [
+        max(abs(min(samples[i:i + step])), abs(max(samples[i:i + step])))
+        for i in range(0, step * min(points, len(samples)), step)
+    ]
+    top = max(peaks) or 1
+    return [round(p * 100 / top) for p in peaks]
+
+
+def _copy_source(audio: SpeechAudio, upload, dest: str) -> None:
+    """
+    Source à transcoder: le .part (upload par morceaux) ou le fichier déjà stocké.
+    """
+    if upload and os.path.exists(upload_part_path(upload)):
+        shutil.copyfile(upload_part_path(upload), dest)
+        return
+    with audio.audio_file.open("rb") as src, open(dest, "wb") as out:
+        shutil.copyfileobj(src, out, UPLOAD_COPY_BLOCK)
+
+
+def mark_audio_failed(audio_id: int) -> None:
+    """
+    Échec définitif: status "failed", le .part devient le fichier (s'il n'y en a pas) puis est supprimé.
+    """
+    audio = SpeechAudio.objects.filter(pk=audio_id).first()
+    if not audio:
+        return
+    upload = SpeechAudioUpload.objects.filter(audio=audio).first()
+    part = upload_part_path(upload) if upload else None
+
+    fields = ["processing_status", "updated_at"]
+    if part and not audio.audio_file and os.path.exists(part):
+        try:
+            with open(part, "rb") as fh:
+                audio.audio_file.save(upload.filename, File(fh), save=False)
+            fields.append("audio_file")
+        except OSError:
+            logger.exception("speech audio %s: could not keep the uploaded file", audio_id)
+    audio.processing_status = "failed"
+    audio.save(update_fields=fields)
+
+    # fichier stocké -> le .part ne sert plus (sinon on le garde: seule copie de l'enregistrement)
+    if part and audio.audio_file:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+
+
+def process_audio(audio_id: int) -> str:
+    """
+    Normalise un enregistrement (mono AAC 48k, faststart pour le seek),
+    calcule la vraie durée et la waveform. Remplace le fichier original.
+    En cas d'échec ffmpeg: le fichier original est gardé (lisible), status "failed".
+    Jamais laissé en "processing": OSError -> "pending" (retry de la tâche), autre erreur -> "failed".
+    """
+    updated = SpeechAudio.objects.filter(
+        pk=audio_id, processing_status__in=["pending", "failed"],
+    ).update(processing_status="processing")
+    if not updated:
+        return "skipped"
+
+    try:
+        return _process_claimed(audio_id)
+    except OSError:
+        # stockage / disque momentanément indisponible: le .part est gardé pour le retry
+        SpeechAudio.objects.filter(pk=audio_id, processing_status="processing").update(
+            processing_status="pending", updated_at=timezone.now(),
+        )
+        raise
+    except Exception:
+        logger.exception("speech audio %s processing failed", audio_id)
+        mark_audio_failed(audio_id)
+        return "failed"
+
+
+def _process_claimed(audio_id: int) -> str:
+    audio = SpeechAudio.objects.get(pk=audio_id)
+    upload = SpeechAudioUpload.objects.filter(audio=audio).first()
+    old_name = audio.audio_file.name if audio.audio_file else ""
+    base = os.path.splitext(os.path.basename(old_name or (upload.filename if upload else "recording")))[0]
+
+    workdir = tempfile.mkdtemp(prefix="speech-audio-")
+    try:
+        src = os.path.join(workdir, "source")
+        dst = os.path.join(workdir, f"audio.{TRANSCODE_EXT}")
+        _copy_source(audio, upload, src)
+
+        try:
+            _run(["ffmpeg", "-v", "error", "-y", "-i", src, *TRANSCODE_ARGS, dst])
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+            logger.warning("speech audio %s transcode failed: %s", audio_id, getattr(e, "stderr", e))
+            if not audio.audio_file:
+                with open(src, "rb") as fh:
+                    audio.audio_file.save(upload.filename if upload else "recording", File(fh), save=False)
+            audio.processing_status = "failed"
+            audio.save(update_fields=["audio_file", "processing_status", "updated_at"])
+            return "failed"
+
+        with open(dst, "rb") as fh:
+            audio.audio_file.save(f"{base}.{TRANSCODE_EXT}", File(fh), save=False)
+        audio.duration_sec = probe_duration(dst)
+        audio.waveform = compute_waveform(dst)
+        audio.content_type = TRANSCODE_CONTENT_TYPE
+        audio.size_bytes = os.path.getsize(dst)
+        audio.processing_status = "ready"
+        audio.save(update_fields=[
+            "audio_file", "duration_sec", "waveform", "content_type",
+            "size_bytes", "processing_status", "updated_at",
+        ])
+
+        if old_name and old_name != audio.audio_file.name:
+            audio.audio_file.storage.delete(old_name)
+        return "ready"
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if upload and audio.processing_status in ("ready", "failed"):
+            try:
+                os.remove(upload_part_path(upload))
+            except FileNotFoundError:
+                pass
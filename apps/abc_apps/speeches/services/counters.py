@@ -0,0 +1,54 @@
+# =========================
+# apps/speeches/services/counters.py
+# =========================
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.abc_apps.speeches.models import Speech, SpeechComment, SpeechLike
+
+
+def bump_likes(speech_id: int, delta: int) -> None:
+    # UPDATE atomique (pas de read-modify-write)
+    Speech.objects.filter(pk=speech_id).update(likes_count=Greatest(F("likes_count") + delta, 0))
+
+
+def bump_comments(speech_id: int, delta: int) -> None:
+    Speech.objects.filter(pk=speech_id).update(comments_count=Greatest(F("comments_count") + delta, 0))
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(speech_id=OuterRef("pk"))
+            .order_by()
+            .values("speech_id")
+            .annotate(c=Count("id"))
+            .values("c")[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def reconcile_counters(speech_ids=None) -> int:
+    """
+    Recalcule likes_count / comments_count depuis les tables sociales
+    (1 UPDATE ... SET = (SELECT COUNT ...)). Retourne le nombre de speeches corrigés.
+    """
+    qs = Speech.objects.all()
+    if speech_ids is not None:
+        qs = qs.filter(pk__in=speech_ids)
+
+    qs = qs.annotate(
+        real_likes=count_subquery(SpeechLike),
+        real_comments=count_subquery(SpeechComment),
+    ).exclude(likes_count=F("real_likes"), comments_count=F("real_comments"))
+
+    drifted = list(qs.values_list("pk", flat=True))
+    if drifted:
+        Speech.objects.filter(pk__in=drifted).update(
+            likes_count=count_subquery(SpeechLike),
+            comments_count=count_subquery(SpeechComment),
+        )
+    return len(drifted)
@@ -0,0 +1,149 @@
+# =========================
+# apps/speeches/services/ranking.py
+# =========================
+import heapq
+import logging
+import math
+from collections import defaultdict
+from operator import itemgetter
+from typing import Iterable, List, Optional
+
+from django.utils import timezone
+
+from apps.abc_apps.commons.redis_client import get_redis
+from apps.abc_apps.speeches.models import Speech, SpeechShare
+from apps.abc_apps.speeches.services.counters import count_subquery
+
+logger = logging.getLogger(__name__)
+
+POPULAR_KEY_PREFIX = "speeches:popular"
+POPULAR_SCOPES_KEY = f"{POPULAR_KEY_PREFIX}:scopes"
+POPULAR_MAX_RANKED = 1000        # top N gardés par scope
+POPULAR_KEY_TTL = 60 * 60        # si le job s'arrête: clés expirées -> fallback DB
+POPULAR_USER_UNION_TTL = 60      # union public/school/class d'un user (pagination stable)
+
+# score = (likes + 2*comments + 3*shares + 1) / (age_h + 2) ^ gravity
+WEIGHT_LIKE = 1.0
+WEIGHT_COMMENT = 2.0
+WEIGHT_SHARE = 3.0
+GRAVITY = 1.5
+
+SCOPE_PUBLIC = "public"
+SCOPE_SCHOOL = "school"
+SCOPE_CLASS_ALL = "class:all"
+
+
+def class_scope(group_id: int) -> str:
+    return f"class:{group_id}"
+
+
+def scope_key(scope: str) -> str:
+    return f"{POPULAR_KEY_PREFIX}:{scope}"
+
+
+def popularity_score(likes: int, comments: int, shares: int, published_at, now) -> float:
+    age_hours = max((now - published_at).total_seconds() / 3600.0, 0.0)
+    points = likes * WEIGHT_LIKE + comments * WEIGHT_COMMENT + shares * WEIGHT_SHARE + 1.0
+    return points / math.pow(age_hours + 2.0, GRAVITY)
+
+
+def rebuild_popular_rankings(now=None) -> dict:
+    """
+    Job périodique: recalcule le score décroissant de chaque speech publié
+    et réécrit 1 sorted set par scope de visibilité:
+    - public          : visibility=public (anonymes)
+    - school          : public + school (connectés)
+    - class:<group>   : visibility=class par groupe
+    - class:all       : toutes les class (admin / principal)
+    Chaque set est écrit dans une clé temporaire puis RENAME (atomique).
+    """
+    r = get_redis()
+    if r is None:
+        return {"ranked": 0, "scopes": 0}
+
+    now = now or timezone.now()
+
+    rows = (
+        Speech.objects
+        .filter(status="published", is_deleted=False)
+        .annotate(shares_count=count_subquery(SpeechShare))
+        .values_list(
+            "id", "visibility", "group_id",
+            "likes_count", "comments_count", "shares_count",
+            "published_at", "created_at",
+        )
+        .iterator(chunk_size=2000)
+    )
+
+    scopes = defaultdict(dict)
+    scopes[SCOPE_PUBLIC] = {}
+    scopes[SCOPE_SCHOOL] = {}
+
+    ranked = 0
+    for pk, visibility, group_id, likes, comments, shares, published_at, created_at in rows:
+        score = popularity_score(likes, comments, shares or 0, published_at or created_at, now)
+        ranked += 1
+
+        if visibility == "public":
+            scopes[SCOPE_PUBLIC][pk] = score
+            scopes[SCOPE_SCHOOL][pk] = score
+        elif visibility == "school":
+            scopes[SCOPE_SCHOOL][pk] = score
+        elif visibility == "class":
+            scopes[SCOPE_CLASS_ALL][pk] = score
+            if group_id:
+                scopes[class_scope(group_id)][pk] = score
+
+    new_keys = {scope_key(s) for s in scopes}
+    old_keys = set(r.smembers(POPULAR_SCOPES_KEY) or [])
+
+    pipe = r.pipeline(transaction=True)
+    for scope, members in scopes.items():
+        key = scope_key(scope)
+        top = dict(heapq.nlargest(POPULAR_MAX_RANKED, members.items(), key=itemgetter(1)))
+        if not top:
+            # sorted set vide = clé absente (ZREVRANGE renvoie [])
+            pipe.delete(key)
+            continue
+        tmp = f"{key}:tmp"
+        pipe.delete(tmp)
+        pipe.zadd(tmp, top)
+        pipe.rename(tmp, key)
+        pipe.expire(key, POPULAR_KEY_TTL)
+
+    for key in old_keys - new_keys:
+        pipe.delete(key)
+
+    pipe.delete(POPULAR_SCOPES_KEY)
+    pipe.sadd(POPULAR_SCOPES_KEY, *new_keys)
+    pipe.set(f"{POPULAR_KEY_PREFIX}:built_at", now.isoformat(), ex=POPULAR_KEY_TTL)
+    pipe.execute()
+
+    logger.info("popular rankings rebuilt speeches=%s scopes=%s", ranked, len(scopes))
+    return {"ranked": ranked, "scopes": len(scopes)}
+
+
+def read_popular_ids(scopes: Iterable[str], offset: int, limit: int, cache_owner: Optional[str] = None) -> Optional[List[int]]:
+    """
+    Retourne une page d'ids (meilleur score d'abord), ou None si le classement
+    n'est pas disponible (pas de Redis / job pas encore passé) -> fallback DB.
+    Plusieurs scopes: union (ZUNIONSTORE, max) mise en cache POPULAR_USER_UNION_TTL
+    sous cache_owner pour que les pages suivantes restent O(page).
+    """
+    r = get_redis()
+    if r is None or not r.exists(f"{POPULAR_KEY_PREFIX}:built_at"):
+        return None
+
+    keys = [scope_key(s) for s in scopes]
+    stop = offset + limit - 1
+
+    if len(keys) == 1:
+        return [int(x) for x in r.zrevrange(keys[0], offset, stop)]
+
+    union_key = f"{POPULAR_KEY_PREFIX}:union:{cache_owner or ','.join(sorted(keys))}"
+    if not r.exists(union_key):
+        pipe = r.pipeline(transaction=True)
+        pipe.zunionstore(union_key, keys, aggregate="MAX")
+        pipe.expire(union_key, POPULAR_USER_UNION_TTL)
+        pipe.execute()
+    return [int(x) for x in r.zrevrange(union_key, offset, stop)]
@@ -0,0 +1,229 @@
+# =========================
+# apps/speeches/services/revisions.py
+# =========================
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+from apps.abc_apps.speeches.models import Speech, SpeechRevision
+from apps.abc_apps.speeches.services.search import update_search_vector
+
+# au plus N-1 deltas entre 2 snapshots complets (reconstruction bornée)
+REVISION_SNAPSHOT_EVERY = 5
+
+# mots + espaces: "".join(tokens) == texte d'origine
+_TOKEN_RE = re.compile(r"\s+|\S+")
+
+REVISION_STORAGE_FIELDS = ["content_mode", "revised_content", "delta", "content_length"]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+# ─────────────────────────────────────────────
+# Delta (mots): ["=", n] garder n tokens, ["-", n] supprimer n, ["+", "texte"] insérer
+# ─────────────────────────────────────────────
+def make_delta(base: str, target: str) -> list:
+    a, b = tokenize(base), tokenize(target)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if tag in ("delete", "replace"):
+            ops.append(["-", i2 - i1])
+        if tag in ("insert", "replace"):
+            ops.append(["+", "".join(b[j1:j2])])
+    return ops
+
+
+def apply_delta(base: str, ops: list) -> str:
+    tokens = tokenize(base)
+    out, pos = [], 0
+    for op, arg in ops:
+        if op == "=":
+            out.extend(tokens[pos:pos + arg])
+            pos += arg
+        elif op == "-":
+            pos += arg
+        else:
+            out.append(arg)
+    return "".join(out)
+
+
+def readable_diff(base: str, target: str) -> List[dict]:
+    """
+    Pour l'API: segments {"op": equal|insert|delete, "text": ...}.
+    """
+    a, b = tokenize(base), tokenize(target)
+    out = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            out.append({"op": "equal", "text": "".join(a[i1:i2])})
+            continue
+        if tag in ("delete", "replace"):
+            out.append({"op": "delete", "text": "".join(a[i1:i2])})
+        if tag in ("insert", "replace"):
+            out.append({"op": "insert", "text": "".join(b[j1:j2])})
+    return out
+
+
+# ─────────────────────────────────────────────
+# Encodage d'une chaîne de versions
+# ─────────────────────────────────────────────
+def encode_chain(texts: List[Tuple[str, bool]]) -> List[dict]:
+    """
+    texts: [(texte complet, is_final)] par version croissante.
+    Snapshot complet: 1re version, version finale (lue telle quelle par la recherche),
+    ou après REVISION_SNAPSHOT_EVERY-1 deltas. Sinon delta vs version précédente.
+    """
+    encoded = []
+    prev, since_snapshot = None, 0
+    for text, is_final in texts:
+        if prev is None or is_final or since_snapshot >= REVISION_SNAPSHOT_EVERY - 1:
+            encoded.append({"content_mode": "full", "revised_content": text, "delta": None})
+            since_snapshot = 0
+        else:
+            encoded.append({"content_mode": "delta", "revised_content": "", "delta": make_delta(prev, text)})
+            since_snapshot += 1
+        encoded[-1]["content_length"] = len(text)
+        prev = text
+    return encoded
+
+
+def decode_rows(rows) -> Dict[int, str]:
+    """
+    rows: dicts/objets (version, content_mode, revised_content, delta) triés par version.
+    """
+    texts, prev = {}, ""
+    for row in rows:
+        get = row.get if isinstance(row, dict) else lambda f: getattr(row, f)
+        if get("content_mode") == "full":
+            prev = get("revised_content")
+        else:
+            prev = apply_delta(prev, get("delta") or [])
+        texts[get("version")] = prev
+    return texts
+
+
+def revision_texts(speech_id: int) -> Dict[int, str]:
+    """
+    {version: texte complet} pour un speech (1 requête).
+    """
+    rows = (
+        SpeechRevision.objects
+        .filter(speech_id=speech_id)
+        .order_by("version")
+        .values("version", "content_mode", "revised_content", "delta")
+    )
+    return decode_rows(rows)
+
+
+def revision_text(revision: SpeechRevision) -> str:
+    if revision.content_mode == "full":
+        return revision.revised_content
+    return revision_texts(revision.speech_id)[revision.version]
+
+
+def _reencode(speech_id: int, texts: Dict[int, str]) -> None:
+    """
+    Réécrit le stockage de toutes les versions après une modif / suppression
+    au milieu de la chaîne (seulement les lignes qui changent).
+    """
+    revisions = list(SpeechRevision.objects.filter(speech_id=speech_id).order_by("version"))
+    encoded = encode_chain([(texts[r.version], r.is_final) for r in revisions])
+
+    changed = []
+    for rev, enc in zip(revisions, encoded):
+        if any(getattr(rev, f) != enc[f] for f in REVISION_STORAGE_FIELDS):
+            for f in REVISION_STORAGE_FIELDS:
+                setattr(rev, f, enc[f])
+            changed.append(rev)
+    if changed:
+        SpeechRevision.objects.bulk_update(changed, REVISION_STORAGE_FIELDS)
+    update_search_vector([speech_id])
+
+
+# ─────────────────────────────────────────────
+# Écritures
+# ─────────────────────────────────────────────
+@transaction.atomic
+def create_revision(speech: Speech, revised_by, content: str, notes: str = "", is_final: bool = False) -> SpeechRevision:
+    # verrou sur le speech: numéros de version séquentiels même en concurrence
+    Speech.objects.select_for_update().filter(pk=speech.pk).first()
+
+    last = SpeechRevision.objects.filter(speech=speech).order_by("-version").first()
+
+    # nombre de deltas depuis le dernier snapshot
+    recent_modes = (
+        SpeechRevision.objects.filter(speech=speech)
+        .order_by("-version")
+        .values_list("content_mode", flat=True)[:REVISION_SNAPSHOT_EVERY]
+    )
+    since_snapshot = 0
+    for mode in recent_modes:
+        if mode == "full":
+            break
+        since_snapshot += 1
+
+    if last is None or is_final or since_snapshot >= REVISION_SNAPSHOT_EVERY - 1:
+        storage = {"content_mode": "full", "revised_content": content, "delta": None}
+    else:
+        storage = {"content_mode": "delta", "revised_content": "", "delta": make_delta(revision_text(last), content)}
+
+    rev = SpeechRevision.objects.create(
+        speech=speech,
+        version=(last.version + 1) if last else 1,
+        revised_by=revised_by,
+        notes=notes,
+        is_final=is_final,
+        content_length=len(content),
+        **storage,
+    )
+    rev.text = content
+    return rev
+
+
+@transaction.atomic
+def change_revision(rev: SpeechRevision, content: Optional[str] = None, notes: Optional[str] = None,
+                    is_final: Optional[bool] = None) -> SpeechRevision:
+    texts = revision_texts(rev.speech_id)
+
+    fields = []
+    if notes is not None:
+        rev.notes = notes
+        fields.append("notes")
+    if is_final is not None:
+        rev.is_final = is_final
+        fields.append("is_final")
+    if fields:
+        rev.save(update_fields=fields)
+
+    if content is not None:
+        texts[rev.version] = content
+    if content is not None or is_final is not None:
+        # texte modifié / snapshot final déplacé: versions suivantes ré-encodées
+        _reencode(rev.speech_id, texts)
+        rev.refresh_from_db(fields=REVISION_STORAGE_FIELDS)
+
+    rev.text = texts[rev.version]
+    return rev
+
+
+@transaction.atomic
+def remove_revision(rev: SpeechRevision) -> None:
+    texts = revision_texts(rev.speech_id)
+    speech_id = rev.speech_id
+    rev.delete()
+    texts.pop(rev.version, None)
+    _reencode(speech_id, texts)
+
+
+def diff_versions(speech_id: int, from_version: int, to_version: int) -> Optional[List[dict]]:
+    texts = revision_texts(speech_id)
+    if from_version not in texts or to_version not in texts:
+        return None
+    return readable_diff(texts[from_version], texts[to_version])
@@ -0,0 +1,72 @@
+# =========================
+# apps/speeches/services/search.py
+# =========================
+from typing import Iterable
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.abc_apps.speeches.models import Speech, SpeechRevision
+
+# speeches en anglais: stemming "english" (speaking -> speak)
+SEARCH_CONFIG = "english"
+SEARCH_MAX_QUERY_LENGTH = 200
+
+
+def search_enabled() -> bool:
+    # tsvector / GIN: PostgreSQL uniquement (sqlite en local -> icontains)
+    return connection.vendor == "postgresql"
+
+
+def _final_revision_content():
+    return Coalesce(
+        Subquery(
+            SpeechRevision.objects
+            .filter(speech_id=OuterRef("pk"), is_final=True)
+            .order_by("-version")
+            .values("revised_content")[:1]
+        ),
+        Value(""),
+    )
+
+
+def search_vector_expression():
+    """
+    Poids: titre (A) > contenu / révision finale (B).
+    """
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("raw_content", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_final_revision_content(), weight="B", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(speech_ids: Iterable[int]) -> int:
+    """
+    1 UPDATE (calcul côté PostgreSQL) pour les speeches donnés.
+    """
+    ids = list(speech_ids)
+    if not ids or not search_enabled():
+        return 0
+    return Speech.objects.filter(pk__in=ids).update(search_vector=search_vector_expression())
+
+
+def search_speeches(qs, text: str):
+    """
+    Filtre + classe qs par pertinence (index GIN sur search_vector).
+    Syntaxe "websearch": mots, "phrase exacte", -exclusion, or.
+    """
+    text = (text or "").strip()[:SEARCH_MAX_QUERY_LENGTH]
+
+    if not search_enabled():
+        qs = qs.filter(Q(title__icontains=text) | Q(raw_content__icontains=text))
+        return qs.annotate(rank=Value(0.0)).order_by("-published_at", "-created_at")
+
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    return (
+        qs.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-published_at", "-created_at")
+    )
@@ -0,0 +1,179 @@
+# =========================
+# apps/speeches/services/visibility.py
+# =========================
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.abc_apps.academics.models import StudentMonthlyEnrollment, TeacherCourseAssignment
+from apps.abc_apps.academics.utils import get_or_create_period_from_date
+
+ADMIN_ROLES = ("principal", "admin", "staff", "superadmin")
+
+VISIBILITY_SCOPE_TTL = 2 * 60    # filet de sécurité: academics/signals invalide à chaque inscription / assignation
+PUBLIC_FEED_TTL = 60             # pages anonymes (likes/comments un peu en retard: ok)
+PUBLIC_FEED_VERSION_KEY = "speeches:feed:public:version"
+
+# attribut posé sur la request: 1 seul calcul par requête HTTP
+_REQUEST_ATTR = "_speech_visibility_scope"
+
+
+@dataclass(frozen=True)
+class VisibilityScope:
+    """
+    Ce qu'un user peut voir dans les feeds:
+    - anonymous : public
+    - admin     : public + school + toutes les class
+    - student / teacher : public + school + class des groupes autorisés (période courante)
+    """
+    authenticated: bool
+    role: str = ""
+    period_id: Optional[int] = None
+    group_ids: Tuple[int, ...] = ()
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+    def class_predicate(self) -> Q:
+        """
+        visibility="class" STRICT (groupes de la période courante).
+        """
+        if not self.authenticated:
+            return Q(pk__in=[])
+        if self.is_admin:
+            return Q()
+        if not self.group_ids:
+            return Q(pk__in=[])
+        return Q(period_id=self.period_id, group_id__in=self.group_ids)
+
+    def feed_predicate(self) -> Q:
+        if not self.authenticated:
+            return Q(visibility="public")
+        return Q(visibility__in=["public", "school"]) | (Q(visibility="class") & self.class_predicate())
+
+
+ANONYMOUS_SCOPE = VisibilityScope(authenticated=False)
+
+
+def _scope_key(user_id: int, today) -> str:
+    # la date dans la clé: changement de mois -> nouvelle période, pas de scope périmé
+    return f"speeches:scope:{user_id}:{today.isoformat()}"
+
+
+def _load_scope(user, today) -> VisibilityScope:
+    role = getattr(user, "role", "")
+    if role in ADMIN_ROLES:
+        return VisibilityScope(authenticated=True, role=role)
+
+    period = get_or_create_period_from_date(today)
+    group_ids = []
+
+    if role == "student":
+        student = getattr(user, "student_profile", None)
+        if student:
+            group_ids = StudentMonthlyEnrollment.objects.filter(
+                student=student, period=period, status="active"
+            ).values_list("group_id", flat=True)
+
+    elif role == "teacher":
+        teacher = getattr(user, "teacher_profile", None)
+        if teacher:
+            group_ids = TeacherCourseAssignment.objects.filter(
+                teacher=teacher, period=period, is_speech_teacher=True,
+            ).exclude(monthly_group__isnull=True).values_list("monthly_group_id", flat=True)
+
+    return VisibilityScope(
+        authenticated=True,
+        role=role,
+        period_id=period.id,
+        group_ids=tuple(sorted(set(group_ids))),
+    )
+
+
+def get_visibility_scope(user, request=None) -> VisibilityScope:
+    """
+    Scope de visibilité du user: mémorisé sur la request puis en cache (Redis)
+    VISIBILITY_SCOPE_TTL -> pas de requêtes enrollment/assignment à chaque feed.
+    """
+    if not (user and user.is_authenticated):
+        return ANONYMOUS_SCOPE
+
+    if request is not None:
+        scope = getattr(request, _REQUEST_ATTR, None)
+        if scope is not None:
+            return scope
+
+    today = timezone.localdate()
+    key = _scope_key(user.id, today)
+    data = cache.get(key)
+    if data is None:
+        scope = _load_scope(user, today)
+        cache.set(key, {
+            "role": scope.role,
+            "period_id": scope.period_id,
+            "group_ids": list(scope.group_ids),
+        }, VISIBILITY_SCOPE_TTL)
+    else:
+        scope = VisibilityScope(
+            authenticated=True,
+            role=data["role"],
+            period_id=data["period_id"],
+            group_ids=tuple(data["group_ids"]),
+        )
+
+    if request is not None:
+        setattr(request, _REQUEST_ATTR, scope)
+    return scope
+
+
+def invalidate_visibility_scope(user_id: int) -> None:
+    cache.delete(_scope_key(user_id, timezone.localdate()))
+
+
+# ─────────────────────────────────────────────
+# Public feed cache (anonymous)
+# ─────────────────────────────────────────────
+def _public_feed_version() -> int:
+    version = cache.get(PUBLIC_FEED_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(PUBLIC_FEED_VERSION_KEY, version, None)
+    return version
+
+
+def public_feed_key(name: str, request) -> str:
+    """
+    1 clé par (endpoint, host, query string triée, version).
+    Le host en fait partie: les URLs audio sont absolues.
+    """
+    params = "&".join(
+        f"{k}={v}" for k, v in sorted(request.query_params.items()) if v not in (None, "")
+    )
+    return f"speeches:feed:public:v{_public_feed_version()}:{name}:{request.get_host()}:{params}"
+
+
+def get_public_feed(name: str, request, build):
+    """
+    build() -> payload (dict sérialisable). Anonymous uniquement: identique pour tous.
+    """
+    key = public_feed_key(name, request)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, PUBLIC_FEED_TTL)
+    return payload
+
+
+def invalidate_public_feed() -> None:
+    """
+    Publication / dépublication: nouvelle version -> toutes les anciennes pages
+    deviennent inaccessibles (expirées ensuite par leur TTL).
+    """
+    try:
+        cache.incr(PUBLIC_FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(PUBLIC_FEED_VERSION_KEY, 2, None)
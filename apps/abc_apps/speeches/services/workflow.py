@@ -1,47 +1,216 @@
 # =========================
 # apps/speeches/services/workflow.py
 # =========================
+from typing import Dict, Iterable, List
+
+from django.db import transaction
 from django.utils import timezone
-from apps.abc_apps.speeches.models import Speech, SpeechCorrection, SpeechCoaching, SpeechScore, SpeechPublicationDecision
 
-def submit_speech(speech: Speech):
-    speech.status = "submitted"
-    speech.submitted_at = timezone.now()
-    speech.save(update_fields=["status", "submitted_at"])
-    return speech
+from apps.abc_apps.library.models_notifications import Notification
+from apps.abc_apps.library.services.notifications import create_notifications
+from apps.abc_apps.speeches.models import Speech, SpeechApproval
+from apps.abc_apps.speeches.services.visibility import invalidate_public_feed
 
-def apply_correction(speech: Speech, teacher, corrected_content: str, notes: str = ""):
-    SpeechCorrection.objects.update_or_create(
-        speech=speech,
-        defaults={"teacher": teacher, "corrected_content": corrected_content, "correction_notes": notes, "corrected_at": timezone.now()},
-    )
-    speech.status = "corrected"
-    speech.save(update_fields=["status"])
+BULK_DECIDE_MAX = 500
+
+# ─────────────────────────────────────────────
+# Machine à états de Speech.status
+# ─────────────────────────────────────────────
+TRANSITIONS = {
+    "draft": {"submitted", "corrected", "coached", "pending_approval"},
+    "submitted": {"corrected", "coached", "needs_revision", "pending_approval", "draft"},
+    "needs_revision": {"submitted", "corrected", "coached", "pending_approval"},
+    "corrected": {"corrected", "coached", "needs_revision", "pending_approval", "submitted", "draft"},
+    "coached": {"corrected", "coached", "needs_revision", "pending_approval", "submitted", "draft"},
+    "pending_approval": {"published", "rejected", "corrected", "coached"},
+    "rejected": {"corrected", "coached", "pending_approval", "draft"},
+    "published": set(),
+}
+
+VISIBILITIES = {"private", "class", "school", "public"}
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def can_transition(current: str, target: str) -> bool:
+    return target in TRANSITIONS.get(current, set())
+
+
+def _apply(speech: Speech, target: str, now=None) -> List[str]:
+    """
+    Change le status en mémoire (+ timestamps), retourne les champs modifiés.
+    """
+    if not can_transition(speech.status, target):
+        raise InvalidTransition(f"Cannot go from {speech.status} to {target}")
+
+    now = now or timezone.now()
+    speech.status = target
+    fields = ["status"]
+    if target == "submitted":
+        speech.submitted_at = now
+        fields.append("submitted_at")
+    elif target == "published":
+        speech.published_at = now
+        fields.append("published_at")
+    return fields
+
+
+def transition(speech: Speech, target: str) -> Speech:
+    speech.save(update_fields=_apply(speech, target))
     return speech
 
-def apply_coaching(speech: Speech, teacher, pronunciation_notes: str = ""):
-    SpeechCoaching.objects.update_or_create(
-        speech=speech,
-        defaults={"teacher": teacher, "pronunciation_notes": pronunciation_notes, "coached_at": timezone.now()},
-    )
-    # if already corrected, move to coached; otherwise keep corrected/submitted progression simple
-    speech.status = "coached"
-    speech.save(update_fields=["status"])
+
+# ─────────────────────────────────────────────
+# Étapes (appelées par les vues)
+# ─────────────────────────────────────────────
+def submit_speech(speech: Speech) -> Speech:
+    if speech.status not in ("draft", "needs_revision"):
+        raise InvalidTransition("Cannot submit in current status")
+    return transition(speech, "submitted")
+
+
+def mark_corrected(speech: Speech, extra_fields: Iterable[str] = ()) -> Speech:
+    """
+    Après une révision teacher (le speech publié garde son status).
+    """
+    fields = list(extra_fields)
+    if speech.status != "published":
+        fields += _apply(speech, "corrected")
+    if fields:
+        speech.save(update_fields=list(set(fields)))
     return speech
 
-def score_speech(speech: Speech, adjudicator, score: int, comments: str = ""):
-    SpeechScore.objects.update_or_create(
-        speech=speech,
-        adjudicator=adjudicator,
-        defaults={"score": score, "comments": comments, "scored_at": timezone.now()},
+
+def mark_coached(speech: Speech) -> Speech:
+    if speech.status == "published":
+        return speech
+    return transition(speech, "coached")
+
+
+def request_publication(speech: Speech) -> Speech:
+    if speech.status == "pending_approval":
+        return speech  # déjà en attente
+    return transition(speech, "pending_approval")
+
+
+def revert_after_revision_removed(speech: Speech) -> None:
+    if speech.status == "corrected" and not speech.revisions.exists():
+        transition(speech, "submitted" if speech.submitted_at else "draft")
+
+
+def revert_after_coaching_removed(speech: Speech) -> None:
+    if speech.status == "coached" and not speech.coachings.exists():
+        if speech.revisions.exists():
+            transition(speech, "corrected")
+        else:
+            transition(speech, "submitted" if speech.submitted_at else "draft")
+
+
+# ─────────────────────────────────────────────
+# Décision principal (1 ou N speeches)
+# ─────────────────────────────────────────────
+def _author_user_id(speech: Speech):
+    if speech.author_type == "student" and speech.student_id:
+        return speech.student.user_id
+    if speech.author_type == "teacher" and speech.teacher_id:
+        return speech.teacher.user_id
+    return None
+
+
+def _decision_notification(speech: Speech, user_id: int, decision: str, reason: str) -> Notification:
+    if decision == "approve":
+        title, message = "Speech published 🎉", f"Your speech '{speech.title}' has been approved and published."
+    else:
+        title = "Speech not approved"
+        message = f"Your speech '{speech.title}' was not approved." + (f" Reason: {reason}" if reason else "")
+    return Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        data={"speech_id": speech.id, "type": f"speech_{decision}"},
     )
-    return speech
 
-def decide_publication(speech: Speech, decided_by, decision: str, reason: str = ""):
-    SpeechPublicationDecision.objects.update_or_create(
-        speech=speech,
-        defaults={"decided_by": decided_by, "decision": decision, "reason": reason, "decided_at": timezone.now()},
+
+@transaction.atomic
+def decide_speeches(speech_ids: Iterable[int], decided_by, decision: str, reason: str = "", visibility: str = "") -> Dict:
+    """
+    approve/reject de N speeches en 1 transaction:
+    - 1 SELECT ... FOR UPDATE
+    - 1 bulk_update des speeches
+    - 1 bulk_update + 1 bulk_create des SpeechApproval
+    - 1 bulk_create des notifications auteurs, 1 invalidation du feed public (après commit)
+    Retourne {"approved": [ids], "rejected": [ids], "skipped": {id: raison}}.
+    """
+    if decision not in ("approve", "reject"):
+        raise ValueError("decision must be approve/reject")
+    if visibility and visibility not in VISIBILITIES:
+        raise ValueError("Invalid visibility")
+
+    ids = list(dict.fromkeys(int(i) for i in speech_ids))
+    if len(ids) > BULK_DECIDE_MAX:
+        raise ValueError(f"Too many speeches (max {BULK_DECIDE_MAX})")
+
+    speeches = list(
+        Speech.objects
+        .select_for_update(of=("self",))
+        .select_related("student", "teacher")
+        .filter(pk__in=ids, is_deleted=False)
     )
-    speech.status = "published" if decision == "publish" else "rejected"
-    speech.save(update_fields=["status"])
-    return speech
+    found = {s.pk for s in speeches}
+    skipped = {pk: "not found" for pk in ids if pk not in found}
+
+    target = "published" if decision == "approve" else "rejected"
+    now = timezone.now()
+    decided, fields = [], {"status"}
+    for speech in speeches:
+        try:
+            fields.update(_apply(speech, target, now))
+        except InvalidTransition:
+            skipped[speech.pk] = f"status is {speech.status}"
+            continue
+        if decision == "approve" and visibility:
+            speech.visibility = visibility
+            fields.add("visibility")
+        decided.append(speech)
+
+    if not decided:
+        return {"approved": [], "rejected": [], "skipped": skipped}
+
+    for speech in decided:
+        speech.updated_at = now
+    Speech.objects.bulk_update(decided, list(fields | {"updated_at"}))
+
+    # SpeechApproval (OneToOne): mise à jour des existantes, création des autres
+    decided_ids = [s.pk for s in decided]
+    existing = {a.speech_id: a for a in SpeechApproval.objects.filter(speech_id__in=decided_ids)}
+    to_update, to_create = [], []
+    for speech in decided:
+        approval = existing.get(speech.pk) or SpeechApproval(speech=speech)
+        approval.decided_by = decided_by
+        approval.decision = decision
+        approval.reason = reason
+        approval.decided_at = now
+        approval.updated_at = now
+        (to_update if approval.pk else to_create).append(approval)
+    if to_update:
+        SpeechApproval.objects.bulk_update(to_update, ["decided_by", "decision", "reason", "decided_at", "updated_at"])
+    if to_create:
+        SpeechApproval.objects.bulk_create(to_create)
+
+    notifications = []
+    for speech in decided:
+        user_id = _author_user_id(speech)
+        if user_id:
+            notifications.append(_decision_notification(speech, user_id, decision, reason))
+    create_notifications(notifications)
+
+    if decision == "approve":
+        transaction.on_commit(invalidate_public_feed)
+
+    return {
+        "approved": decided_ids if decision == "approve" else [],
+        "rejected": decided_ids if decision == "reject" else [],
+        "skipped": skipped,
+    }
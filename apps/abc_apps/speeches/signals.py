@@ -0,0 +1,24 @@
+# =========================
+# apps/speeches/signals.py
+# =========================
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.abc_apps.speeches.models import Speech, SpeechRevision
+from apps.abc_apps.speeches.services.search import update_search_vector
+
+SEARCHABLE_FIELDS = {"title", "raw_content"}
+
+
+@receiver(post_save, sender=Speech)
+def refresh_speech_search_vector(sender, instance: Speech, created, update_fields=None, **kwargs):
+    # changements de status / compteurs: pas de recalcul
+    if update_fields is not None and not SEARCHABLE_FIELDS.intersection(update_fields):
+        return
+    update_search_vector([instance.pk])
+
+
+@receiver(post_save, sender=SpeechRevision)
+@receiver(post_delete, sender=SpeechRevision)
+def refresh_speech_search_vector_on_revision(sender, instance: SpeechRevision, **kwargs):
+    update_search_vector([instance.speech_id])
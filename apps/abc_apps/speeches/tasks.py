@@ -0,0 +1,35 @@
+from celery import shared_task
+
+from apps.abc_apps.speeches.services.audio import expire_stale_uploads, mark_audio_failed, process_audio
+from apps.abc_apps.speeches.services.ranking import rebuild_popular_rankings
+
+
+@shared_task(soft_time_limit=5 * 60, time_limit=6 * 60)
+def rank_popular_speeches():
+    """
+    Recompute the decayed popularity ranking (Redis sorted sets).
+    """
+    return rebuild_popular_rankings()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30, soft_time_limit=10 * 60, time_limit=11 * 60)
+def process_speech_audio(self, audio_id):
+    """
+    Transcode an uploaded recording, compute its real duration and waveform (media queue).
+    """
+    try:
+        return process_audio(audio_id)
+    except OSError as exc:
+        # stockage / disque partagé momentanément indisponible (audio remis en "pending")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        mark_audio_failed(audio_id)
+        return "failed"
+
+
+@shared_task
+def expire_speech_audio_uploads():
+    """
+    Drop abandoned chunked-upload sessions and their temp files.
+    """
+    return expire_stale_uploads()
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import tempfile
+from datetime import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.abc_apps.accounts.models import StudentProfile, User
+from apps.abc_apps.academics.models import (
+    AcademicLevel,
+    AcademicPeriod,
+    MonthlyClassGroup,
+    Room,
+    StudentMonthlyEnrollment,
+)
+from apps.abc_apps.library.models_notifications import Notification
+from apps.abc_apps.speeches.models import Speech, SpeechApproval, SpeechAudio, SpeechComment
+from apps.abc_apps.speeches.services.revisions import decode_rows, encode_chain
+from apps.abc_apps.speeches.services.visibility import get_visibility_scope
+
+
+class SpeechFeedTestBase(TestCase):
+    """
+    Fixtures communes: périodes courante / précédente, 1 groupe par période.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.period, _ = AcademicPeriod.objects.get_or_create(year=today.year, month=today.month)
+        y, m = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+        cls.last_period, _ = AcademicPeriod.objects.get_or_create(year=y, month=m)
+
+        level = AcademicLevel.objects.create(code="FOUNDATION_1", label="Foundation 1", order=1)
+        room = Room.objects.create(code="R1", name="Room 1")
+        cls.groups = {
+            p.id: MonthlyClassGroup.objects.create(
+                period=p, level=level, group_name="A", room=room, start_time=time(8, 15)
+            )
+            for p in (cls.period, cls.last_period)
+        }
+        cls.counter = 0
+
+    def setUp(self):
+        cache.clear()
+
+    def _make_speeches(self, period, n):
+        # speeches créés hors decide(): le cache du feed public n'est pas invalidé
+        cache.clear()
+        group = self.groups[period.id]
+        for _ in range(n):
+            SpeechFeedTestBase.counter += 1
+            i = SpeechFeedTestBase.counter
+            user = User.objects.create_user(
+                username=f"student{i}", email=f"student{i}@example.com", password="x", role="student"
+            )
+            student = StudentProfile.objects.create(
+                user=user, student_code=f"S{i:04d}", current_level="Foundation 1", group_name="A"
+            )
+            speech = Speech.objects.create(
+                period=period, group=group, room=group.room,
+                author_type="student", student=student,
+                title=f"Speech {i}", raw_content="Hello",
+                status="published", visibility="public",
+                published_at=timezone.now(),
+            )
+            SpeechAudio.objects.create(
+                speech=speech, kind="student_recording", uploaded_by=user, audio_file=f"speeches/audio/{i}.m4a"
+            )
+
+    def _count_queries(self, url):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), len(response.data["data"]["items"])
+
+
+class SpeechFeedQueryCountTests(SpeechFeedTestBase):
+    """
+    Le nombre de requêtes d'un feed ne doit pas dépendre du nombre de speeches.
+    """
+
+    def _assert_constant_queries(self, url, period):
+        self._make_speeches(period, 2)
+        few_queries, few_items = self._count_queries(url)
+
+        self._make_speeches(period, 10)
+        many_queries, many_items = self._count_queries(url)
+
+        self.assertGreater(many_items, few_items)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_feed(self):
+        self._assert_constant_queries("/api/speeches/feed/", self.period)
+
+    def test_month(self):
+        self._assert_constant_queries("/api/speeches/month/", self.period)
+
+    def test_last_month(self):
+        self._assert_constant_queries("/api/speeches/last-month/", self.last_period)
+
+    def test_latest(self):
+        self._assert_constant_queries("/api/speeches/latest/", self.period)
+
+    def test_popular(self):
+        self._assert_constant_queries("/api/speeches/popular/", self.period)
+
+
+class PublicFeedCacheTests(SpeechFeedTestBase):
+    """
+    Feed anonyme: servi depuis le cache, invalidé à la publication.
+    """
+
+    def test_anonymous_feed_is_cached(self):
+        self._make_speeches(self.period, 2)
+        self._count_queries("/api/speeches/feed/")
+
+        queries, items = self._count_queries("/api/speeches/feed/")
+        self.assertEqual(queries, 0)
+        self.assertEqual(items, 2)
+
+    def test_decide_invalidates_public_feed(self):
+        self._make_speeches(self.period, 1)
+        self._count_queries("/api/speeches/feed/")
+
+        speech = Speech.objects.first()
+        speech.status = "pending_approval"
+        speech.save(update_fields=["status"])
+
+        principal = User.objects.create_user(
+            username="principal", email="principal@example.com", password="x", role="principal"
+        )
+        client = APIClient()
+        client.force_authenticate(principal)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                f"/api/speeches/{speech.pk}/decide/", {"decision": "approve", "visibility": "public"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+        queries, items = self._count_queries("/api/speeches/feed/")
+        self.assertGreater(queries, 0)
+        self.assertEqual(items, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="speech-tests-"))
+class VisibilityScopeCacheTests(SpeechFeedTestBase):
+    def test_enrollment_changes_invalidate_cached_scope(self):
+        user = User.objects.create_user(username="scope", email="scope@example.com", password="x", role="student")
+        student = StudentProfile.objects.create(
+            user=user, student_code="SCOPE1", current_level="Foundation 1", group_name="A"
+        )
+        group = self.groups[self.period.id]
+        self.assertEqual(get_visibility_scope(user).group_ids, ())
+
+        enrollment = StudentMonthlyEnrollment.objects.create(
+            period=self.period, student=student, group=group, status="active"
+        )
+        self.assertEqual(get_visibility_scope(user).group_ids, (group.id,))
+
+        enrollment.delete()
+        self.assertEqual(get_visibility_scope(user).group_ids, ())
+
+
+class ChunkedAudioUploadTests(SpeechFeedTestBase):
+
+    def test_chunked_upload_resume_and_finalize(self):
+        self._make_speeches(self.period, 1)
+        speech = Speech.objects.select_related("student__user").first()
+        client = APIClient()
+        client.force_authenticate(speech.student.user)
+
+        data = b"a" * 10 + b"b" * 6
+        response = client.post(
+            f"/api/speeches/{speech.pk}/audio-uploads/",
+            {"kind": "student_recording", "filename": "rec.m4a", "content_type": "audio/mp4", "total_size": len(data)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        url = f"/api/speech-audio-uploads/{response.data['data']['upload']['id']}/"
+
+        response = client.put(f"{url}chunk/", data[:10], content_type="application/octet-stream",
+                              HTTP_CONTENT_RANGE="bytes 0-9/16")
+        self.assertEqual(response.data["data"]["received_bytes"], 10)
+
+        # morceau rejoué après coupure: le serveur indique où reprendre
+        response = client.put(f"{url}chunk/", data[:10], content_type="application/octet-stream",
+                              HTTP_CONTENT_RANGE="bytes 0-9/16")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["data"]["received_bytes"], 10)
+
+        response = client.post(f"{url}finalize/")
+        self.assertEqual(response.status_code, 409)
+
+        client.put(f"{url}chunk/", data[10:], content_type="application/octet-stream",
+                   HTTP_CONTENT_RANGE="bytes 10-15/16")
+        response = client.post(f"{url}finalize/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["audio"]["processing_status"], "pending")
+
+
+class RevisionDeltaTests(SimpleTestCase):
+
+    def test_chain_round_trip(self):
+        texts, text = [], "I want to talk about my family and my school."
+        for i in range(12):
+            text = text.replace("my", "our", 1) + f" Sentence {i}."
+            texts.append((text, i == 7))
+
+        encoded = encode_chain(texts)
+        rows = [dict(version=i + 1, **enc) for i, enc in enumerate(encoded)]
+
+        self.assertEqual(decode_rows(rows), {i + 1: t for i, (t, _) in enumerate(texts)})
+        # 1re version et version finale: snapshots complets
+        self.assertEqual(encoded[0]["content_mode"], "full")
+        self.assertEqual(encoded[7]["content_mode"], "full")
+        self.assertIn("delta", {enc["content_mode"] for enc in encoded})
+
+
+class BulkDecideTests(SpeechFeedTestBase):
+
+    def test_bulk_approve_skips_non_pending(self):
+        self._make_speeches(self.period, 3)
+        speeches = list(Speech.objects.order_by("id"))
+        Speech.objects.filter(pk__in=[s.pk for s in speeches[:2]]).update(status="pending_approval")
+
+        principal = User.objects.create_user(
+            username="principal", email="principal@example.com", password="x", role="principal"
+        )
+        client = APIClient()
+        client.force_authenticate(principal)
+        response = client.post(
+            "/api/speeches/bulk-decide/",
+            {"speech_ids": [s.pk for s in speeches], "decision": "approve", "visibility": "school"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.data["data"]
+        self.assertEqual(sorted(data["approved"]), [s.pk for s in speeches[:2]])
+        self.assertIn(speeches[2].pk, data["skipped"])
+        self.assertEqual(
+            Speech.objects.filter(status="published", visibility="school").count(), 2
+        )
+        self.assertEqual(SpeechApproval.objects.filter(decision="approve").count(), 2)
+        self.assertEqual(Notification.objects.filter(data__type="speech_approve").count(), 2)
+
+
+class CommentThreadTests(SpeechFeedTestBase):
+
+    def test_cursor_pages_skip_hidden_comments(self):
+        self._make_speeches(self.period, 1)
+        speech = Speech.objects.get()
+        user = User.objects.create_user(
+            username="reader", email="reader@example.com", password="x", role="principal",
+            first_name="Ada", last_name="Reader",
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        for i in range(5):
+            client.post(f"/api/speeches/{speech.pk}/comment/", {"content": f"c{i}"}, format="json")
+        SpeechComment.objects.filter(content="c2").update(is_hidden=True)
+
+        url = f"/api/speeches/{speech.pk}/comments/?page_size=3"
+        first = client.get(url).data["data"]
+        self.assertEqual([c["content"] for c in first["items"]], ["c4", "c3", "c1"])
+        self.assertEqual(first["items"][0]["user_name"], "Ada Reader")
+
+        second = client.get(f"{url}&cursor={first['next_cursor']}").data["data"]
+        self.assertEqual([c["content"] for c in second["items"]], ["c0"])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_public_thread_never_exposes_commenter_email(self):
+        self._make_speeches(self.period, 1)
+        speech = Speech.objects.get()
+        user = User.objects.create_user(username="noname", email="noname@example.com", password="x", role="principal")
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post(f"/api/speeches/{speech.pk}/comment/", {"content": "hi"}, format="json")
+
+        items = APIClient().get(f"/api/speeches/{speech.pk}/comments/").data["data"]["items"]
+        self.assertEqual([c["user_name"] for c in items], [""])
@@ -3,10 +3,11 @@
 # =========================
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from apps.abc_apps.speeches.views import SpeechViewSet
+from apps.abc_apps.speeches.views import SpeechViewSet, SpeechAudioUploadViewSet
 
 router = DefaultRouter()
 router.register(r"speeches", SpeechViewSet, basename="speeches")
+router.register(r"speech-audio-uploads", SpeechAudioUploadViewSet, basename="speech-audio-uploads")
 
 # speech_like = SpeechViewSet.as_view({"post": "like"})
 # speech_comment = SpeechViewSet.as_view({"post": "comment"})
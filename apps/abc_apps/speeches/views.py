@@ -1,11 +1,12 @@
 # apps/abc_apps/speeches/viewsets.py
+import mimetypes
 import traceback
 
 from django.db import transaction
-from django.db.models import Count, Exists, OuterRef, Value, BooleanField, Q
+from django.db.models import Count, Exists, OuterRef, Value, BooleanField, Q, Prefetch
 from django.utils import timezone
 
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -22,11 +23,32 @@ from apps.abc_apps.academics.models import MonthlyClassGroup, StudentMonthlyEnro
 
 from apps.abc_apps.speeches.models import (
     Speech, SpeechRevision, SpeechCoaching, SpeechAudio,
-    SpeechApproval, SpeechLike, SpeechComment
+    SpeechApproval, SpeechLike, SpeechComment, SpeechAudioUpload,
 )
 from apps.abc_apps.speeches.serializers import (
-    SpeechSerializer, SpeechRevisionSerializer, SpeechCoachingSerializer,
-    SpeechAudioSerializer, SpeechCommentSerializer
+    SpeechSerializer, SpeechListSerializer, SpeechRevisionSerializer, SpeechCoachingSerializer,
+    SpeechAudioSerializer, SpeechCommentSerializer, SpeechAudioUploadSerializer,
+    SpeechInboxItemSerializer,
+)
+from apps.abc_apps.commons.http import ranged_file_response
+from apps.abc_apps.commons.pagination import keyset_paginate
+from apps.abc_apps.speeches.services.audio import (
+    UploadOffsetMismatch, enqueue_processing, finalize_upload, start_upload, write_chunk,
+)
+from apps.abc_apps.speeches.services.counters import bump_likes, bump_comments
+from apps.abc_apps.speeches.services.revisions import (
+    change_revision, create_revision, diff_versions, remove_revision,
+)
+from apps.abc_apps.speeches.services.search import search_speeches
+from apps.abc_apps.speeches.services.ranking import (
+    SCOPE_PUBLIC, SCOPE_SCHOOL, SCOPE_CLASS_ALL, class_scope, read_popular_ids,
+)
+from apps.abc_apps.speeches.services.workflow import (
+    InvalidTransition, decide_speeches, mark_coached, mark_corrected, request_publication,
+    revert_after_coaching_removed, revert_after_revision_removed, submit_speech,
+)
+from apps.abc_apps.speeches.services.visibility import (
+    ADMIN_ROLES, get_visibility_scope, get_public_feed, invalidate_public_feed,
 )
 from apps.common.responses import ok, bad
 
@@ -34,6 +56,9 @@ from apps.common.responses import ok, bad
 # ─────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────
+INBOX_STATUSES = ["draft", "corrected", "coached", "submitted", "needs_revision", "pending_approval", "published"]
+INBOX_COUNTED_STATUSES = ["submitted", "needs_revision", "corrected", "pending_approval"]
+
 def _norm(x):
     if not x:
         return None
@@ -95,43 +120,16 @@ def _apply_filters(qs, request):
     return qs
 
 
-def _class_visibility_predicate(user):
+def _popular_scopes(scope):
     """
-    ✅ visibility="class" STRICT:
-    - student: must have active enrollment for that (period, group)
-    - teacher: must have course assignment for that (period, monthly_group)
-    - principal/staff: allow
+    Sorted sets (services/ranking.py) visibles pour ce VisibilityScope,
+    mêmes règles que _apply_visibility_for_feed.
     """
-    if not (user and user.is_authenticated):
-        return Q(pk__in=[])  # none
-
-    role = getattr(user, "role", "")
-    if role in ["principal", "admin", "staff", "superadmin"]:
-        return Q()  # allow all class speeches
-
-    today = timezone.localdate()
-    period = get_or_create_period_from_date(today)
-
-    if role == "student":
-        student = getattr(user, "student_profile", None)
-        if not student:
-            return Q(pk__in=[])
-        allowed_groups = StudentMonthlyEnrollment.objects.filter(
-            student=student, period=period, status="active"
-        ).values_list("group_id", flat=True)
-        return Q(period=period, group_id__in=allowed_groups)
-
-    if role == "teacher":
-        teacher = getattr(user, "teacher_profile", None)
-        if not teacher:
-            return Q(pk__in=[])
-        allowed_groups = TeacherCourseAssignment.objects.filter(
-            teacher=teacher, period=period,
-             is_speech_teacher=True, 
-        ).values_list("monthly_group_id", flat=True)
-        return Q(period=period, group_id__in=allowed_groups)
-
-    return Q(pk__in=[])
+    if not scope.authenticated:
+        return [SCOPE_PUBLIC]
+    if scope.is_admin:
+        return [SCOPE_SCHOOL, SCOPE_CLASS_ALL]
+    return [SCOPE_SCHOOL] + [class_scope(gid) for gid in scope.group_ids]
 
 
 def _apply_visibility_for_feed(qs, request):
@@ -139,23 +137,69 @@ def _apply_visibility_for_feed(qs, request):
     Public endpoints => uniquement published + pas deleted
     Anonymous => public only
     Auth => public + school + class(strict)
+    Scope (rôle, période, groupes) en cache: voir services/visibility.py
     """
-    u = getattr(request, "user", None)
-    qs = qs.filter(status="published", is_deleted=False)
+    scope = get_visibility_scope(getattr(request, "user", None), request)
+    return qs.filter(status="published", is_deleted=False).filter(scope.feed_predicate())
 
-    if not (u and u.is_authenticated):
-        return qs.filter(visibility="public")
-
-    # public + school always
-    base = Q(visibility__in=["public", "school"])
-
-    # class strict
-    class_q = Q(visibility="class") & _class_visibility_predicate(u)
+def _with_list_prefetch(qs):
+    """
+    Feeds: audios (+ uploaded_by) en 1 requête pour toute la page.
+    """
+    return qs.prefetch_related(
+        Prefetch(
+            "audios",
+            queryset=SpeechAudio.objects.select_related("uploaded_by").order_by("created_at"),
+        ),
+    )
 
-    return qs.filter(base | class_q)
+def _with_detail_prefetch(qs):
+    """
+    Détail (SpeechSerializer complet): audios + revisions + coachings,
+    chacun avec ses FK utilisées par les serializers.
+    """
+    return _with_list_prefetch(qs).prefetch_related(
+        # texte des revisions: reconstruit à la demande (serializer), pas chargé ici
+        Prefetch("revisions", queryset=SpeechRevision.objects.select_related("revised_by").defer("revised_content", "delta")),
+        Prefetch("coachings", queryset=SpeechCoaching.objects.select_related("teacher__user")),
+    )
 
 def _is_admin(user):
-    return getattr(user, "role", "") in ["principal", "admin", "staff", "superadmin"]
+    return getattr(user, "role", "") in ADMIN_ROLES
+
+def _check_audio_kind(user, kind):
+    if kind not in ["student_recording", "teacher_coaching", "tts"]:
+        return bad("Invalid kind", 400)
+    if kind == "student_recording" and user.role != "student":
+        return bad("Only students can upload student recordings", 403)
+    if kind == "teacher_coaching" and user.role != "teacher":
+        return bad("Only teachers can upload coaching audio", 403)
+    return None
+
+def _can_listen(request, speech: Speech):
+    """
+    Speech visible dans les feeds du user, ou auteur / teacher de la classe / admin.
+    """
+    visible = (
+        Speech.objects
+        .filter(pk=speech.pk, status="published", is_deleted=False)
+        .filter(get_visibility_scope(request.user, request).feed_predicate())
+        .exists()
+    )
+    if visible:
+        return True
+
+    u = request.user
+    if not u.is_authenticated:
+        return False
+    if _is_admin(u):
+        return True
+    if speech.student_id and speech.student.user_id == u.id:
+        return True
+    if speech.teacher_id and speech.teacher.user_id == u.id:
+        return True
+    teacher = getattr(u, "teacher_profile", None)
+    return bool(teacher and _teacher_can_access_speech(teacher, speech))
 
 def _teacher_can_access_speech(teacher_profile, speech: Speech):
     group_ids, period = get_teacher_active_groups(teacher_profile)
@@ -177,11 +221,11 @@ class SpeechViewSet(ModelViewSet):
 
     def get_permissions(self):
         # public endpoints: lecture seulement
-        if self.action in ["feed", "month", "last_month", "popular", "latest", "comments"]:
+        if self.action in ["feed", "month", "last_month", "popular", "latest", "search", "comments", "stream_audio"]:
             return [AllowAny()]
 
         # social actions require login (sinon request.user = AnonymousUser)
-        if self.action in ["like", "comment", "upload_audio"]:
+        if self.action in ["like", "comment", "upload_audio", "start_audio_upload"]:
             return [IsAuthenticated()]
 
         return super().get_permissions()
@@ -193,19 +237,17 @@ class SpeechViewSet(ModelViewSet):
             Speech.objects
             .select_related("period", "group", "group__level", "room", "student__user", "teacher__user")
             .filter(is_deleted=False)
+            .defer("search_vector")  # tsvector: jamais sérialisé
         )
         # print("Base QS:", qs.query)
 
+        # likes_count / comments_count: colonnes dénormalisées (plus d'agrégat)
         if u and u.is_authenticated:
             qs = qs.annotate(
-                likes_count=Count("likes", distinct=True),
-                comments_count=Count("comments", distinct=True),
                 liked_by_me=Exists(SpeechLike.objects.filter(speech_id=OuterRef("pk"), user=u)),
             )
         else:
             qs = qs.annotate(
-                likes_count=Count("likes", distinct=True),
-                comments_count=Count("comments", distinct=True),
                 liked_by_me=Value(False, output_field=BooleanField()),
             )
 
@@ -234,8 +276,8 @@ class SpeechViewSet(ModelViewSet):
             "submit", "request_publish", "decide",
 
             # teacher tools
-            "upload_audio",
-            "add_revision", "delete_revision",
+            "upload_audio", "start_audio_upload", "stream_audio",
+            "add_revision", "delete_revision", "revision_diff",
             "update_revision",        
             "coach", "delete_coaching",
             "update_coaching", 
@@ -243,8 +285,12 @@ class SpeechViewSet(ModelViewSet):
         }
 
         if getattr(self, "action", None) in detail_actions:
+            if self.action == "retrieve":
+                qs = _with_detail_prefetch(qs)
             return qs.order_by("-created_at")
 
+        qs = _with_detail_prefetch(qs)
+
         # ✅ LIST "my speeches" (inchangé)
         if getattr(u, "role", "") == "student":
             return qs.filter(student__user=u).order_by("-created_at")
@@ -322,100 +368,242 @@ class SpeechViewSet(ModelViewSet):
             return
 
         serializer.save(status="draft")
-        
+
+    def perform_update(self, serializer):
+        was_published = serializer.instance.status == "published"
+        speech = serializer.save()
+        if was_published or speech.status == "published":
+            transaction.on_commit(invalidate_public_feed)
+
+    def perform_destroy(self, instance):
+        was_published = instance.status == "published"
+        instance.delete()
+        if was_published:
+            transaction.on_commit(invalidate_public_feed)
+
     # ─────────────────────────────
     # Public/Home endpoints
     # ─────────────────────────────
+    def _feed_payload(self, request, name, build):
+        """
+        Anonymous: page identique pour tous -> cache partagé (services/visibility.py),
+        invalidé à la publication (decide). Connecté: calcul direct.
+        """
+        if request.user.is_authenticated:
+            return build()
+        return get_public_feed(name, request, build)
+
+    def _list_items(self, qs, request):
+        # list(): ReturnList garde une référence au serializer (non picklable)
+        return list(SpeechListSerializer(qs, many=True, context={"request": request}).data)
+
     @action(detail=False, methods=["get"], url_path="feed")
     def feed(self, request):
-        try:
+        def build():
             qs = _apply_visibility_for_feed(self._base_qs(), request)
             qs = _apply_filters(qs, request)
-            qs = qs.order_by("-published_at", "-created_at")[:50]
-            ser = SpeechSerializer(qs, many=True, context={"request": request})
-            return ok({"items": ser.data}, "Feed")
+            qs = _with_list_prefetch(qs.order_by("-published_at", "-created_at"))[:50]
+            return {"items": self._list_items(qs, request)}
+
+        try:
+            return ok(self._feed_payload(request, "feed", build), "Feed")
         except Exception as e:
             print("❌ FEED ERROR:", str(e))
             print(traceback.format_exc())
             return bad("Server error in feed()", 500)
     @action(detail=False, methods=["get"], url_path="month")
     def month(self, request):
-        qs = _apply_visibility_for_feed(self._base_qs(), request)
-
         month_code = _norm(request.query_params.get("month"))
         if not month_code:
             today = timezone.localdate()
             month_code = f"{today.year:04d}-{today.month:02d}"
 
-        y, m = _parse_month_code(month_code)
-        if y and m:
-            qs = qs.filter(period__year=y, period__month=m)
+        def build():
+            qs = _apply_visibility_for_feed(self._base_qs(), request)
+            y, m = _parse_month_code(month_code)
+            if y and m:
+                qs = qs.filter(period__year=y, period__month=m)
 
-        qs = _apply_filters(qs, request).order_by("-published_at", "-created_at")[:50]
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"month": month_code, "items": ser.data}, "Month")
+            qs = _with_list_prefetch(_apply_filters(qs, request).order_by("-published_at", "-created_at"))[:50]
+            return {"month": month_code, "items": self._list_items(qs, request)}
+
+        return ok(self._feed_payload(request, f"month:{month_code}", build), "Month")
 
     @action(detail=False, methods=["get"], url_path="last-month")
     def last_month(self, request):
-        qs = _apply_visibility_for_feed(self._base_qs(), request)
-
         today = timezone.localdate()
         y, m = today.year, today.month - 1
         if m == 0:
             y -= 1
             m = 12
-
         last_code = f"{y:04d}-{m:02d}"
-        qs = qs.filter(period__year=y, period__month=m)
-        qs = _apply_filters(qs, request).order_by("-published_at", "-created_at")[:50]
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"month": last_code, "items": ser.data}, "Last month")
+
+        def build():
+            qs = _apply_visibility_for_feed(self._base_qs(), request)
+            qs = qs.filter(period__year=y, period__month=m)
+            qs = _with_list_prefetch(_apply_filters(qs, request).order_by("-published_at", "-created_at"))[:50]
+            return {"month": last_code, "items": self._list_items(qs, request)}
+
+        return ok(self._feed_payload(request, f"last-month:{last_code}", build), "Last month")
 
     @action(detail=False, methods=["get"], url_path="popular")
     def popular(self, request):
-        qs = _apply_visibility_for_feed(self._base_qs(), request)
-        qs = _apply_filters(qs, request)
-        qs = qs.order_by("-likes_count", "-comments_count", "-published_at", "-created_at")[:30]
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"items": ser.data}, "Popular")
+        """
+        Classement pré-calculé (Redis sorted sets, score décroissant dans le temps):
+        lit une page d'ids puis hydrate les speeches.
+        Avec des filtres (month/category/...) ou sans classement dispo -> tri DB.
+        """
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(max(int(request.query_params.get("page_size", 30)), 1), 50)
+        except (TypeError, ValueError):
+            return bad("page/page_size must be integers", 400)
+
+        filter_keys = ("month", "category", "author", "level_id", "group_id")
+        has_filters = any(_norm(request.query_params.get(k)) for k in filter_keys)
+
+        def build():
+            ids = None
+            if not has_filters:
+                u = request.user
+                ids = read_popular_ids(
+                    _popular_scopes(get_visibility_scope(u, request)),
+                    offset=(page - 1) * page_size,
+                    limit=page_size,
+                    cache_owner=f"user:{u.id}" if u.is_authenticated else None,
+                )
+
+            if ids is not None:
+                # re-vérifie la visibilité (un speech a pu être dépublié depuis le calcul)
+                qs = _apply_visibility_for_feed(self._base_qs(), request).filter(pk__in=ids)
+                by_id = {s.pk: s for s in _with_list_prefetch(qs)}
+                items = [by_id[pk] for pk in ids if pk in by_id]
+            else:
+                qs = _apply_visibility_for_feed(self._base_qs(), request)
+                qs = _apply_filters(qs, request)
+                qs = qs.order_by("-likes_count", "-comments_count", "-published_at", "-created_at")
+                offset = (page - 1) * page_size
+                items = _with_list_prefetch(qs)[offset:offset + page_size]
+
+            return {"items": self._list_items(items, request), "page": page, "ranked": ids is not None}
+
+        return ok(self._feed_payload(request, "popular", build), "Popular")
 
     @action(detail=False, methods=["get"], url_path="latest")
     def latest(self, request):
+        def build():
+            qs = _apply_visibility_for_feed(self._base_qs(), request)
+            qs = _apply_filters(qs, request)
+            qs = _with_list_prefetch(qs.order_by("-published_at", "-created_at"))[:50]
+            return {"items": self._list_items(qs, request)}
+
+        return ok(self._feed_payload(request, "latest", build), "Latest")
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Recherche plein texte (titre, contenu, révision finale), classée par pertinence.
+        Mêmes règles de visibilité et filtres que les feeds.
+        """
+        q = _norm(request.query_params.get("q"))
+        if not q or len(q) < 2:
+            return bad("q is required (min 2 characters)", 400)
+
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), 50)
+        except (TypeError, ValueError):
+            return bad("page/page_size must be integers", 400)
+
         qs = _apply_visibility_for_feed(self._base_qs(), request)
-        qs = _apply_filters(qs, request)
-        qs = qs.order_by("-published_at", "-created_at")[:50]
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"items": ser.data}, "Latest")
+        qs = search_speeches(_apply_filters(qs, request), q)
+
+        offset = (page - 1) * page_size
+        # +1: savoir s'il y a une page suivante sans COUNT(*)
+        items = list(_with_list_prefetch(qs)[offset:offset + page_size + 1])
+        has_next = len(items) > page_size
+        items = items[:page_size]
+
+        return ok({
+            "q": q,
+            "page": page,
+            "has_next": has_next,
+            "items": self._list_items(items, request),
+        }, "Search")
 
     # ─────────────────────────────
     # ✅ TEACHER INBOX (speeches of his students / his classes)
     # ─────────────────────────────
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsTeacher], url_path="teacher/inbox")
     def teacher_inbox(self, request):
+        """
+        Speeches des élèves (groupes speech-teacher de la période), paginés par curseur
+        sur (submitted_at, id) + compteurs par status.
+        ?status=submitted|... &cursor=<next_cursor> &page_size=
+        """
         teacher = request.user.teacher_profile
         group_ids, period = get_teacher_speech_groups(teacher)   # ✅ ici
 
-        qs = (self._base_qs()
-            .filter(period=period, group_id__in=group_ids)
-            .filter(author_type="student")
-            .filter(status__in=["draft","corrected","coached","submitted", "needs_revision", "pending_approval", "published"])
-            .order_by("-submitted_at", "-created_at")[:80])
-        
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 30)), 1), 100)
+        except (TypeError, ValueError):
+            return bad("page_size must be an integer", 400)
+
+        base = Speech.objects.filter(
+            period=period, group_id__in=group_ids,
+            author_type="student", is_deleted=False,
+            status__in=INBOX_STATUSES,
+        )
+
+        # 1 requête: COUNT(*) FILTER (WHERE status=...) par status
+        counts = base.aggregate(**{
+            s: Count("id", filter=Q(status=s)) for s in INBOX_COUNTED_STATUSES
+        })
 
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"items": ser.data}, "Teacher inbox (Speech Teacher) ✅")
+        qs = base.select_related("student__user", "group", "group__level", "group__room")
+        status_filter = _norm_lower(request.query_params.get("status"))
+        if status_filter:
+            if status_filter not in INBOX_STATUSES:
+                return bad("Invalid status", 400)
+            qs = qs.filter(status=status_filter)
+
+        try:
+            items, next_cursor = keyset_paginate(qs, "submitted_at", request.query_params.get("cursor"), page_size)
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        ser = SpeechInboxItemSerializer(items, many=True)
+        return ok({"items": ser.data, "next_cursor": next_cursor, "counts": counts}, "Teacher inbox (Speech Teacher) ✅")
     
     # ──────────────────────────────
     # ✅ TEACHER MY (speeches of his classes)    
     # ──────────────────────────────
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsTeacher], url_path="teacher/my")
     def teacher_my(self, request):
+        """
+        Speeches du teacher, paginés par curseur sur (created_at, id).
+        Détail complet (revisions / coachings): retrieve.
+        """
         teacher = request.user.teacher_profile
-        qs = (self._base_qs()
-            .filter(author_type="teacher", teacher=teacher, is_deleted=False)
-            .order_by("-created_at")[:120])
-        ser = SpeechSerializer(qs, many=True, context={"request": request})
-        return ok({"items": ser.data}, "Teacher my speeches ✅")    
+
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 30)), 1), 100)
+        except (TypeError, ValueError):
+            return bad("page_size must be an integer", 400)
+
+        qs = _with_list_prefetch(
+            self._base_qs().filter(author_type="teacher", teacher=teacher, is_deleted=False)
+        )
+        try:
+            # created_at non nullable: pas de branche isnull dans le cursor
+            items, next_cursor = keyset_paginate(
+                qs, "created_at", request.query_params.get("cursor"), page_size, nullable=False
+            )
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        ser = SpeechListSerializer(items, many=True, context={"request": request})
+        return ok({"items": ser.data, "next_cursor": next_cursor}, "Teacher my speeches ✅")
 
     # ─────────────────────────────
     # Social actions (auth only)
@@ -433,12 +621,10 @@ class SpeechViewSet(ModelViewSet):
         if request.user.role == "teacher" and (not speech.teacher_id or speech.teacher.user_id != request.user.id):
             return bad("Not allowed", 403)
 
-        if speech.status not in ["draft", "needs_revision"]:
-            return bad("Cannot submit in current status", 400)
-
-        speech.status = "submitted"
-        speech.submitted_at = timezone.now()
-        speech.save(update_fields=["status", "submitted_at"])
+        try:
+            submit_speech(speech)
+        except InvalidTransition as e:
+            return bad(str(e), 400)
         return ok({"speech": SpeechSerializer(speech, context={"request": request}).data}, "Submitted ✅")
 
 
@@ -464,19 +650,9 @@ class SpeechViewSet(ModelViewSet):
         if not revised_content:
             return bad("revised_content is required", 400)
 
-        last = SpeechRevision.objects.filter(speech=speech).order_by("-version").first()
-        next_version = (last.version + 1) if last else 1
-
         with transaction.atomic():
-            # 1) create revision
-            rev = SpeechRevision.objects.create(
-                speech=speech,
-                version=next_version,
-                revised_by=request.user,
-                revised_content=revised_content,
-                notes=notes,
-                is_final=is_final,
-            )
+            # 1) create revision (delta vs version précédente, cf. services/revisions.py)
+            rev = create_revision(speech, request.user, revised_content, notes=notes, is_final=is_final)
 
             # 2) optional speech update
             speech_fields = []
@@ -497,18 +673,16 @@ class SpeechViewSet(ModelViewSet):
                 speech.cover_image = new_cover
                 speech_fields.append("cover_image")
 
-            # 3) status
-            if speech.status != "published":
-                speech.status = "corrected"
-                speech_fields.append("status")
-
-            # save speech only if something changed
-            if speech_fields:
-                speech.save(update_fields=list(set(speech_fields)))
+            # 3) status (+ champs modifiés, 1 seul save)
+            try:
+                mark_corrected(speech, extra_fields=speech_fields)
+            except InvalidTransition as e:
+                transaction.set_rollback(True)
+                return bad(str(e), 400)
 
         return ok(
             {
-                "revision": SpeechRevisionSerializer(rev).data,
+                "revision": SpeechRevisionSerializer(rev, context={"include_revision_content": True}).data,
                 "speech": SpeechSerializer(speech, context={"request": request}).data,
             },
             "Correction saved ✅",
@@ -536,12 +710,11 @@ class SpeechViewSet(ModelViewSet):
         if not _is_admin(request.user) and rev.revised_by_id != request.user.id:
             return bad("Not allowed", 403)
 
-        rev.delete()
+        # versions suivantes ré-encodées (leurs deltas pointaient sur celle-ci)
+        remove_revision(rev)
 
         # (optionnel) status recalcul
-        if not speech.revisions.exists() and speech.status == "corrected":
-            speech.status = "submitted" if speech.submitted_at else "draft"
-            speech.save(update_fields=["status"])
+        revert_after_revision_removed(speech)
 
         return ok({"deleted": True, "revision_id": int(revision_id)}, "Revision deleted ✅")
     
@@ -584,19 +757,12 @@ class SpeechViewSet(ModelViewSet):
 
         with transaction.atomic():
             # update revision
-            rev_fields = []
-            if revised_content is not None:
-                rev.revised_content = str(revised_content).strip()
-                rev_fields.append("revised_content")
-            if notes is not None:
-                rev.notes = str(notes).strip()
-                rev_fields.append("notes")
-            if is_final is not None:
-                rev.is_final = bool(is_final)
-                rev_fields.append("is_final")
-
-            if rev_fields:
-                rev.save(update_fields=rev_fields)
+            rev = change_revision(
+                rev,
+                content=str(revised_content).strip() if revised_content is not None else None,
+                notes=str(notes).strip() if notes is not None else None,
+                is_final=bool(is_final) if is_final is not None else None,
+            )
 
             # update speech (optional)
             speech_fields = []
@@ -618,11 +784,37 @@ class SpeechViewSet(ModelViewSet):
 
         return ok(
             {
-                "revision": SpeechRevisionSerializer(rev).data,
+                "revision": SpeechRevisionSerializer(rev, context={"include_revision_content": True}).data,
                 "speech": SpeechSerializer(speech, context={"request": request}).data,
             },
             "Revision updated ✅",
         )
+
+    @action(detail=True, methods=["get"], url_path="revision-diff")
+    def revision_diff(self, request, pk=None):
+        """
+        ?from=<version>&to=<version> (défaut: dernière version vs précédente)
+        -> segments equal / insert / delete (mots).
+        """
+        speech = self.get_object()
+        versions = list(speech.revisions.order_by("version").values_list("version", flat=True))
+        if not versions:
+            return bad("No revisions", 404)
+
+        try:
+            to_v = int(request.query_params.get("to") or versions[-1])
+            if request.query_params.get("from"):
+                from_v = int(request.query_params.get("from"))
+            else:
+                older = [v for v in versions if v < to_v]
+                from_v = older[-1] if older else to_v
+        except ValueError:
+            return bad("from/to must be integers", 400)
+
+        segments = diff_versions(speech.id, from_v, to_v)
+        if segments is None:
+            return bad("Revision not found", 404)
+        return ok({"from": from_v, "to": to_v, "segments": segments}, "Revision diff")
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsTeacher], url_path="coach")
     def coach(self, request, pk=None):
         speech = self.get_object()
@@ -638,8 +830,11 @@ class SpeechViewSet(ModelViewSet):
                 word_tips=word_tips if isinstance(word_tips, list) else [],
                 is_final=is_final,
             )
-            speech.status = "coached"
-            speech.save(update_fields=["status"])
+            try:
+                mark_coached(speech)
+            except InvalidTransition as e:
+                transaction.set_rollback(True)
+                return bad(str(e), 400)
 
         return ok({"coaching": SpeechCoachingSerializer(c).data}, "Coaching saved ✅")
     
@@ -669,12 +864,7 @@ class SpeechViewSet(ModelViewSet):
         c.delete()
 
         # (optionnel) status recalcul
-        if not speech.coachings.exists() and speech.status == "coached":
-            if speech.revisions.exists():
-                speech.status = "corrected"
-            else:
-                speech.status = "submitted" if speech.submitted_at else "draft"
-            speech.save(update_fields=["status"])
+        revert_after_coaching_removed(speech)
 
         return ok({"deleted": True, "coaching_id": int(coaching_id)}, "Coaching deleted ✅")
     
@@ -715,33 +905,92 @@ class SpeechViewSet(ModelViewSet):
 
     @action(detail=True, methods=["post"], url_path="upload-audio")
     def upload_audio(self, request, pk=None):
+        """
+        Upload en 1 requête (petits fichiers). Pour les enregistrements longs
+        sur réseau mobile: audio-uploads (par morceaux, reprise possible).
+        """
         speech = self.get_object()
         kind = (request.data.get("kind") or "").strip()
         f = request.FILES.get("audio_file")
 
-        if kind not in ["student_recording", "teacher_coaching", "tts"]:
-            return bad("Invalid kind", 400)
+        err = _check_audio_kind(request.user, kind)
+        if err:
+            return err
         if not f:
             return bad("audio_file is required", 400)
 
-        if kind == "student_recording" and request.user.role != "student":
-            return bad("Only students can upload student recordings", 403)
-        if kind == "teacher_coaching" and request.user.role != "teacher":
-            return bad("Only teachers can upload coaching audio", 403)
-
-        a = SpeechAudio.objects.create(
-            speech=speech,
-            kind=kind,
-            uploaded_by=request.user,
-            audio_file=f,
-            duration_sec=request.data.get("duration_sec") or None,
-            engine=(request.data.get("engine") or "").strip(),
-            voice_name=(request.data.get("voice_name") or "").strip(),
-            is_primary=bool(request.data.get("is_primary", False)),
-        )
+        with transaction.atomic():
+            a = SpeechAudio.objects.create(
+                speech=speech,
+                kind=kind,
+                uploaded_by=request.user,
+                audio_file=f,
+                # durée envoyée par le client = provisoire, remplacée par ffprobe
+                duration_sec=request.data.get("duration_sec") or None,
+                engine=(request.data.get("engine") or "").strip(),
+                voice_name=(request.data.get("voice_name") or "").strip(),
+                is_primary=bool(request.data.get("is_primary", False)),
+                processing_status="pending",
+                content_type=getattr(f, "content_type", "") or "",
+                size_bytes=f.size,
+            )
+            enqueue_processing(a.id)
 
         return ok({"audio": SpeechAudioSerializer(a, context={"request": request}).data}, "Audio uploaded ✅")
-    
+
+    @action(detail=True, methods=["post"], parser_classes=[JSONParser], url_path="audio-uploads")
+    def start_audio_upload(self, request, pk=None):
+        """
+        Ouvre une session d'upload par morceaux:
+        -> PUT /speech-audio-uploads/<id>/chunk/ (Content-Range) puis POST .../finalize/
+        """
+        speech = self.get_object()
+        kind = (request.data.get("kind") or "").strip()
+
+        err = _check_audio_kind(request.user, kind)
+        if err:
+            return err
+
+        try:
+            total_size = int(request.data.get("total_size") or 0)
+        except (TypeError, ValueError):
+            return bad("total_size must be an integer", 400)
+
+        try:
+            upload = start_upload(
+                speech=speech,
+                user=request.user,
+                kind=kind,
+                filename=(request.data.get("filename") or "").strip(),
+                content_type=(request.data.get("content_type") or "").strip(),
+                total_size=total_size,
+                is_primary=bool(request.data.get("is_primary", False)),
+            )
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        return ok({"upload": SpeechAudioUploadSerializer(upload).data}, "Upload started", status=201)
+
+    @action(detail=True, methods=["get"], url_path=r"audios/(?P<audio_id>[^/.]+)/stream")
+    def stream_audio(self, request, pk=None, audio_id=None):
+        """
+        Lecture audio avec HTTP Range (seek + reprise sur mobile).
+        """
+        speech = self.get_object()
+        if not _can_listen(request, speech):
+            return bad("Not allowed", 403)
+
+        try:
+            audio = SpeechAudio.objects.get(id=int(audio_id), speech=speech)
+        except (ValueError, SpeechAudio.DoesNotExist):
+            return bad("Audio not found", 404)
+        if not audio.audio_file:
+            return bad("Audio is still processing", 409)
+
+        fh = audio.audio_file.open("rb")
+        content_type = audio.content_type or mimetypes.guess_type(audio.audio_file.name)[0] or "application/octet-stream"
+        return ranged_file_response(request, fh, audio.audio_file.size, content_type)
+
     @action(
     detail=True,
     methods=["delete"],
@@ -792,8 +1041,10 @@ class SpeechViewSet(ModelViewSet):
             if not has_final_coach:
                 return bad("Teacher final coaching is required before publish.", 400)
 
-        speech.status = "pending_approval"
-        speech.save(update_fields=["status"])
+        try:
+            request_publication(speech)
+        except InvalidTransition as e:
+            return bad(str(e), 400)
         return ok({"speech": SpeechSerializer(speech, context={"request": request}).data}, "Sent for approval ✅")
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsPrincipal], url_path="decide")
@@ -807,33 +1058,40 @@ class SpeechViewSet(ModelViewSet):
         if speech.status != "pending_approval":
             return bad("Speech is not pending approval", 400)
 
-        with transaction.atomic():
-            SpeechApproval.objects.update_or_create(
-                speech=speech,
-                defaults={
-                    "decided_by": request.user,
-                    "decision": decision,
-                    "reason": reason,
-                    "decided_at": timezone.now(),
-                },
+        # même chemin que bulk-decide: approval + notification auteur + invalidation du feed
+        try:
+            decide_speeches(
+                [speech.pk], request.user, decision,
+                reason=reason, visibility=(request.data.get("visibility") or "").strip(),
             )
+        except ValueError as e:
+            return bad(str(e), 400)
+        speech.refresh_from_db()
+        msg = "Approved & Published ✅" if decision == "approve" else "Rejected ❌"
 
-            if decision == "approve":
-                speech.status = "published"
-                speech.published_at = timezone.now()
+        return ok({"speech": SpeechSerializer(speech, context={"request": request}).data}, msg)
 
-                vis = (request.data.get("visibility") or "").strip()
-                if vis in ["private", "class", "school", "public"]:
-                    speech.visibility = vis
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsPrincipal], url_path="bulk-decide")
+    def bulk_decide(self, request):
+        """
+        {"speech_ids": [...], "decision": "approve"|"reject", "reason": "", "visibility": "public"}
+        1 transaction; les speeches non "pending_approval" sont ignorés (skipped).
+        """
+        speech_ids = request.data.get("speech_ids") or []
+        decision = (request.data.get("decision") or "").strip()
+        if not isinstance(speech_ids, list) or not speech_ids:
+            return bad("speech_ids must be a non-empty list", 400)
 
-                speech.save(update_fields=["status", "published_at", "visibility"])
-                msg = "Approved & Published ✅"
-            else:
-                speech.status = "rejected"
-                speech.save(update_fields=["status"])
-                msg = "Rejected ❌"
+        try:
+            result = decide_speeches(
+                speech_ids, request.user, decision,
+                reason=(request.data.get("reason") or "").strip(),
+                visibility=(request.data.get("visibility") or "").strip(),
+            )
+        except (TypeError, ValueError) as e:
+            return bad(str(e), 400)
 
-        return ok({"speech": SpeechSerializer(speech, context={"request": request}).data}, msg)
+        return ok(result, f"{len(result['approved']) + len(result['rejected'])} speeches decided ✅")
 
     # ─────────────────────────────
     # Social actions
@@ -844,9 +1102,15 @@ class SpeechViewSet(ModelViewSet):
         if speech.status != "published":
             return bad("Not published", 400)
 
-        obj, created = SpeechLike.objects.get_or_create(speech=speech, user=request.user)
+        with transaction.atomic():
+            obj, created = SpeechLike.objects.get_or_create(speech=speech, user=request.user)
+            if not created:
+                obj.delete()
+                bump_likes(speech.id, -1)
+            else:
+                bump_likes(speech.id, +1)
+
         if not created:
-            obj.delete()
             return ok({"liked": False}, "Unliked")
         return ok({"liked": True}, "Liked")
 
@@ -861,27 +1125,110 @@ class SpeechViewSet(ModelViewSet):
             print("Content is empty")
             return bad("content is required", 400)
 
-        c = SpeechComment.objects.create(speech=speech, user=request.user, content=content)
-        return ok({"comment": {"id": c.id, "content": c.content}}, "Comment added ✅")
+        with transaction.atomic():
+            c = SpeechComment.objects.create(
+                speech=speech,
+                user=request.user,
+                user_display_name=SpeechComment.display_name_for(request.user),
+                content=content,
+            )
+            bump_comments(speech.id, +1)
+        return ok({"comment": SpeechCommentSerializer(c).data}, "Comment added ✅")
     
     @action(detail=True, methods=["get"], url_path="comments")
     def comments(self, request, pk=None):
+        """
+        Fil paginé par curseur sur (created_at, id), plus récents d'abord.
+        ?cursor=<next_cursor>&page_size=
+        """
         speech = self.get_object()
 
         # ✅ seulement published si tu veux
         if speech.status != "published":
-            print("Speech not published, cannot show comments")
-            return ok({"items": []}, "Not published")
+            return ok({"items": [], "next_cursor": None}, "Not published")
+
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 30)), 1), 100)
+        except (TypeError, ValueError):
+            return bad("page_size must be an integer", 400)
 
-        qs = (SpeechComment.objects
-              .filter(speech=speech, is_hidden=False)
-              .select_related("user")
-              .order_by("-created_at")[:200])
+        qs = SpeechComment.objects.filter(speech=speech, is_hidden=False)
+        try:
+            # created_at non nullable: l'ordre correspond à speech_comment_thread_idx
+            items, next_cursor = keyset_paginate(
+                qs, "created_at", request.query_params.get("cursor"), page_size, nullable=False
+            )
+        except ValueError as e:
+            return bad(str(e), 400)
 
-        ser = SpeechCommentSerializer(qs, many=True)
-        return ok({"items": ser.data}, "Comments")
+        ser = SpeechCommentSerializer(items, many=True)
+        return ok({"items": ser.data, "next_cursor": next_cursor}, "Comments")
   
     
     
     
-    
\ No newline at end of file
+    
+
+
+# ─────────────────────────────────────────────
+# Chunked audio upload (sessions)
+# ─────────────────────────────────────────────
+class SpeechAudioUploadViewSet(GenericViewSet):
+    """
+    GET  /speech-audio-uploads/<id>/           -> offset reçu (reprise après coupure)
+    PUT  /speech-audio-uploads/<id>/chunk/     -> body brut + Content-Range: bytes start-end/total
+    POST /speech-audio-uploads/<id>/finalize/  -> SpeechAudio "pending" + transcodage en tâche de fond
+    """
+    serializer_class = SpeechAudioUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SpeechAudioUpload.objects.filter(uploaded_by=self.request.user)
+
+    def retrieve(self, request, pk=None):
+        return ok({"upload": self.get_serializer(self.get_object()).data}, "Upload")
+
+    @action(detail=True, methods=["put"], url_path="chunk")
+    def chunk(self, request, pk=None):
+        upload = self.get_object()
+
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return bad("Content-Length is required", 411)
+
+        content_range = (request.META.get("HTTP_CONTENT_RANGE") or "").strip()
+        try:
+            if content_range:
+                # "bytes 0-1048575/5242880"
+                unit, _, spec = content_range.partition(" ")
+                start, _, end = spec.split("/", 1)[0].partition("-")
+                offset = int(start)
+                if unit != "bytes" or int(end) - offset + 1 != length:
+                    raise ValueError
+            else:
+                offset = int(request.query_params.get("offset", upload.received_bytes))
+        except ValueError:
+            return bad("Invalid Content-Range", 400)
+
+        try:
+            # request.stream: body lu par blocs (pas de parser, pas de copie en mémoire)
+            received = write_chunk(upload, offset, request.stream, length)
+        except UploadOffsetMismatch as e:
+            return bad(str(e), 409, data={"received_bytes": e.expected_offset})
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        return ok({"received_bytes": received, "total_size": upload.total_size}, "Chunk received")
+
+    @action(detail=True, methods=["post"], url_path="finalize")
+    def finalize(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            audio = finalize_upload(upload)
+        except UploadOffsetMismatch as e:
+            return bad("Upload is incomplete", 409, data={"received_bytes": e.expected_offset})
+        except ValueError as e:
+            return bad(str(e), 400)
+
+        return ok({"audio": SpeechAudioSerializer(audio, context={"request": request}).data}, "Audio uploaded ✅")
@@ -1,3 +1,98 @@
+from datetime import time, timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.abc_apps.accounts.models import StudentProfile, TeacherProfile, User
+from apps.abc_apps.academics.models import (
+    AcademicLevel,
+    AcademicPeriod,
+    Course,
+    MonthlyClassGroup,
+    Room,
+    StudentMonthlyEnrollment,
+    TeacherCourseAssignment,
+)
+from apps.abc_apps.app_teacher.models import (
+    Homework,
+    StudentMonthlyObjective,
+    StudentProofScan,
+    StudentRemark,
+    WeeklyTeachingPlan,
+)
+
+
+class StudentHomeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        period, _ = AcademicPeriod.objects.get_or_create(year=today.year, month=today.month)
+        group = MonthlyClassGroup.objects.create(
+            period=period,
+            level=AcademicLevel.objects.create(code="FOUNDATION_1", label="Foundation 1", order=1),
+            group_name="A",
+            room=Room.objects.create(code="R1", name="Room 1"),
+            start_time=time(8, 15),
+        )
+        user = User.objects.create_user(username="student", email="student@example.com", password="x", role="student")
+        cls.student = StudentProfile.objects.create(user=user, student_code="ST-000", current_level="", group_name="")
+        cls.enrollment = StudentMonthlyEnrollment.objects.create(
+            period=period, student=cls.student, group=group, status="active"
+        )
+
+        # plusieurs lignes par section (détecte les requêtes par ligne)
+        teacher = TeacherProfile.objects.create(
+            user=User.objects.create_user(username="teacher", email="t@example.com", password="x", role="teacher"),
+            teacher_code="T0001",
+        )
+        monday = today - timedelta(days=today.weekday())
+        scope = {"teacher": teacher, "period": period}
+        for i, purpose in enumerate(["book_completed", "exam_eligible", "attendance_proof"]):
+            course = Course.objects.create(name=f"Course {i}")
+            TeacherCourseAssignment.objects.create(
+                teacher=teacher, classroom=group.room, course=course, start_date=today,
+                period=period, monthly_group=group,
+            )
+            WeeklyTeachingPlan.objects.create(
+                **scope, monthly_group=group, course=course, week_start=monday - timedelta(weeks=i)
+            )
+            Homework.objects.create(**scope, group=group, course=course, title=f"Homework {i}")
+            StudentRemark.objects.create(
+                **scope, group=group, student=cls.student, course=course, area="grammar", observation="..."
+            )
+            StudentProofScan.objects.create(
+                **scope, group=group, student=cls.student, course=course, purpose=purpose
+            )
+        StudentMonthlyObjective.objects.create(**scope, group=group, student=cls.student)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_home_returns_requested_sections_only(self):
+        response = self.client.get("/api/student/home/", {"fields": "homeworks,objectives"})
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(set(data), {"enrollment", "homeworks", "objectives"})
+        self.assertEqual(data["enrollment"]["id"], self.enrollment.id)
+
+    def test_home_all_sections_and_unknown_field(self):
+        response = self.client.get("/api/student/home/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("proof_scans", response.data["data"])
+
+        self.assertEqual(self.client.get("/api/student/home/", {"fields": "grades"}).status_code, 400)
 
-# Create your tests here.
+    def test_home_query_count_is_bounded(self):
+        # user rechargé: student_profile non mis en cache
+        self.client.force_authenticate(User.objects.get(pk=self.student.user_id))
+        # student_profile + enrollment + 1 par section
+        with self.assertNumQueries(2 + 6):
+            response = self.client.get("/api/student/home/")
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        for section in ("assignments", "weekly_plans", "homeworks", "remarks", "proof_scans"):
+            self.assertEqual(len(data[section]), 3, section)
+        self.assertEqual(len(data["objectives"]), 1)
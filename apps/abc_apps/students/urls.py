@@ -7,9 +7,11 @@ from .views import (
     StudentObjectivesViewSet,
     StudentRemarksViewSet,
     StudentProofScansViewSet,
+    StudentHomeViewSet,
 )
 
 router = DefaultRouter()
+router.register(r"student/home", StudentHomeViewSet, basename="student-home")
 router.register(r"student/dashboard", StudentDashboardViewSet, basename="student-dashboard")
 router.register(r"student/weekly-plans", StudentWeeklyPlanViewSet, basename="student-weekly-plans")
 router.register(r"student/homeworks", StudentHomeworkViewSet, basename="student-homeworks")
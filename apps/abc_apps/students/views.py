@@ -18,11 +18,118 @@ from apps.abc_apps.app_teacher.serializers import (
     StudentMonthlyObjectiveSerializer,
     StudentProofScanSerializer,
 )
+from apps.abc_apps.commons.http import ConditionalGetMixin, latest, queryset_version
 from apps.common.permissions import IsStudent
 from apps.common.responses import bad, ok
 
+HOME_SECTIONS = ("assignments", "weekly_plans", "homeworks", "objectives", "remarks", "proof_scans")
+HOME_REMARKS_LIMIT = 20
 
-class StudentDashboardViewSet(ViewSet):
+
+# ---------------------------
+# Querysets partagés (endpoints unitaires + student/home)
+# select_related = tout ce que lisent les serializers (group.label -> level + room, period.key, *.user):
+# 1 requête par section quel que soit le nombre de lignes
+# ---------------------------
+def current_enrollment(student, *related):
+    return StudentMonthlyEnrollment.objects.select_related("group", "period", *related).filter(
+        student=student
+    ).order_by("-period__year", "-period__month").first()
+
+
+def assignments_qs(current):
+    return TeacherCourseAssignment.objects.select_related(
+        "teacher__user", "course", "classroom", "period", "monthly_group__level", "monthly_group__room"
+    ).filter(monthly_group=current.group, period=current.period)
+
+
+def weekly_plans_qs(current):
+    return WeeklyTeachingPlan.objects.filter(
+        monthly_group=current.group,
+        period=current.period,
+    ).select_related("course", "teacher__user", "period", "monthly_group__level", "monthly_group__room")
+
+
+def homeworks_qs(current):
+    return Homework.objects.filter(
+        group=current.group,
+        period=current.period,
+    ).select_related(
+        "course", "teacher__user", "period", "group__level", "group__room"
+    ).order_by("-created_at")
+
+
+def objectives_qs(student, current):
+    return StudentMonthlyObjective.objects.filter(
+        student=student,
+        group=current.group,
+        period=current.period,
+    ).select_related("student__user", "period", "group__level", "group__room").order_by("-created_at")
+
+
+def remarks_qs(student, current):
+    return StudentRemark.objects.filter(
+        student=student,
+        group=current.group,
+        period=current.period,
+    ).select_related("course", "teacher__user", "student__user", "period", "group__level", "group__room")
+
+
+def proof_scans_qs(student, current):
+    return StudentProofScan.objects.filter(
+        student=student,
+        group=current.group,
+        period=current.period,
+    ).select_related(
+        "course", "student__user", "period", "group__level", "group__room"
+    ).order_by("-scanned_at")
+
+
+class StudentHomeViewSet(ViewSet):
+    permission_classes = [IsAuthenticated, IsStudent]
+
+    def list(self, request):
+        """
+        GET /api/student/home/?fields=assignments,homeworks
+        Démarrage de l'app en 1 appel: enrollment résolu 1 fois, 1 requête par section demandée.
+        """
+        student = request.user.student_profile
+
+        fields = request.query_params.get("fields")
+        if fields:
+            sections = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = sorted(set(sections) - set(HOME_SECTIONS))
+            if unknown:
+                return bad(f"Unknown fields: {', '.join(unknown)}", status_code=400)
+        else:
+            sections = HOME_SECTIONS
+
+        current = current_enrollment(student, "group__room", "group__level", "student__user")
+        if not current:
+            return ok({"enrollment": None}, message="No enrollment")
+
+        builders = {
+            "assignments": lambda: TeacherCourseAssignmentSerializer(assignments_qs(current), many=True).data,
+            "weekly_plans": lambda: WeeklyTeachingPlanSerializer(
+                weekly_plans_qs(current).order_by("-week_start", "course__name"), many=True
+            ).data,
+            "homeworks": lambda: HomeworkSerializer(homeworks_qs(current), many=True).data,
+            "objectives": lambda: StudentMonthlyObjectiveSerializer(objectives_qs(student, current), many=True).data,
+            "remarks": lambda: StudentRemarkSerializer(
+                remarks_qs(student, current).order_by("-created_at")[:HOME_REMARKS_LIMIT],
+                many=True,
+            ).data,
+            "proof_scans": lambda: StudentProofScanSerializer(proof_scans_qs(student, current), many=True).data,
+        }
+
+        data = {"enrollment": StudentMonthlyEnrollmentSerializer(current).data}
+        for section in HOME_SECTIONS:
+            if section in sections:
+                data[section] = builders[section]()
+        return ok(data, message="Student home")
+
+
+class StudentDashboardViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def list(self, request):
@@ -46,17 +153,22 @@ class StudentDashboardViewSet(ViewSet):
             return ok({"enrollment": None}, message="No enrollment")
 
         # teacher assignments for that group/period
-        assignments = TeacherCourseAssignment.objects.select_related(
-            "teacher__user", "course", "classroom", "period", "monthly_group"
-        ).filter(monthly_group=current.group, period=current.period)
-
-        return ok({
-            "enrollment": StudentMonthlyEnrollmentSerializer(current).data,
-            "assignments": TeacherCourseAssignmentSerializer(assignments, many=True).data,
-        }, message="Student dashboard")
+        assignments = assignments_qs(current)
+
+        count, last = queryset_version(assignments)
+        last = latest(last, current.updated_at, current.group.updated_at)
+        return self.conditional_response(
+            request,
+            (current.id, current.updated_at, current.group.updated_at, count, last),
+            lambda: ok({
+                "enrollment": StudentMonthlyEnrollmentSerializer(current).data,
+                "assignments": TeacherCourseAssignmentSerializer(assignments, many=True).data,
+            }, message="Student dashboard"),
+            last_modified=last,
+        )
 
 
-class StudentWeeklyPlanViewSet(ViewSet):
+class StudentWeeklyPlanViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def list(self, request):
@@ -67,17 +179,12 @@ class StudentWeeklyPlanViewSet(ViewSet):
         week_start = request.query_params.get("week_start")
         course_id = request.query_params.get("course")
 
-        current = StudentMonthlyEnrollment.objects.select_related("group", "period").filter(
-            student=student
-        ).order_by("-period__year", "-period__month").first()
+        current = current_enrollment(student)
 
         if not current:
             return bad("No enrollment found", status_code=403)
 
-        qs = WeeklyTeachingPlan.objects.filter(
-            monthly_group=current.group,
-            period=current.period,
-        ).select_related("course", "teacher__user")
+        qs = weekly_plans_qs(current)
 
         if week_start:
             qs = qs.filter(week_start=week_start)
@@ -86,10 +193,16 @@ class StudentWeeklyPlanViewSet(ViewSet):
 
         qs = qs.order_by("-week_start", "course__name")
 
-        return ok({"items": WeeklyTeachingPlanSerializer(qs, many=True).data}, message="Weekly plans")
+        count, last = queryset_version(qs)
+        return self.conditional_response(
+            request,
+            (current.group_id, current.period_id, count, last),
+            lambda: ok({"items": WeeklyTeachingPlanSerializer(qs, many=True).data}, message="Weekly plans"),
+            last_modified=last,
+        )
 
 
-class StudentHomeworkViewSet(ViewSet):
+class StudentHomeworkViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def list(self, request):
@@ -97,18 +210,12 @@ class StudentHomeworkViewSet(ViewSet):
         course_id = request.query_params.get("course")
         teacher_id = request.query_params.get("teacher")  # ✅ NEW
 
-        current = StudentMonthlyEnrollment.objects.select_related("group", "period") \
-            .filter(student=student) \
-            .order_by("-period__year", "-period__month") \
-            .first()
+        current = current_enrollment(student)
 
         if not current:
             return bad("No enrollment", status_code=403)
 
-        qs = Homework.objects.filter(
-            group=current.group,
-            period=current.period,
-        ).select_related("course", "teacher__user").order_by("-created_at")
+        qs = homeworks_qs(current)
 
         if course_id:
             qs = qs.filter(course_id=course_id)
@@ -116,26 +223,32 @@ class StudentHomeworkViewSet(ViewSet):
         if teacher_id:
             qs = qs.filter(teacher_id=teacher_id)  # ✅ NEW
 
-        return ok({"items": HomeworkSerializer(qs, many=True).data}, message="Homeworks")
+        count, last = queryset_version(qs)
+        return self.conditional_response(
+            request,
+            (current.group_id, current.period_id, count, last),
+            lambda: ok({"items": HomeworkSerializer(qs, many=True).data}, message="Homeworks"),
+            last_modified=last,
+        )
 
-class StudentObjectivesViewSet(ViewSet):
+class StudentObjectivesViewSet(ConditionalGetMixin, ViewSet):
     permission_classes = [IsAuthenticated, IsStudent]
 
     def list(self, request):
         student = request.user.student_profile
-        current = StudentMonthlyEnrollment.objects.select_related("group", "period").filter(
-            student=student
-        ).order_by("-period__year", "-period__month").first()
+        current = current_enrollment(student)
         if not current:
             return bad("No enrollment", status_code=403)
 
-        qs = StudentMonthlyObjective.objects.filter(
-            student=student,
-            group=current.group,
-            period=current.period,
-        ).order_by("-created_at")
+        qs = objectives_qs(student, current)
 
-        return ok({"items": StudentMonthlyObjectiveSerializer(qs, many=True).data}, message="Objectives")
+        count, last = queryset_version(qs)
+        return self.conditional_response(
+            request,
+            (current.group_id, current.period_id, count, last),
+            lambda: ok({"items": StudentMonthlyObjectiveSerializer(qs, many=True).data}, message="Objectives"),
+            last_modified=last,
+        )
 
 
 class StudentRemarksViewSet(ViewSet):
@@ -170,11 +283,7 @@ class StudentRemarksViewSet(ViewSet):
         if not current:
             return bad("No enrollment", status_code=403)
 
-        qs = StudentRemark.objects.filter(
-            student=student,
-            group=current.group,
-            period=current.period,
-        )
+        qs = remarks_qs(student, current)
 
         # ✅ server filters
         if course_id:
@@ -189,7 +298,7 @@ class StudentRemarksViewSet(ViewSet):
                 Q(title__icontains=q) | Q(remark__icontains=q)
             )
 
-        qs = qs.select_related("course", "teacher__user").order_by("-created_at")[:limit]
+        qs = qs.order_by("-created_at")[:limit]
 
         return ok(
             {"items": StudentRemarkSerializer(qs, many=True).data},
@@ -201,16 +310,10 @@ class StudentProofScansViewSet(ViewSet):
 
     def list(self, request):
         student = request.user.student_profile
-        current = StudentMonthlyEnrollment.objects.select_related("group", "period").filter(
-            student=student
-        ).order_by("-period__year", "-period__month").first()
+        current = current_enrollment(student)
         if not current:
             return bad("No enrollment", status_code=403)
 
-        qs = StudentProofScan.objects.filter(
-            student=student,
-            group=current.group,
-            period=current.period,
-        ).select_related("course").order_by("-scanned_at")
+        qs = proof_scans_qs(student, current)
 
         return ok({"items": StudentProofScanSerializer(qs, many=True).data}, message="Proof scans")
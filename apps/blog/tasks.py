@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from apps.blog.models import Post
+from apps.blog.services_translate import translate_missing_fields
+
+
+@shared_task(soft_time_limit=120, time_limit=150)
+def translate_post_task(post_id):
+    """
+    Fill missing fr/en translations of a post (queue: translation).
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if not post:
+        return {"status": "missing", "post_id": post_id}
+
+    translate_missing_fields(post)
+    return {"status": "ok", "post_id": post_id}
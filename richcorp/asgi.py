@@ -1,16 +1,20 @@
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-
-from apps.website.routing import websocket_urlpatterns
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'richcorp.settings_conf.production')
 
+# ⚠️ initialiser Django avant d'importer les consumers (ils importent des models)
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+
+from apps.website.routing import websocket_urlpatterns  # noqa: E402
+from apps.abc_apps.library.routing import websocket_urlpatterns as library_websocket_urlpatterns  # noqa: E402
+
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
-        URLRouter(websocket_urlpatterns)  # 👈 plus vide !
+        URLRouter(websocket_urlpatterns + library_websocket_urlpatterns)  # 👈 plus vide !
     ),
 })
-
@@ -1,36 +1,102 @@
+import logging
 import os
+from time import sleep, monotonic
+
 from celery import Celery
-from time import sleep
-from celery.schedules import crontab
+from celery.signals import task_prerun, task_postrun
+from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'richcorp.settings_conf.production')
 
 app = Celery('richcorp')
 
+logger = logging.getLogger("richcorp.celery")
+
 
 # Using a string here means the worker doesn't have to serialize
 # the configuration object to child processes.
 # - namespace='CELERY' means all celery-related configuration keys should have a `CELERY_` prefix.
+# NB: beat_schedule vient de settings (CELERY_BEAT_SCHEDULE), ne pas l'écraser ici.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
-CELERYD_POOL = 'solo'
 
 
-app.config_from_object("django.conf:settings", namespace="CELERY")
-app.autodiscover_tasks()
+# ─────────────────────────────────────────────
+# Queues (1 worker par profil, voir docker-compose.yml)
+# - scan         : side-effects des scans QR/NFC (I/O court)      -> threads
+# - reminders    : rappels library / notifications (I/O)           -> threads
+# - translation  : Google Translate (I/O lent, réseau)             -> threads
+# - media        : images / audio / QR (CPU)                       -> prefork
+# - reports      : jobs batch DB (réinscriptions, périodes, exports) -> prefork
+# ─────────────────────────────────────────────
+app.conf.task_default_queue = "default"
+app.conf.task_queues = (
+    Queue("default"),
+    Queue("scan"),
+    Queue("reminders"),
+    Queue("translation"),
+    Queue("media"),
+    Queue("reports"),
+)
 
-# Configuration des tâches périodiques  avec Celery Beat
-app.conf.beat_schedule = {
-    # rappelle les réunions toutes les heures
-    "check-meeting-reminders-every-hour": {
-        "task": "app_notifications.tasks_meet_and_news.process_meeting_reminders_task",
-        "schedule": crontab(minute=0, hour="*"),  # toutes les heures pile
-    },
+app.conf.task_routes = {
+    # scan side-effects
+    "apps.abc_apps.attendance.tasks.record_scan_*": {"queue": "scan"},
+    # reminders
+    "apps.library.tasks.*": {"queue": "reminders"},
+    "apps.abc_apps.library.tasks.*": {"queue": "reminders"},
+    # translation
+    "apps.blog.tasks.translate_*": {"queue": "translation"},
+    # batch / nightly
+    "apps.abc_apps.attendance.tasks.process_reenrollment_*": {"queue": "reports"},
+    "apps.abc_apps.academics.tasks.*": {"queue": "reports"},
+    "apps.abc_apps.speeches.tasks.rank_*": {"queue": "reports"},
+    # media (CPU: ffmpeg)
+    "apps.abc_apps.speeches.tasks.process_speech_audio": {"queue": "media"},
+    "apps.abc_apps.attendance.tasks.build_qr_sheet_*": {"queue": "media"},
 }
 
+# un worker ne réserve qu'une tâche à la fois: une tâche lente ne bloque
+# pas les suivantes déjà prefetchées
+app.conf.worker_prefetch_multiplier = 1
+app.conf.task_acks_late = True
+app.conf.task_reject_on_worker_lost = True
+
+# limites par défaut (surchargées par tâche via soft_time_limit / time_limit)
+app.conf.task_soft_time_limit = 5 * 60
+app.conf.task_time_limit = 6 * 60
+
+
+# ─────────────────────────────────────────────
+# Métriques: durée de chaque tâche (logs)
+# ─────────────────────────────────────────────
+SLOW_TASK_SECONDS = 30
+
+_task_started = {}
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = monotonic()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+
+    duration = monotonic() - started
+    queue = (task.request.delivery_info or {}).get("routing_key", "") if task else ""
+    level = logging.WARNING if duration >= SLOW_TASK_SECONDS else logging.INFO
+    logger.log(
+        level,
+        "task=%s queue=%s state=%s duration_ms=%d",
+        task.name if task else "?", queue, state, duration * 1000,
+    )
 
 
 @app.task(name="addition_task")
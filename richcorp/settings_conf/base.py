@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     
     "rest_framework",
@@ -199,6 +200,17 @@ PARLER_LANGUAGES = {
 }
 
 # Redis cache
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "TIMEOUT": 60 * 10,  # 10 minutes default
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 # Google Translate (optional)
 GOOGLE_TRANSLATE_ENABLED = os.getenv("GOOGLE_TRANSLATE_ENABLED", "0") == "1"
@@ -232,20 +244,19 @@ from celery.schedules import crontab
 CELERY_BEAT_SCHEDULE = {
     # every day at 18:00 local time
     "library_reading_reminders_daily": {
-        "task": "apps.abc_apps.library.tasks.send_reading_reminders_task",
+        "task": "apps.library.tasks.send_reading_reminders_task",
         "schedule": crontab(hour=18, minute=0),
     },
 
     # return reminders every 10 minutes
     "library_return_reminders_every_10min": {
-        "task": "apps.abc_apps.library.tasks.send_return_reminders_task",
+        "task": "apps.library.tasks.send_return_reminders_task",
         "schedule": crontab(minute="*/10"),
     },
     
     "generate-periods-every-year-jan-1": {
         "task": "apps.abc_apps.academics.tasks.ensure_periods_for_current_year",
         "schedule": crontab(minute=5, hour=0, day_of_month=10, month_of_year=2),  # Jan 1st 00:05
-        "args": (2026,),  # ✅ option 1 (fixe, pas top)
     },
     
      "generate-periods-next-year-dec-15": {
@@ -253,6 +264,16 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute=0, hour=1, day_of_month=25, month_of_year=12),  # 15 Dec 01:00
     },
      
+      "rank-popular-speeches-every-10min": {
+        "task": "apps.abc_apps.speeches.tasks.rank_popular_speeches",
+        "schedule": crontab(minute="*/10"),
+    },
+
+      "expire-speech-audio-uploads-hourly": {
+        "task": "apps.abc_apps.speeches.tasks.expire_speech_audio_uploads",
+        "schedule": crontab(minute=15),
+    },
+
       "process-reenrollment-intents-nightly": {
         "task": "apps.abc_apps.attendance.tasks.process_reenrollment_intents",
         "schedule": crontab(minute=10, hour=0),
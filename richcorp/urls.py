@@ -22,6 +22,7 @@ urlpatterns = [
     path("", include("apps.abc_apps.students.urls")),
     path("api/", include("apps.abc_apps.attendance.urls")),
     path("api/", include("apps.abc_apps.speeches.urls")),
+    path("api/library/", include("apps.abc_apps.library.urls")),
     # Frontend website
     path("", include("apps.website.urls")),
 ]